@@ -1,6 +1,12 @@
+from collections import Counter
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import Cita, HistorialCita
+from .transiciones import transicionar_lote
+from apps.reportes.resumen import marcar_dias_pendientes
+from apps.usuarios.inasistencias import penalizar_inasistencias
 
 @admin.register(Cita)
 class CitaAdmin(admin.ModelAdmin):
@@ -71,20 +77,29 @@ class CitaAdmin(admin.ModelAdmin):
     
     def marcar_completada(self, request, queryset):
         """Marca las citas seleccionadas como completadas"""
-        count = queryset.filter(estado='CONFIRMADA').update(estado='COMPLETADA')
+        citas = queryset.filter(estado='CONFIRMADA')
+        marcar_dias_pendientes(citas)
+        count = citas.update(estado='COMPLETADA', fecha_actualizacion=timezone.now())
         self.message_user(request, f'{count} cita(s) marcada(s) como completada(s).')
     marcar_completada.short_description = "Marcar como Completada"
     
     def marcar_cancelada(self, request, queryset):
         """Marca las citas seleccionadas como canceladas"""
-        count = queryset.exclude(estado__in=['COMPLETADA', 'NO_ASISTIO']).update(estado='CANCELADA')
+        citas = queryset.exclude(estado__in=['COMPLETADA', 'NO_ASISTIO'])
+        marcar_dias_pendientes(citas)
+        count = citas.update(estado='CANCELADA', fecha_actualizacion=timezone.now())
         self.message_user(request, f'{count} cita(s) cancelada(s).')
     marcar_cancelada.short_description = "Cancelar citas"
     
     def marcar_no_asistio(self, request, queryset):
-        """Marca las citas como no asistidas"""
-        count = queryset.filter(estado='CONFIRMADA').update(estado='NO_ASISTIO')
-        self.message_user(request, f'{count} cita(s) marcada(s) como No Asistió.')
+        """Marca las citas como no asistidas y penaliza a sus pacientes"""
+        with transaction.atomic():
+            marcadas, = transicionar_lote(
+                [(queryset, 'marcar_no_asistio', 'Marcada como No Asistió por el administrador', {})],
+                request.user
+            )
+            penalizar_inasistencias(Counter(cita.paciente_id for cita in marcadas))
+        self.message_user(request, f'{len(marcadas)} cita(s) marcada(s) como No Asistió.')
     marcar_no_asistio.short_description = "Marcar como No Asistió"
     
     def get_queryset(self, request):
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class CitasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.citas'
-    verbose_name = 'Citas Médicas'
\ No newline at end of file
+    verbose_name = 'Citas Médicas'
+    
+    def ready(self):
+        """Registra las señales que programan los recordatorios de cada cita"""
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Citas en conflicto con un bloqueo de horario.
+
+Un bloqueo (vacaciones, licencia, capacitación) puede crearse sobre una agenda
+con citas ya reservadas. Las citas activas que se solapan con el intervalo
+[fecha_inicio, fecha_fin) del bloqueo se obtienen con una sola consulta de
+rangos: el intervalo de cada cita (RangoHorarioCita) && el del bloqueo. Es la
+misma expresión y la misma condición de estado de la restricción
+cita_sin_solapamiento, por lo que la consulta usa su índice GiST y no depende
+de la duración del bloqueo ni de cuántas citas tenga el profesional.
+
+Las citas encontradas se resuelven después en lotes con la tarea
+resolver_conflictos_bloqueo: se cancelan o solo se marcan en su historial, y
+se notifica a los pacientes.
+"""
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.db.models import DateTimeField, Func, Value
+from .models import Cita, RangoHorarioCita
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Acciones con las que se pueden resolver los conflictos de un bloqueo
+RESOLUCIONES_CONFLICTO = (
+    ('cancelar', 'Cancelar las citas'),
+    ('marcar', 'Marcar las citas para reagendar'),
+)
+
+
+def _hora_utc(fecha_hora):
+    """timestamptz -> timestamp en UTC, como en RangoHorarioCita"""
+    return Func(
+        Value(fecha_hora, output_field=DateTimeField()),
+        template="(%(expressions)s AT TIME ZONE 'UTC')",
+        output_field=DateTimeField()
+    )
+
+
+def citas_en_conflicto(profesional_id, fecha_inicio, fecha_fin):
+    """Citas activas del profesional que se solapan con [fecha_inicio, fecha_fin)"""
+    rango = Func(
+        _hora_utc(fecha_inicio), _hora_utc(fecha_fin), Value('[)'),
+        function='TSRANGE',
+        output_field=DateTimeRangeField()
+    )
+    return Cita.objects.alias(rango=RangoHorarioCita()).filter(
+        profesional_id=profesional_id,
+        estado__in=Cita.ESTADOS_ACTIVOS,
+        rango__overlap=rango
+    )
+
+
+def conflictos_bloqueo(bloqueo):
+    return citas_en_conflicto(bloqueo.profesional_id, bloqueo.fecha_inicio, bloqueo.fecha_fin)
+
+
+def programar_resolucion(bloqueo, accion, usuario=None):
+    """
+    Encola la resolución de los conflictos del bloqueo. Retorna True si se
+    publicó la tarea; si el broker no está disponible las citas quedan igual
+    y se pueden resolver desde la agenda.
+    """
+    from .tasks import resolver_conflictos_bloqueo
+    try:
+        resolver_conflictos_bloqueo.delay(bloqueo.id, accion, getattr(usuario, 'id', None))
+    except Exception as e:
+        logger.warning(f"No se pudo encolar la resolución de conflictos del bloqueo #{bloqueo.id}: {str(e)}")
+        return False
+    return True
@@ -0,0 +1,331 @@
+"""
+Generador de datos sintéticos a escala de producción.
+
+Crea profesionales con su grilla semanal de disponibilidad, pacientes, citas e
+historial con bulk_create por lotes. El resultado depende solo de la semilla y
+de la fecha de referencia, de modo que dos ejecuciones sobre bases vacías
+producen los mismos datos.
+
+Las citas se generan sobre la grilla de cada profesional sin solaparse, por lo
+que respetan la restricción 'cita_sin_solapamiento'. bulk_create no emite
+señales: al terminar se deben reconstruir los resúmenes diarios y, si está
+activo, el inventario de horarios (el comando 'generar_datos_carga' lo hace).
+"""
+import random
+from datetime import datetime, time, timedelta
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from apps.usuarios.models import Usuario
+from apps.profesionales.models import Profesional, DisponibilidadProfesional
+from apps.profesionales.horarios import candidatos_dia
+from .models import Cita, HistorialCita
+
+
+# Los usuarios sintéticos se reconocen por el dominio de su email
+DOMINIO_SINTETICO = 'carga.sgc.local'
+
+# Contraseña común de los usuarios sintéticos (se usa en 'prueba_carga')
+PASSWORD_SINTETICO = 'carga1234'
+
+# Rangos de RUT reservados para usuarios sintéticos
+RUT_BASE_PROFESIONALES = 60000000
+RUT_BASE_PACIENTES = 70000000
+
+NOMBRES = (
+    'Ana', 'Benjamín', 'Camila', 'Diego', 'Elena', 'Felipe', 'Gabriela', 'Hugo',
+    'Isidora', 'Joaquín', 'Josefa', 'Lucas', 'Martina', 'Matías', 'Sofía', 'Tomás',
+    'Valentina', 'Vicente', 'Catalina', 'Agustín', 'Florencia', 'Maximiliano',
+)
+APELLIDOS = (
+    'González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva',
+    'Martínez', 'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández',
+    'Torres', 'Araya', 'Flores', 'Espinoza', 'Valenzuela', 'Castillo', 'Tapia',
+)
+ESPECIALIDADES = (
+    ('Medicina General', 'Médico Cirujano'),
+    ('Pediatría', 'Médico Pediatra'),
+    ('Cardiología', 'Médico Cardiólogo'),
+    ('Dermatología', 'Médico Dermatólogo'),
+    ('Ginecología', 'Médico Ginecólogo'),
+    ('Traumatología', 'Médico Traumatólogo'),
+    ('Psicología', 'Psicólogo'),
+    ('Nutrición', 'Nutricionista'),
+    ('Kinesiología', 'Kinesiólogo'),
+    ('Odontología', 'Cirujano Dentista'),
+)
+DURACIONES_CITA = (15, 20, 30, 30, 30, 45, 60)
+MOTIVOS_CONSULTA = (
+    'Control', 'Dolor de cabeza', 'Dolor abdominal', 'Chequeo preventivo',
+    'Revisión de exámenes', 'Tos persistente', 'Dolor lumbar', 'Renovación de receta',
+)
+
+# Probabilidades acumuladas del estado final de una cita según si ya ocurrió
+ESTADOS_PASADOS = (('COMPLETADA', 0.75), ('NO_ASISTIO', 0.83), ('CANCELADA', 1.0))
+ESTADOS_FUTUROS = (('AGENDADA', 0.50), ('CONFIRMADA', 0.85), ('CANCELADA', 1.0))
+
+# Transiciones registradas en el historial para llegar a cada estado
+TRANSICIONES = {
+    'AGENDADA': (),
+    'CONFIRMADA': (('AGENDADA', 'CONFIRMADA'),),
+    'COMPLETADA': (('AGENDADA', 'CONFIRMADA'), ('CONFIRMADA', 'COMPLETADA')),
+    'NO_ASISTIO': (('AGENDADA', 'NO_ASISTIO'),),
+    'CANCELADA': (('AGENDADA', 'CANCELADA'),),
+}
+
+
+def digito_verificador(numero):
+    """Dígito verificador (módulo 11) de un RUT chileno"""
+    suma, factor = 0, 2
+    while numero:
+        suma += (numero % 10) * factor
+        numero //= 10
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - suma % 11
+    return {11: '0', 10: 'K'}.get(resto, str(resto))
+
+
+def rut_sintetico(base, indice):
+    numero = base + indice
+    return f'{numero}-{digito_verificador(numero)}'
+
+
+def existen_datos_sinteticos():
+    return Usuario.objects.filter(email__endswith=f'@{DOMINIO_SINTETICO}').exists()
+
+
+def elegir_acumulado(rng, opciones):
+    """Elige de una tupla (valor, probabilidad acumulada)"""
+    valor = rng.random()
+    for opcion, acumulado in opciones:
+        if valor < acumulado:
+            return opcion
+    return opciones[-1][0]
+
+
+class GeneradorDatos:
+    """
+    Genera los datos en orden: profesionales, disponibilidades, pacientes,
+    citas e historial. 'informar' recibe mensajes de avance.
+    
+    'grilla' ({dia_semana: [(hora_inicio, hora_fin), ...]}) y 'duracion_cita'
+    fijan la agenda de todos los profesionales en lugar de sortearla, para
+    escenarios reproducibles como los benchmarks.
+    """
+    
+    def __init__(self, profesionales, pacientes, citas, semilla=0, fecha_referencia=None,
+                 dias_pasados=365, dias_futuros=60, tamano_lote=5000, informar=None,
+                 grilla=None, duracion_cita=None):
+        self.cantidad_profesionales = profesionales
+        self.cantidad_pacientes = pacientes
+        self.cantidad_citas = citas
+        self.grilla = grilla
+        self.duracion_cita = duracion_cita
+        self.rng = random.Random(semilla)
+        self.fecha_referencia = fecha_referencia or timezone.localdate()
+        self.dias_pasados = dias_pasados
+        self.dias_futuros = dias_futuros
+        self.tamano_lote = tamano_lote
+        self.informar = informar or (lambda mensaje: None)
+        # Un solo hash (sal derivada de la semilla) para todos los usuarios
+        self.password = make_password(PASSWORD_SINTETICO, salt=f'carga{semilla}')
+        self.momento_referencia = timezone.make_aware(
+            datetime.combine(self.fecha_referencia, time(0)), timezone.get_current_timezone()
+        )
+    
+    def generar(self):
+        """Genera todo y retorna los conteos de filas creadas"""
+        profesionales = self.crear_profesionales()
+        grillas = self.crear_disponibilidades(profesionales)
+        pacientes = self.crear_pacientes()
+        citas, historial = self.crear_citas(profesionales, grillas, pacientes)
+        return {
+            'profesionales': len(profesionales),
+            'disponibilidades': sum(len(bloques) for grilla in grillas.values() for bloques in grilla.values()),
+            'pacientes': len(pacientes),
+            'citas': citas,
+            'historial': historial,
+        }
+    
+    def _usuario(self, base, indice, rol):
+        nombre = self.rng.choice(NOMBRES)
+        apellido = f'{self.rng.choice(APELLIDOS)} {self.rng.choice(APELLIDOS)}'
+        return Usuario(
+            rut=rut_sintetico(base, indice),
+            email=f'{rol.lower()}{indice}@{DOMINIO_SINTETICO}',
+            nombre=nombre,
+            apellido=apellido,
+            telefono=f'+569{self.rng.randrange(10000000, 99999999)}',
+            rol=rol,
+            password=self.password,
+            date_joined=self.momento_referencia - timedelta(days=self.rng.randrange(730)),
+        )
+    
+    def _crear_en_lotes(self, modelo, filas):
+        """bulk_create por lotes, cada uno en su transacción. Retorna las filas con id"""
+        creadas = []
+        for inicio in range(0, len(filas), self.tamano_lote):
+            with transaction.atomic():
+                creadas.extend(modelo.objects.bulk_create(filas[inicio:inicio + self.tamano_lote]))
+        return creadas
+    
+    def crear_profesionales(self):
+        usuarios = self._crear_en_lotes(Usuario, [
+            self._usuario(RUT_BASE_PROFESIONALES, i, 'PROFESIONAL')
+            for i in range(self.cantidad_profesionales)
+        ])
+        filas = []
+        for i, usuario in enumerate(usuarios):
+            especialidad, titulo = self.rng.choice(ESPECIALIDADES)
+            filas.append(Profesional(
+                usuario=usuario,
+                especialidad=especialidad,
+                registro_profesional=f'CARGA-{i:07d}',
+                anos_experiencia=self.rng.randrange(1, 40),
+                titulo_profesional=titulo,
+                duracion_cita_minutos=self.duracion_cita or self.rng.choice(DURACIONES_CITA),
+            ))
+        profesionales = self._crear_en_lotes(Profesional, filas)
+        self.informar(f'Profesionales: {len(profesionales)}')
+        return profesionales
+    
+    def _grilla_semanal(self):
+        """Bloques (hora_inicio, hora_fin) por día de la semana: mañana y tarde"""
+        if self.grilla is not None:
+            return self.grilla
+        dias = list(range(5))
+        if self.rng.random() < 0.3:
+            dias.append(5)
+        grilla = {}
+        for dia in dias:
+            if self.rng.random() < 0.1:
+                continue  # Día libre
+            bloques = [(time(self.rng.choice((8, 9))), time(self.rng.choice((12, 13))))]
+            if dia < 5 and self.rng.random() < 0.8:
+                bloques.append((time(self.rng.choice((14, 15))), time(self.rng.choice((17, 18, 19)))))
+            grilla[dia] = bloques
+        return grilla
+    
+    def crear_disponibilidades(self, profesionales):
+        grillas = {}
+        filas = []
+        for profesional in profesionales:
+            grilla = grillas[profesional.id] = self._grilla_semanal()
+            for dia, bloques in grilla.items():
+                filas.extend(
+                    DisponibilidadProfesional(
+                        profesional=profesional, dia_semana=dia, hora_inicio=inicio, hora_fin=fin
+                    )
+                    for inicio, fin in bloques
+                )
+        self._crear_en_lotes(DisponibilidadProfesional, filas)
+        self.informar(f'Disponibilidades: {len(filas)}')
+        return grillas
+    
+    def crear_pacientes(self):
+        ids = []
+        for inicio in range(0, self.cantidad_pacientes, self.tamano_lote):
+            fin = min(inicio + self.tamano_lote, self.cantidad_pacientes)
+            lote = [self._usuario(RUT_BASE_PACIENTES, i, 'PACIENTE') for i in range(inicio, fin)]
+            with transaction.atomic():
+                ids.extend(usuario.id for usuario in Usuario.objects.bulk_create(lote))
+            self.informar(f'Pacientes: {len(ids)}/{self.cantidad_pacientes}')
+        return ids
+    
+    def _horarios_profesional(self, grilla, duracion):
+        """Todos los inicios de horario de la grilla dentro del rango de fechas"""
+        fecha = self.fecha_referencia - timedelta(days=self.dias_pasados)
+        fin = self.fecha_referencia + timedelta(days=self.dias_futuros)
+        while fecha < fin:
+            bloques = grilla.get(fecha.weekday())
+            if bloques:
+                yield from candidatos_dia(fecha, bloques, duracion)
+            fecha += timedelta(days=1)
+    
+    def _contar_horarios(self, grilla, duracion):
+        """Horarios de la grilla en el rango, sin materializarlos"""
+        por_dia = {
+            dia: sum(
+                (datetime.combine(self.fecha_referencia, fin) - datetime.combine(self.fecha_referencia, inicio)) // duracion
+                for inicio, fin in bloques
+            )
+            for dia, bloques in grilla.items()
+        }
+        fecha = self.fecha_referencia - timedelta(days=self.dias_pasados)
+        total = 0
+        for i in range(self.dias_pasados + self.dias_futuros):
+            total += por_dia.get((fecha + timedelta(days=i)).weekday(), 0)
+        return total
+    
+    def crear_citas(self, profesionales, grillas, pacientes):
+        """
+        Reparte las citas entre los profesionales eligiendo horarios de su
+        grilla por muestreo de selección (cada horario con la misma
+        probabilidad, exactamente la cantidad pedida). Lo que no cabe en la
+        grilla de un profesional pasa al siguiente.
+        """
+        por_profesional, sobrantes = divmod(self.cantidad_citas, max(len(profesionales), 1))
+        lote = []
+        pendientes = total_citas = total_historial = 0
+        
+        for indice, profesional in enumerate(profesionales):
+            objetivo = por_profesional + (1 if indice < sobrantes else 0) + pendientes
+            duracion = timedelta(minutes=profesional.duracion_cita_minutos)
+            grilla = grillas[profesional.id]
+            restantes = self._contar_horarios(grilla, duracion)
+            objetivo, pendientes = min(objetivo, restantes), max(objetivo - restantes, 0)
+            
+            for inicio in self._horarios_profesional(grilla, duracion):
+                if not objetivo:
+                    break
+                restantes -= 1
+                if self.rng.random() * (restantes + 1) >= objetivo:
+                    continue
+                objetivo -= 1
+                lote.append(self._cita(profesional, inicio, pacientes))
+                if len(lote) >= self.tamano_lote:
+                    total_historial += self._guardar_citas(lote)
+                    total_citas += len(lote)
+                    lote = []
+                    self.informar(f'Citas: {total_citas}/{self.cantidad_citas}')
+        
+        if lote:
+            total_historial += self._guardar_citas(lote)
+            total_citas += len(lote)
+        self.informar(f'Citas: {total_citas}, historial: {total_historial}')
+        return total_citas, total_historial
+    
+    def _cita(self, profesional, inicio, pacientes):
+        # Pasada o futura respecto de la fecha de referencia, no del reloj
+        pasada = inicio < self.momento_referencia
+        estado = elegir_acumulado(self.rng, ESTADOS_PASADOS if pasada else ESTADOS_FUTUROS)
+        confirmada = estado in ('CONFIRMADA', 'COMPLETADA')
+        cita = Cita(
+            paciente_id=self.rng.choice(pacientes),
+            profesional=profesional,
+            fecha_hora=inicio,
+            duracion_minutos=profesional.duracion_cita_minutos,
+            motivo_consulta=self.rng.choice(MOTIVOS_CONSULTA),
+            estado=estado,
+            confirmada_por_paciente=confirmada,
+            fecha_confirmacion=min(inicio - timedelta(days=1), self.momento_referencia) if confirmada else None,
+            recordatorio_enviado=pasada,
+        )
+        if estado == 'CANCELADA':
+            cita.fecha_cancelacion = min(
+                inicio - timedelta(days=self.rng.randrange(1, 10)), self.momento_referencia
+            )
+            cita.motivo_cancelacion = 'Cancelada por el paciente'
+        return cita
+    
+    def _guardar_citas(self, lote):
+        """Inserta un lote de citas y su historial. Retorna las filas de historial"""
+        with transaction.atomic():
+            citas = Cita.objects.bulk_create(lote)
+            historial = [
+                HistorialCita(cita=cita, estado_anterior=anterior, estado_nuevo=nuevo)
+                for cita in citas
+                for anterior, nuevo in TRANSICIONES[cita.estado]
+            ]
+            HistorialCita.objects.bulk_create(historial, batch_size=self.tamano_lote)
+        return len(historial)
@@ -0,0 +1,110 @@
+"""
+Cálculo de estadísticas de citas con agregación condicional.
+
+Todas las cuentas por estado (y sus desgloses opcionales por profesional,
+especialidad o día) se obtienen en una sola consulta: cada estado es un
+COUNT(*) FILTER (WHERE estado = ...) sobre el mismo recorrido de la tabla.
+"""
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Concat, TruncDate
+from .models import Cita
+
+
+# Nombre del campo de salida para cada estado de Cita.ESTADOS
+CAMPOS_ESTADO = {
+    'AGENDADA': 'citas_agendadas',
+    'CONFIRMADA': 'citas_confirmadas',
+    'EN_CURSO': 'citas_en_curso',
+    'COMPLETADA': 'citas_completadas',
+    'CANCELADA': 'citas_canceladas',
+    'NO_ASISTIO': 'citas_no_asistio',
+}
+
+# Campos de conteo de un resumen (total y uno por estado)
+CAMPOS_CONTEO = ('total_citas', *CAMPOS_ESTADO.values())
+
+# Prefijo interno de las columnas de agrupación, para no chocar con campos del modelo
+PREFIJO_GRUPO = 'grupo_'
+
+
+def nombre_profesional():
+    """Expresión con el nombre completo del profesional de la fila"""
+    return Concat(
+        'profesional__usuario__nombre', Value(' '), 'profesional__usuario__apellido'
+    )
+
+
+# Agrupaciones permitidas sobre Cita: nombre público -> {columna: expresión}
+AGRUPACIONES_CITA = {
+    'profesional': {
+        'profesional': F('profesional_id'),
+        'profesional_nombre': nombre_profesional(),
+    },
+    'especialidad': {'especialidad': F('profesional__especialidad')},
+    'dia': {'dia': TruncDate('fecha_hora')},
+}
+
+
+def agregados_por_estado():
+    """Retorna las expresiones de agregación condicional por estado sobre Cita"""
+    agregados = {'total_citas': Count('id')}
+    for estado, campo in CAMPOS_ESTADO.items():
+        agregados[campo] = Count('id', filter=Q(estado=estado))
+    return agregados
+
+
+def tasa_inasistencia(fila):
+    """Porcentaje de inasistencias sobre citas realizadas (completadas + no asistió)"""
+    realizadas = fila['citas_completadas'] + fila['citas_no_asistio']
+    return round(fila['citas_no_asistio'] / realizadas * 100, 2) if realizadas > 0 else 0
+
+
+def _resumen(fila, detalle_estados=True):
+    """Construye la respuesta de una fila de conteos"""
+    resumen = {campo: fila[campo] or 0 for campo in CAMPOS_CONTEO}
+    resumen['tasa_inasistencia'] = tasa_inasistencia(resumen)
+    if detalle_estados:
+        resumen['estadisticas_por_estado'] = [
+            {'estado': estado, 'total': resumen[campo]}
+            for estado, campo in CAMPOS_ESTADO.items()
+            if resumen[campo]
+        ]
+    return resumen
+
+
+def calcular_estadisticas(queryset, agrupaciones=(), agregados=None, expresiones=None):
+    """
+    Calcula las estadísticas del queryset en una sola consulta.
+    
+    Sin agrupaciones usa aggregate(). Con agrupaciones usa values().annotate()
+    y obtiene los totales sumando las filas del desglose en memoria, de modo
+    que sigue siendo un único viaje a la base de datos.
+    
+    'agregados' y 'expresiones' permiten reutilizar el cálculo sobre otras
+    fuentes (p. ej. los resúmenes diarios); por defecto se cuenta sobre Cita.
+    """
+    agregados = agregados or agregados_por_estado()
+    expresiones = expresiones or AGRUPACIONES_CITA
+    
+    if not agrupaciones:
+        return _resumen(queryset.order_by().aggregate(**agregados))
+    
+    columnas = {
+        PREFIJO_GRUPO + columna: expresion
+        for agrupacion in agrupaciones
+        for columna, expresion in expresiones[agrupacion].items()
+    }
+    filas = list(
+        queryset.order_by().values(**columnas).annotate(**agregados).order_by(*columnas)
+    )
+    
+    totales = {campo: sum(fila[campo] or 0 for fila in filas) for campo in CAMPOS_CONTEO}
+    resultado = _resumen(totales)
+    resultado['desglose'] = [
+        {
+            **{columna[len(PREFIJO_GRUPO):]: fila[columna] for columna in columnas},
+            **_resumen(fila, detalle_estados=False)
+        }
+        for fila in filas
+    ]
+    return resultado
@@ -0,0 +1,19 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+# Restricción de exclusión que impide citas activas solapadas (ver Cita.Meta)
+RESTRICCION_SOLAPAMIENTO = 'cita_sin_solapamiento'
+
+
+class HorarioOcupado(APIException):
+    """El horario solicitado se solapa con otra cita activa del profesional"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Este horario ya está ocupado'
+    default_code = 'horario_ocupado'
+
+
+def es_conflicto_horario(error):
+    """Indica si un IntegrityError proviene de la restricción de solapamiento"""
+    diag = getattr(error.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) == RESTRICCION_SOLAPAMIENTO
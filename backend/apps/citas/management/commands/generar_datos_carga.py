@@ -0,0 +1,57 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from apps.citas.datos_sinteticos import GeneradorDatos, existen_datos_sinteticos, PASSWORD_SINTETICO
+from apps.profesionales.inventario import inventario_activo
+
+
+class Command(BaseCommand):
+    """Genera datos sintéticos a escala de producción para pruebas de carga"""
+    
+    help = 'Genera profesionales, pacientes, citas e historial sintéticos de forma determinista'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--profesionales', type=int, default=2000)
+        parser.add_argument('--pacientes', type=int, default=200000)
+        parser.add_argument('--citas', type=int, default=2000000)
+        parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador')
+        parser.add_argument(
+            '--fecha-referencia',
+            type=parse_date,
+            help='Fecha "hoy" de los datos (YYYY-MM-DD). Por defecto, la fecha actual.'
+        )
+        parser.add_argument('--dias-pasados', type=int, default=365)
+        parser.add_argument('--dias-futuros', type=int, default=60)
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por bulk_create')
+        parser.add_argument(
+            '--sin-reconstruir',
+            action='store_true',
+            help='No reconstruir resúmenes diarios ni inventario al terminar'
+        )
+    
+    def handle(self, *args, **options):
+        if existen_datos_sinteticos():
+            raise CommandError('Ya existen datos sintéticos: use una base de datos vacía')
+        
+        generador = GeneradorDatos(
+            profesionales=options['profesionales'],
+            pacientes=options['pacientes'],
+            citas=options['citas'],
+            semilla=options['semilla'],
+            fecha_referencia=options['fecha_referencia'],
+            dias_pasados=options['dias_pasados'],
+            dias_futuros=options['dias_futuros'],
+            tamano_lote=options['lote'],
+            informar=self.stdout.write,
+        )
+        conteos = generador.generar()
+        
+        # bulk_create no emite señales: recalcular lo que se mantiene con ellas
+        if not options['sin_reconstruir']:
+            call_command('reconstruir_resumenes', stdout=self.stdout)
+            if inventario_activo():
+                call_command('reconstruir_inventario', stdout=self.stdout)
+        
+        resumen = ', '.join(f'{nombre}: {cantidad}' for nombre, cantidad in conteos.items())
+        self.stdout.write(self.style.SUCCESS(f'Datos generados. {resumen}'))
+        self.stdout.write(f'Contraseña de los usuarios sintéticos: {PASSWORD_SINTETICO}')
@@ -0,0 +1,197 @@
+"""
+Prueba de carga local del flujo de reserva contra un servidor en ejecución.
+
+Cada usuario virtual inicia sesión con un paciente sintético (ver
+'generar_datos_carga') y repite el embudo: listar profesionales, consultar los
+horarios de uno, crear una cita en un horario libre y confirmarla. Al terminar
+informa p50, p95 y p99 por paso. Un 409 al crear es un conflicto esperado bajo
+concurrencia (otro usuario tomó el horario) y se informa aparte de los errores.
+"""
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.usuarios.models import Usuario
+from apps.citas.datos_sinteticos import DOMINIO_SINTETICO, PASSWORD_SINTETICO
+
+
+PASOS = ('login', 'listar_profesionales', 'horarios', 'crear_cita', 'confirmar', 'embudo')
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por rango más cercano de una lista ordenada"""
+    if not valores_ordenados:
+        return None
+    indice = max(int(round(p / 100 * len(valores_ordenados) + 0.5)) - 1, 0)
+    return valores_ordenados[min(indice, len(valores_ordenados) - 1)]
+
+
+class ClienteApi:
+    """Cliente HTTP mínimo (urllib) que mide cada petición"""
+    
+    def __init__(self, url_base, mediciones):
+        self.url_base = url_base.rstrip('/')
+        self.mediciones = mediciones
+        self.token = None
+    
+    def peticion(self, paso, metodo, ruta, datos=None):
+        """Retorna (código, cuerpo JSON o None) y registra la duración del paso"""
+        cuerpo = json.dumps(datos).encode() if datos is not None else None
+        peticion = urllib.request.Request(f'{self.url_base}{ruta}', data=cuerpo, method=metodo)
+        peticion.add_header('Content-Type', 'application/json')
+        if self.token:
+            peticion.add_header('Authorization', f'Bearer {self.token}')
+        
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+                codigo, contenido = respuesta.status, respuesta.read()
+        except urllib.error.HTTPError as e:
+            codigo, contenido = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            codigo, contenido = None, b''
+        self.mediciones.registrar(paso, time.perf_counter() - inicio, codigo)
+        
+        try:
+            return codigo, json.loads(contenido) if contenido else None
+        except ValueError:
+            return codigo, None
+
+
+class Mediciones:
+    """Duraciones y códigos por paso. list.append es atómico entre hilos"""
+    
+    def __init__(self):
+        self.duraciones = defaultdict(list)
+        self.codigos = defaultdict(list)
+    
+    def registrar(self, paso, duracion, codigo):
+        self.duraciones[paso].append(duracion)
+        self.codigos[paso].append(codigo)
+
+
+class Command(BaseCommand):
+    """Repite el embudo de reserva con usuarios concurrentes e informa percentiles"""
+    
+    help = 'Prueba de carga del flujo de reserva (profesionales → horarios → crear → confirmar)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='URL base del servidor')
+        parser.add_argument('--usuarios', type=int, default=20, help='Usuarios virtuales concurrentes')
+        parser.add_argument('--iteraciones', type=int, default=10, help='Embudos por usuario')
+        parser.add_argument('--dias', type=int, default=14, help='Días de horarios consultados')
+        parser.add_argument('--semilla', type=int, default=0)
+    
+    def handle(self, *args, **options):
+        ruts = list(
+            Usuario.objects.filter(
+                rol='PACIENTE', bloqueado=False, email__endswith=f'@{DOMINIO_SINTETICO}'
+            ).order_by('id').values_list('rut', flat=True)[:options['usuarios']]
+        )
+        if not ruts:
+            raise CommandError('No hay pacientes sintéticos: ejecute primero generar_datos_carga')
+        
+        mediciones = Mediciones()
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(ruts)) as executor:
+            resultados = list(executor.map(
+                lambda args: self.usuario_virtual(*args, options, mediciones),
+                [(rut, random.Random(options['semilla'] * 1000003 + i)) for i, rut in enumerate(ruts)]
+            ))
+        duracion = time.perf_counter() - inicio
+        
+        self.informe(mediciones, duracion, sum(resultados))
+    
+    def usuario_virtual(self, rut, rng, options, mediciones):
+        """Ejecuta los embudos de un usuario. Retorna las citas confirmadas"""
+        cliente = ClienteApi(options['url'], mediciones)
+        codigo, datos = cliente.peticion('login', 'POST', '/api/v1/auth/login/', {
+            'rut': rut, 'password': PASSWORD_SINTETICO
+        })
+        if codigo != 200:
+            return 0
+        cliente.token = datos['access']
+        
+        confirmadas = 0
+        for _ in range(options['iteraciones']):
+            inicio = time.perf_counter()
+            if self.embudo(cliente, rng, options['dias']):
+                confirmadas += 1
+                mediciones.registrar('embudo', time.perf_counter() - inicio, 200)
+        return confirmadas
+    
+    def embudo(self, cliente, rng, dias):
+        """Un recorrido completo del flujo de reserva. Retorna True si se confirmó"""
+        codigo, datos = cliente.peticion('listar_profesionales', 'GET', '/api/v1/profesionales/')
+        if codigo != 200 or not datos['results']:
+            return False
+        # Otras páginas del catálogo, como haría un paciente que navega
+        paginas = max((datos['count'] - 1) // len(datos['results']) + 1, 1)
+        pagina = rng.randrange(1, paginas + 1)
+        if pagina > 1:
+            codigo, datos = cliente.peticion(
+                'listar_profesionales', 'GET', f'/api/v1/profesionales/?page={pagina}'
+            )
+            if codigo != 200 or not datos['results']:
+                return False
+        profesional = rng.choice(datos['results'])['id']
+        
+        manana = timezone.localdate() + timedelta(days=1)
+        codigo, datos = cliente.peticion(
+            'horarios', 'GET',
+            f'/api/v1/profesionales/{profesional}/horarios_rango/'
+            f'?fecha_desde={manana}&fecha_hasta={manana + timedelta(days=dias - 1)}'
+        )
+        if codigo != 200 or not datos['dias']:
+            return False
+        
+        # Elegir un horario libre: un día, un tramo [hora_inicio, cantidad] y un horario del tramo
+        fecha = rng.choice(sorted(datos['dias']))
+        tramos = datos['dias'][fecha]
+        if not tramos:
+            return False
+        hora, cantidad = rng.choice(tramos)
+        fecha_hora = timezone.make_aware(
+            datetime.fromisoformat(f'{fecha}T{hora}')
+        ) + timedelta(minutes=datos['duracion_minutos'] * rng.randrange(cantidad))
+        
+        codigo, cita = cliente.peticion('crear_cita', 'POST', '/api/v1/citas/', {
+            'profesional': profesional,
+            'fecha_hora': fecha_hora.isoformat(),
+            'duracion_minutos': datos['duracion_minutos'],
+            'motivo_consulta': 'Prueba de carga',
+        })
+        if codigo != 201:
+            return False
+        
+        codigo, _ = cliente.peticion('confirmar', 'POST', f"/api/v1/citas/{cita['id']}/confirmar/", {})
+        return codigo == 200
+    
+    def informe(self, mediciones, duracion, confirmadas):
+        self.stdout.write(
+            f"{'paso':<22}{'n':>7}{'ok':>7}{'409':>6}{'error':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for paso in PASOS:
+            valores = sorted(mediciones.duraciones.get(paso, ()))
+            if not valores:
+                continue
+            codigos = mediciones.codigos[paso]
+            exitos = sum(1 for codigo in codigos if codigo is not None and codigo < 400)
+            conflictos = codigos.count(409)
+            errores = len(codigos) - exitos - conflictos
+            p50, p95, p99 = (percentil(valores, p) * 1000 for p in (50, 95, 99))
+            self.stdout.write(
+                f'{paso:<22}{len(valores):>7}{exitos:>7}{conflictos:>6}{errores:>7}'
+                f'{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}'
+            )
+        total = sum(len(valores) for paso, valores in mediciones.duraciones.items() if paso != 'embudo')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} peticiones en {duracion:.1f} s ({total / duracion:.1f} req/s), '
+            f'{confirmadas} citas confirmadas'
+        ))
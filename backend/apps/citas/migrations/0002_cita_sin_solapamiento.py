@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:46
+
+import apps.citas.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("citas", "0001_initial"),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AlterUniqueTogether(
+            name="cita",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="cita",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(("estado__in", ["AGENDADA", "CONFIRMADA"])),
+                expressions=[
+                    ("profesional", "="),
+                    (apps.citas.models.RangoHorarioCita(), "&&"),
+                ],
+                name="cita_sin_solapamiento",
+                violation_error_message="Este horario ya está ocupado",
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:57
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Los índices se crean sin bloquear las escrituras sobre citas_cita
+    atomic = False
+
+    dependencies = [
+        ("citas", "0002_cita_sin_solapamiento"),
+        ("profesionales", "0002_slotinventario"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="cita",
+            index=models.Index(
+                fields=["paciente", "fecha_hora"], name="cita_paciente_fecha_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="cita",
+            index=models.Index(
+                fields=["profesional", "fecha_hora"], name="cita_prof_fecha_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="cita",
+            index=models.Index(fields=["fecha_hora"], name="cita_fecha_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="cita",
+            index=models.Index(
+                condition=models.Q(("estado__in", ["AGENDADA", "CONFIRMADA"])),
+                fields=["profesional", "fecha_hora"],
+                name="cita_prof_activa_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="cita",
+            index=models.Index(
+                condition=models.Q(
+                    ("estado__in", ["AGENDADA", "CONFIRMADA"]),
+                    ("recordatorio_enviado", False),
+                ),
+                fields=["fecha_hora"],
+                name="cita_recordatorio_pend_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="cita",
+            index=models.Index(
+                condition=models.Q(
+                    ("confirmada_por_paciente", False), ("estado", "AGENDADA")
+                ),
+                fields=["fecha_hora"],
+                name="cita_sin_confirmar_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:00
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("citas", "0003_cita_indices"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="historialcita",
+            index=models.Index(
+                fields=["fecha_cambio", "id"], name="historial_fecha_idx"
+            ),
+        ),
+    ]
@@ -1,10 +1,35 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
 from django.db import models
+from django.db.models import F, Func, Q
 from django.utils import timezone
 from django.conf import settings
 from apps.usuarios.models import Usuario
 from apps.profesionales.models import Profesional
 from datetime import timedelta
 
+class RangoHorarioCita(Func):
+    """
+    Intervalo [fecha_hora, fecha_hora + duracion_minutos) de una cita.
+    
+    Se construye como tsrange sobre la hora UTC porque la suma
+    timestamptz + interval no es IMMUTABLE y no puede usarse en un índice.
+    """
+    output_field = DateTimeRangeField()
+    
+    def __init__(self):
+        super().__init__(F('fecha_hora'), F('duracion_minutos'))
+    
+    def as_sql(self, compiler, connection, **extra_context):
+        inicio_sql, inicio_params = compiler.compile(self.source_expressions[0])
+        duracion_sql, duracion_params = compiler.compile(self.source_expressions[1])
+        inicio_utc = f"({inicio_sql} AT TIME ZONE 'UTC')"
+        sql = (
+            f"TSRANGE({inicio_utc}, {inicio_utc} + ({duracion_sql} * INTERVAL '1 minute'), '[)')"
+        )
+        return sql, (*inicio_params, *inicio_params, *duracion_params)
+
+
 class Cita(models.Model):
     """
     Modelo principal para el agendamiento de citas médicas
@@ -19,6 +44,9 @@ class Cita(models.Model):
         ('NO_ASISTIO', 'No Asistió'),
     )
     
+    # Estados que ocupan el horario del profesional
+    ESTADOS_ACTIVOS = ('AGENDADA', 'CONFIRMADA')
+    
     # Relaciones principales
     paciente = models.ForeignKey(
         Usuario, 
@@ -68,7 +96,42 @@ class Cita(models.Model):
         verbose_name = 'Cita'
         verbose_name_plural = 'Citas'
         ordering = ['-fecha_hora']
-        unique_together = ['profesional', 'fecha_hora']
+        indexes = [
+            # Listados por paciente, profesional o rango de fechas (orden por fecha_hora)
+            models.Index(fields=['paciente', 'fecha_hora'], name='cita_paciente_fecha_idx'),
+            models.Index(fields=['profesional', 'fecha_hora'], name='cita_prof_fecha_idx'),
+            models.Index(fields=['fecha_hora'], name='cita_fecha_idx'),
+            # Citas activas de un profesional: próximas citas y cálculo de horarios
+            models.Index(
+                fields=['profesional', 'fecha_hora'],
+                name='cita_prof_activa_idx',
+                condition=Q(estado__in=['AGENDADA', 'CONFIRMADA'])
+            ),
+            # Barrido de recordatorios pendientes
+            models.Index(
+                fields=['fecha_hora'],
+                name='cita_recordatorio_pend_idx',
+                condition=Q(estado__in=['AGENDADA', 'CONFIRMADA'], recordatorio_enviado=False)
+            ),
+            # Cancelación automática de citas no confirmadas
+            models.Index(
+                fields=['fecha_hora'],
+                name='cita_sin_confirmar_idx',
+                condition=Q(estado='AGENDADA', confirmada_por_paciente=False)
+            ),
+        ]
+        constraints = [
+            # Dos citas activas de un profesional no pueden solaparse
+            ExclusionConstraint(
+                name='cita_sin_solapamiento',
+                expressions=[
+                    ('profesional', RangeOperators.EQUAL),
+                    (RangoHorarioCita(), RangeOperators.OVERLAPS),
+                ],
+                condition=Q(estado__in=['AGENDADA', 'CONFIRMADA']),
+                violation_error_message='Este horario ya está ocupado',
+            ),
+        ]
     
     def __str__(self):
         return f"Cita: {self.paciente.get_full_name()} - {self.profesional} - {self.fecha_hora.strftime('%d/%m/%Y %H:%M')}"
@@ -105,20 +168,10 @@ class Cita(models.Model):
     
     def marcar_no_asistio(self):
         """Marca la cita como no asistida e incrementa contador de inasistencias"""
+        from apps.usuarios.inasistencias import penalizar_inasistencias
         self.estado = 'NO_ASISTIO'
         self.save()
-        
-        # Incrementar contador de inasistencias del paciente
-        self.paciente.incrementar_inasistencias()
-        
-        # Registrar en historial de bloqueos si se bloqueó
-        if self.paciente.bloqueado:
-            from apps.usuarios.models import HistorialBloqueo
-            HistorialBloqueo.objects.create(
-                usuario=self.paciente,
-                motivo=f"Bloqueo automático por {self.paciente.contador_inasistencias} inasistencias",
-                inasistencias_acumuladas=self.paciente.contador_inasistencias
-            )
+        penalizar_inasistencias({self.paciente_id: 1})
     
     def confirmar_cita(self):
         """Confirma la cita por parte del paciente"""
@@ -140,9 +193,10 @@ class Cita(models.Model):
         if self.recordatorio_enviado or self.estado not in ['AGENDADA', 'CONFIRMADA']:
             return False
         
-        # Verificar si falta 24 horas o menos
+        # Verificar si falta 24 horas o menos (con una hora de tolerancia)
         tiempo_restante = self.fecha_hora - timezone.now()
-        return timedelta(hours=23) <= tiempo_restante <= timedelta(hours=25)
+        anticipacion = timedelta(hours=settings.HORAS_ANTICIPACION_RECORDATORIO + 1)
+        return timedelta(0) < tiempo_restante <= anticipacion
 
 
 class HistorialCita(models.Model):
@@ -165,6 +219,9 @@ class HistorialCita(models.Model):
         verbose_name = 'Historial de Cita'
         verbose_name_plural = 'Historiales de Citas'
         ordering = ['-fecha_cambio']
+        indexes = [
+            models.Index(fields=['fecha_cambio', 'id'], name='historial_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"{self.cita} - {self.estado_anterior} → {self.estado_nuevo}"
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Programación de recordatorios por cita.
+
+Cada cita activa tiene su propia tarea enviar_recordatorio_cita con ETA en
+fecha_hora - HORAS_ANTICIPACION_RECORDATORIO, de modo que los envíos se
+reparten a lo largo del día. Solo se publican las tareas cuyo ETA cae dentro
+de las próximas HORAS_PROGRAMACION_RECORDATORIOS horas, para no mantener en el
+broker mensajes con ETA lejanos; el barrido periódico (enviar_recordatorios_citas)
+programa las siguientes y envía las que se hayan perdido.
+"""
+from datetime import timedelta
+from celery import current_app
+from django.conf import settings
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def id_tarea_recordatorio(cita_id, fecha_hora):
+    """Id determinista de la tarea, para poder revocarla sin guardarlo"""
+    return f'recordatorio-cita-{cita_id}-{int(fecha_hora.timestamp())}'
+
+
+def momento_recordatorio(fecha_hora):
+    """Retorna el instante en que se debe enviar el recordatorio de una cita"""
+    return fecha_hora - timedelta(hours=settings.HORAS_ANTICIPACION_RECORDATORIO)
+
+
+def limite_programacion(ahora):
+    """Último ETA que se publica en el broker en este momento"""
+    return ahora + timedelta(hours=settings.HORAS_PROGRAMACION_RECORDATORIOS)
+
+
+def programar_recordatorio(cita_id, fecha_hora, ahora=None):
+    """
+    Publica la tarea de recordatorio de la cita si su ETA está dentro del
+    horizonte de programación. Un recordatorio ya vencido (cita agendada con
+    menos anticipación) se envía de inmediato. Retorna True si se publicó.
+    """
+    ahora = ahora or timezone.now()
+    eta = momento_recordatorio(fecha_hora)
+    if fecha_hora <= ahora or eta > limite_programacion(ahora):
+        return False
+    
+    from .tasks import enviar_recordatorio_cita
+    try:
+        enviar_recordatorio_cita.apply_async(
+            args=[cita_id, fecha_hora.isoformat()],
+            eta=max(eta, ahora),
+            task_id=id_tarea_recordatorio(cita_id, fecha_hora),
+            retry=False
+        )
+    except Exception as e:
+        # El barrido periódico enviará el recordatorio
+        logger.warning(f"No se pudo programar el recordatorio de la cita #{cita_id}: {str(e)}")
+        return False
+    return True
+
+
+def revocar_recordatorio(cita_id, fecha_hora, ahora=None):
+    """
+    Revoca la tarea de recordatorio de la cita si pudo haberse publicado.
+    La tarea igualmente verifica la cita al ejecutarse, por lo que un fallo
+    al revocar no produce envíos incorrectos.
+    """
+    ahora = ahora or timezone.now()
+    if fecha_hora <= ahora or momento_recordatorio(fecha_hora) > limite_programacion(ahora):
+        return
+    
+    try:
+        current_app.control.revoke(id_tarea_recordatorio(cita_id, fecha_hora))
+    except Exception as e:
+        logger.warning(f"No se pudo revocar el recordatorio de la cita #{cita_id}: {str(e)}")
+
+
+def revocar_recordatorios(citas, ahora=None):
+    """
+    Como revocar_recordatorio para varias citas (cita_id, fecha_hora), con un
+    solo mensaje de control al broker.
+    """
+    ahora = ahora or timezone.now()
+    ids = [
+        id_tarea_recordatorio(cita_id, fecha_hora) for cita_id, fecha_hora in citas
+        if fecha_hora > ahora and momento_recordatorio(fecha_hora) <= limite_programacion(ahora)
+    ]
+    if not ids:
+        return
+    
+    try:
+        current_app.control.revoke(ids)
+    except Exception as e:
+        logger.warning(f"No se pudieron revocar {len(ids)} recordatorios: {str(e)}")
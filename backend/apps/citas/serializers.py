@@ -1,8 +1,14 @@
+from collections import Counter
 from rest_framework import serializers
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from .models import Cita, HistorialCita
+from .exceptions import HorarioOcupado, es_conflicto_horario
+from apps.profesionales.inventario import inventario_activo, reclamar_horario
 from apps.profesionales.serializers import ProfesionalListSerializer
 from apps.usuarios.serializers import UsuarioSerializer
+from config import metricas
 
 
 class CitaSerializer(serializers.ModelSerializer):
@@ -39,6 +45,16 @@ class CitaSerializer(serializers.ModelSerializer):
     
     def get_hora_fin(self, obj):
         return obj.get_hora_fin()
+    
+    def update(self, instance, validated_data):
+        """Actualiza la cita traduciendo un solapamiento de horario en 409"""
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as e:
+            if es_conflicto_horario(e):
+                raise HorarioOcupado()
+            raise
 
 
 class CitaCreateSerializer(serializers.ModelSerializer):
@@ -47,8 +63,9 @@ class CitaCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cita
         fields = [
-            'profesional', 'fecha_hora', 'duracion_minutos', 'motivo_consulta'
+            'id', 'profesional', 'fecha_hora', 'duracion_minutos', 'motivo_consulta'
         ]
+        read_only_fields = ['id']
     
     def validate_fecha_hora(self, value):
         """Validar que la fecha sea futura"""
@@ -57,32 +74,25 @@ class CitaCreateSerializer(serializers.ModelSerializer):
         return value
     
     def validate(self, data):
-        """Validar disponibilidad del profesional"""
+        """Validar que el profesional esté activo"""
         profesional = data.get('profesional')
-        fecha_hora = data.get('fecha_hora')
         
-        # Verificar que el profesional esté activo
         if not profesional.activo_para_citas:
             raise serializers.ValidationError({
                 'profesional': 'Este profesional no está activo para citas'
             })
         
-        # Verificar que no haya otra cita en el mismo horario
-        citas_existentes = Cita.objects.filter(
-            profesional=profesional,
-            fecha_hora=fecha_hora,
-            estado__in=['AGENDADA', 'CONFIRMADA']
-        )
-        
-        if citas_existentes.exists():
-            raise serializers.ValidationError({
-                'fecha_hora': 'Este horario ya está ocupado'
-            })
-        
+        # La disponibilidad del horario la garantiza la restricción de
+        # exclusión 'cita_sin_solapamiento' al insertar (ver create)
         return data
     
     def create(self, validated_data):
-        """Crear cita asignando al paciente actual"""
+        """
+        Crear cita asignando al paciente actual.
+        
+        La reserva es una única operación atómica: si otra cita activa se
+        solapa, la base de datos rechaza el INSERT y se responde 409.
+        """
         request = self.context.get('request')
         validated_data['paciente'] = request.user
         
@@ -92,7 +102,31 @@ class CitaCreateSerializer(serializers.ModelSerializer):
                 'No puede agendar citas. Usuario bloqueado.'
             )
         
-        return super().create(validated_data)
+        metricas.RESERVAS_INTENTOS.inc()
+        try:
+            with transaction.atomic():
+                # Reclamar los horarios en el inventario antes de insertar la cita
+                if inventario_activo() and not reclamar_horario(
+                    validated_data['profesional'],
+                    validated_data['fecha_hora'],
+                    validated_data.get(
+                        'duracion_minutos', Cita._meta.get_field('duracion_minutos').get_default()
+                    )
+                ):
+                    raise HorarioOcupado()
+                
+                cita = super().create(validated_data)
+        except HorarioOcupado:
+            metricas.RESERVAS_CONFLICTOS.inc()
+            raise
+        except IntegrityError as e:
+            if es_conflicto_horario(e):
+                metricas.RESERVAS_CONFLICTOS.inc()
+                raise HorarioOcupado()
+            raise
+        
+        metricas.RESERVAS_EXITOSAS.inc()
+        return cita
 
 
 class CitaListSerializer(serializers.ModelSerializer):
@@ -124,7 +158,7 @@ class CancelarCitaSerializer(serializers.Serializer):
         """Validar que se pueda cancelar la cita"""
         cita = self.context.get('cita')
         
-        if not cita.puede_cancelar():
+        if cita is not None and not cita.puede_cancelar():
             raise serializers.ValidationError(
                 'No se puede cancelar esta cita. Debe hacerlo con al menos 24 horas de anticipación.'
             )
@@ -138,6 +172,37 @@ class ConfirmarCitaSerializer(serializers.Serializer):
     confirmar = serializers.BooleanField(default=True)
 
 
+class ItemTransicionMasivaSerializer(serializers.Serializer):
+    """Una transición dentro de una petición masiva"""
+    
+    ACCIONES = ('completar', 'marcar_no_asistio')
+    
+    id = serializers.IntegerField()
+    accion = serializers.ChoiceField(choices=ACCIONES)
+    notas = serializers.CharField(required=False, allow_blank=True)
+
+
+class TransicionMasivaSerializer(serializers.Serializer):
+    """Serializer para aplicar varias transiciones de citas en una petición"""
+    
+    transiciones = ItemTransicionMasivaSerializer(many=True, allow_empty=False)
+    
+    def validate_transiciones(self, value):
+        """Limita el tamaño del lote y rechaza citas repetidas"""
+        if len(value) > settings.MAX_TRANSICIONES_MASIVAS:
+            raise serializers.ValidationError(
+                f'No se pueden enviar más de {settings.MAX_TRANSICIONES_MASIVAS} transiciones por petición'
+            )
+        
+        conteo = Counter(item['id'] for item in value)
+        repetidas = sorted(cita_id for cita_id, veces in conteo.items() if veces > 1)
+        if repetidas:
+            raise serializers.ValidationError(
+                f"Citas repetidas: {', '.join(map(str, repetidas))}"
+            )
+        return value
+
+
 class HistorialCitaSerializer(serializers.ModelSerializer):
     """Serializer para el historial de cambios de cita"""
     
@@ -162,7 +227,29 @@ class EstadisticasCitasSerializer(serializers.Serializer):
     total_citas = serializers.IntegerField()
     citas_agendadas = serializers.IntegerField()
     citas_confirmadas = serializers.IntegerField()
+    citas_en_curso = serializers.IntegerField()
     citas_completadas = serializers.IntegerField()
     citas_canceladas = serializers.IntegerField()
     citas_no_asistio = serializers.IntegerField()
-    tasa_inasistencia = serializers.FloatField()
\ No newline at end of file
+    tasa_inasistencia = serializers.FloatField()
+    estadisticas_por_estado = serializers.ListField(child=serializers.DictField())
+    desglose = serializers.ListField(child=serializers.DictField(), required=False)
+
+
+class ParametrosEstadisticasSerializer(serializers.Serializer):
+    """Serializer para los parámetros de consulta de estadísticas"""
+    
+    AGRUPACIONES = ('profesional', 'especialidad', 'dia')
+    
+    group_by = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_group_by(self, value):
+        """Convierte 'profesional,dia' en una tupla de agrupaciones válidas"""
+        agrupaciones = tuple(dict.fromkeys(a.strip() for a in value.split(',') if a.strip()))
+        invalidas = [a for a in agrupaciones if a not in self.AGRUPACIONES]
+        if invalidas:
+            raise serializers.ValidationError(
+                f"Agrupación no válida: {', '.join(invalidas)}. "
+                f"Opciones: {', '.join(self.AGRUPACIONES)}"
+            )
+        return agrupaciones
\ No newline at end of file
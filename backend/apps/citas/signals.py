@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Cita
+from .recordatorios import programar_recordatorio, revocar_recordatorio
+
+
+def _datos_recordatorio(cita):
+    """Retorna (fecha_hora, activa) de la cita sin disparar consultas"""
+    fecha_hora = cita.__dict__.get('fecha_hora')
+    if fecha_hora is None:
+        return None
+    return fecha_hora, cita.__dict__.get('estado') in Cita.ESTADOS_ACTIVOS
+
+
+@receiver(post_init, sender=Cita)
+def recordar_datos_recordatorio(sender, instance, **kwargs):
+    """Guarda fecha y estado originales para detectar reagendamientos y cancelaciones"""
+    instance._datos_recordatorio = _datos_recordatorio(instance)
+
+
+@receiver(pre_save, sender=Cita)
+def reiniciar_recordatorio(sender, instance, **kwargs):
+    """Una cita reagendada necesita un nuevo recordatorio"""
+    anterior = getattr(instance, '_datos_recordatorio', None)
+    if instance.pk and anterior and anterior[0] != instance.fecha_hora:
+        instance.recordatorio_enviado = False
+        instance.fecha_recordatorio = None
+
+
+@receiver(post_save, sender=Cita)
+def programar_recordatorio_cita(sender, instance, created, **kwargs):
+    """Programa, revoca o vuelve a programar la tarea de recordatorio de la cita"""
+    anterior = None if created else getattr(instance, '_datos_recordatorio', None)
+    actual = _datos_recordatorio(instance)
+    instance._datos_recordatorio = actual
+    if anterior == actual:
+        return
+    
+    cita_id = instance.pk
+    if anterior and anterior[1]:
+        transaction.on_commit(lambda: revocar_recordatorio(cita_id, anterior[0]))
+    if actual and actual[1] and not instance.recordatorio_enviado:
+        transaction.on_commit(lambda: programar_recordatorio(cita_id, actual[0]))
+
+
+@receiver(post_delete, sender=Cita)
+def revocar_recordatorio_cita(sender, instance, **kwargs):
+    """Revoca el recordatorio de una cita eliminada"""
+    datos = getattr(instance, '_datos_recordatorio', None)
+    if datos and datos[1]:
+        cita_id = instance.pk
+        transaction.on_commit(lambda: revocar_recordatorio(cita_id, datos[0]))
@@ -1,7 +1,17 @@
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import timedelta
-from .models import Cita
+from .models import Cita, HistorialCita
+from .conflictos import conflictos_bloqueo
+from .recordatorios import limite_programacion, programar_recordatorio
+from .transiciones import transicionar_lote
+from apps.reportes.models import ResumenDiarioCitas
+from apps.reportes.resumen import estadisticas_desde_resumen
+from apps.profesionales.models import BloqueoHorario
+from apps.usuarios.models import Usuario
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,51 +19,146 @@ logger = logging.getLogger(__name__)
 @shared_task(name='apps.citas.tasks.enviar_recordatorios_citas')
 def enviar_recordatorios_citas():
     """
-    Envía recordatorios de citas programadas para el día siguiente.
-    Se ejecuta todos los días a las 9:00 AM.
+    Barrido periódico de recordatorios. Se ejecuta cada hora.
+    
+    Cada cita programa su propio recordatorio (ver recordatorios.py); este
+    barrido solo programa las tareas cuyo ETA entra en el horizonte y reparte
+    en lotes los recordatorios vencidos que no se enviaron (por ejemplo, si el
+    broker no estaba disponible al agendar). Ambas consultas son rangos
+    acotados de fecha_hora, sin recorrer la tabla completa.
+    """
+    logger.info("Iniciando barrido de recordatorios de citas...")
+    
+    ahora = timezone.now()
+    anticipacion = timedelta(hours=settings.HORAS_ANTICIPACION_RECORDATORIO)
+    pendientes = Cita.objects.filter(
+        estado__in=Cita.ESTADOS_ACTIVOS,
+        recordatorio_enviado=False
+    ).order_by('id')
+    
+    # Recordatorios vencidos: citas dentro de la anticipación sin recordatorio
+    vencidas = pendientes.filter(
+        fecha_hora__gt=ahora,
+        fecha_hora__lte=ahora + anticipacion
+    ).values_list('id', flat=True)
+    
+    tamano = settings.TAMANO_LOTE_RECORDATORIOS
+    lotes = 0
+    total = 0
+    lote = []
+    for cita_id in vencidas.iterator(chunk_size=tamano):
+        lote.append(cita_id)
+        if len(lote) == tamano:
+            enviar_lote_recordatorios.delay(lote)
+            lotes += 1
+            total += len(lote)
+            lote = []
+    if lote:
+        enviar_lote_recordatorios.delay(lote)
+        lotes += 1
+        total += len(lote)
+    
+    # Recordatorios cuyo ETA entra en el horizonte de programación
+    programados = 0
+    proximas = pendientes.filter(
+        fecha_hora__gt=ahora + anticipacion,
+        fecha_hora__lte=limite_programacion(ahora) + anticipacion
+    ).values_list('id', 'fecha_hora')
+    for cita_id, fecha_hora in proximas.iterator(chunk_size=tamano):
+        programados += programar_recordatorio(cita_id, fecha_hora, ahora)
+    
+    logger.info(
+        f"Barrido de recordatorios completado. Vencidos: {total} en {lotes} lotes, "
+        f"Programados: {programados}"
+    )
+    
+    return {'lotes': lotes, 'total': total, 'programados': programados}
+
+
+@shared_task(name='apps.citas.tasks.enviar_recordatorio_cita')
+def enviar_recordatorio_cita(cita_id, fecha_hora):
     """
-    logger.info("Iniciando envío de recordatorios de citas...")
+    Envía el recordatorio de una cita en su ETA (fecha_hora - anticipación).
     
-    manana = timezone.now().date() + timedelta(days=1)
+    'fecha_hora' es la fecha con la que se programó la tarea: si la cita fue
+    reagendada, la tarea queda obsoleta y la nueva fecha tiene la suya.
+    """
+    with transaction.atomic():
+        cita = Cita.objects.filter(id=cita_id).select_related(
+            'paciente', 'profesional__usuario'
+        ).select_for_update(skip_locked=True, of=('self',)).first()
+        
+        if cita is None or cita.fecha_hora != parse_datetime(fecha_hora) or not cita.requiere_recordatorio():
+            return {'enviado': False}
+        
+        _enviar_recordatorio(cita)
+        Cita.objects.filter(id=cita.id).update(
+            recordatorio_enviado=True,
+            fecha_recordatorio=timezone.now(),
+            fecha_actualizacion=timezone.now()
+        )
     
-    # Buscar citas confirmadas o agendadas para mañana
-    citas_manana = Cita.objects.filter(
-        fecha_hora__date=manana,
-        estado__in=['AGENDADA', 'CONFIRMADA']
-    ).select_related('paciente', 'profesional')
+    return {'enviado': True}
+
+
+@shared_task(name='apps.citas.tasks.enviar_lote_recordatorios')
+def enviar_lote_recordatorios(cita_ids):
+    """
+    Envía los recordatorios de un lote de citas y los marca como enviados.
     
-    enviados = 0
+    Las filas se bloquean con SKIP LOCKED y se vuelven a filtrar por
+    recordatorio_enviado=False, de modo que un lote repetido (o procesado en
+    paralelo por otro worker) no envía dos veces el mismo recordatorio.
+    Las citas enviadas se marcan con un único UPDATE.
+    """
+    enviadas = []
     errores = 0
     
-    for cita in citas_manana:
-        try:
-            # Aquí iría la lógica de envío de email/SMS
-            # Por ahora solo registramos en logs
-            logger.info(
-                f"Recordatorio: Cita #{cita.id} - "
-                f"Paciente: {cita.paciente.get_full_name()} - "
-                f"Profesional: {cita.profesional.nombre_completo} - "
-                f"Hora: {cita.fecha_hora.strftime('%H:%M')}"
+    with transaction.atomic():
+        citas = Cita.objects.filter(
+            id__in=cita_ids,
+            estado__in=Cita.ESTADOS_ACTIVOS,
+            recordatorio_enviado=False
+        ).select_related('paciente', 'profesional__usuario').select_for_update(
+            skip_locked=True, of=('self',)
+        )
+        
+        for cita in citas:
+            try:
+                _enviar_recordatorio(cita)
+                enviadas.append(cita.id)
+            except Exception as e:
+                logger.error(f"Error enviando recordatorio cita #{cita.id}: {str(e)}")
+                errores += 1
+        
+        if enviadas:
+            Cita.objects.filter(id__in=enviadas).update(
+                recordatorio_enviado=True,
+                fecha_recordatorio=timezone.now(),
+                fecha_actualizacion=timezone.now()
             )
-            enviados += 1
-            
-            # TODO: Implementar envío real de email/SMS
-            # enviar_email_recordatorio(cita)
-            # enviar_sms_recordatorio(cita)
-            
-        except Exception as e:
-            logger.error(f"Error enviando recordatorio cita #{cita.id}: {str(e)}")
-            errores += 1
     
     logger.info(
-        f"Recordatorios completados. Enviados: {enviados}, Errores: {errores}"
+        f"Lote de recordatorios completado. Enviados: {len(enviadas)}, Errores: {errores}"
     )
     
-    return {
-        'enviados': enviados,
-        'errores': errores,
-        'total': citas_manana.count()
-    }
+    return {'enviados': len(enviadas), 'errores': errores}
+
+
+def _enviar_recordatorio(cita):
+    """Envía el recordatorio de una cita"""
+    # Aquí iría la lógica de envío de email/SMS
+    # Por ahora solo registramos en logs
+    logger.info(
+        f"Recordatorio: Cita #{cita.id} - "
+        f"Paciente: {cita.paciente.get_full_name()} - "
+        f"Profesional: {cita.profesional.usuario.get_full_name()} - "
+        f"Hora: {timezone.localtime(cita.fecha_hora).strftime('%H:%M')}"
+    )
+    
+    # TODO: Implementar envío real de email/SMS
+    # enviar_email_recordatorio(cita)
+    # enviar_sms_recordatorio(cita)
 
 
 @shared_task(name='apps.citas.tasks.limpiar_citas_no_confirmadas')
@@ -61,45 +166,158 @@ def limpiar_citas_no_confirmadas():
     """
     Cancela automáticamente citas no confirmadas 24 horas antes.
     Se ejecuta todos los días a las 00:00.
+    
+    Procesa lotes de TAMANO_LOTE_CANCELACIONES citas: cada lote bloquea sus
+    filas (SKIP LOCKED) y las cancela con transicionar_lote (un UPDATE, un
+    bulk_create del historial y el recálculo de los resúmenes diarios; tras
+    el commit libera los horarios del inventario, revoca los recordatorios e
+    invalida el resumen del administrador).
     """
     logger.info("Iniciando limpieza de citas no confirmadas...")
     
-    limite = timezone.now() + timedelta(hours=24)
+    ahora = timezone.now()
+    limite = ahora + timedelta(hours=24)
+    motivo = 'Cancelación automática por falta de confirmación'
     
     # Buscar citas agendadas (no confirmadas) que vencen en menos de 24h
     citas_vencidas = Cita.objects.filter(
         fecha_hora__lte=limite,
-        fecha_hora__gte=timezone.now(),
+        fecha_hora__gte=ahora,
         estado='AGENDADA',
         confirmada_por_paciente=False
-    )
+    ).order_by('id')
     
+    tamano = settings.TAMANO_LOTE_CANCELACIONES
     canceladas = 0
+    lotes = 0
     
-    for cita in citas_vencidas:
-        try:
-            cita.estado = 'CANCELADA'
-            cita.motivo_cancelacion = 'Cancelación automática por falta de confirmación'
-            cita.fecha_cancelacion = timezone.now()
-            cita.save()
-            
-            logger.info(
-                f"Cita #{cita.id} cancelada automáticamente - "
-                f"Paciente: {cita.paciente.get_full_name()}"
-            )
-            canceladas += 1
+    while True:
+        with transaction.atomic():
+            ids = list(citas_vencidas.select_for_update(skip_locked=True).values_list('id', flat=True)[:tamano])
+            if not ids:
+                break
             
-        except Exception as e:
-            logger.error(f"Error cancelando cita #{cita.id}: {str(e)}")
+            modificadas, = transicionar_lote([(
+                Cita.objects.filter(id__in=ids), 'cancelar', motivo,
+                {'motivo_cancelacion': motivo, 'fecha_cancelacion': timezone.now()}
+            )])
+        
+        canceladas += len(modificadas)
+        lotes += 1
     
-    logger.info(f"Limpieza completada. Citas canceladas: {canceladas}")
+    logger.info(f"Limpieza completada. Citas canceladas: {canceladas} en {lotes} lotes")
     
     return {
         'canceladas': canceladas,
-        'total': citas_vencidas.count()
+        'lotes': lotes
     }
 
 
+@shared_task(name='apps.citas.tasks.resolver_conflictos_bloqueo')
+def resolver_conflictos_bloqueo(bloqueo_id, accion, usuario_id=None):
+    """
+    Resuelve las citas activas que quedaron dentro de un bloqueo de horario.
+    
+    Recorre los conflictos por id en lotes de TAMANO_LOTE_CONFLICTOS. Con
+    accion='cancelar' cada lote se cancela con transicionar_lote (un UPDATE,
+    un bulk_create del historial y el recálculo de resúmenes e inventario);
+    con accion='marcar' las citas no cambian de estado y solo se registra el
+    conflicto en su historial. Después del commit de cada lote se encola la
+    notificación de sus pacientes, de modo que un bloqueo de una semana sobre
+    una agenda completa se procesa en una sola pasada.
+    """
+    bloqueo = BloqueoHorario.objects.filter(id=bloqueo_id).first()
+    if bloqueo is None:
+        return {'resueltas': 0, 'lotes': 0}
+    
+    usuario = Usuario(id=usuario_id) if usuario_id else None
+    observaciones = f"Conflicto con bloqueo de horario #{bloqueo.id} ({bloqueo.get_motivo_display()})"
+    conflictos = conflictos_bloqueo(bloqueo).order_by('id')
+    
+    tamano = settings.TAMANO_LOTE_CONFLICTOS
+    resueltas = 0
+    lotes = 0
+    ultimo_id = 0
+    
+    while True:
+        with transaction.atomic():
+            filas = list(
+                conflictos.filter(id__gt=ultimo_id).select_for_update(of=('self',)).values_list(
+                    'id', 'estado'
+                )[:tamano]
+            )
+            if not filas:
+                break
+            
+            ultimo_id = filas[-1][0]
+            ids = [cita_id for cita_id, _ in filas]
+            if accion == 'cancelar':
+                ahora = timezone.now()
+                modificadas, = transicionar_lote([(
+                    Cita.objects.filter(id__in=ids), 'cancelar', observaciones,
+                    {
+                        'motivo_cancelacion': observaciones,
+                        'fecha_cancelacion': ahora,
+                        'cancelada_por_id': usuario_id,
+                    }
+                )], usuario=usuario)
+                ids = [cita.id for cita in modificadas]
+            else:
+                HistorialCita.objects.bulk_create([
+                    HistorialCita(
+                        cita_id=cita_id,
+                        estado_anterior=estado,
+                        estado_nuevo=estado,
+                        modificado_por_id=usuario_id,
+                        observaciones=observaciones
+                    )
+                    for cita_id, estado in filas
+                ])
+            
+            if ids:
+                transaction.on_commit(
+                    lambda ids=ids: notificar_conflictos_bloqueo.delay(ids, bloqueo.id, accion)
+                )
+        
+        resueltas += len(ids)
+        lotes += 1
+    
+    logger.info(
+        f"Conflictos del bloqueo #{bloqueo.id} resueltos ({accion}). Citas: {resueltas} en {lotes} lotes"
+    )
+    
+    return {'resueltas': resueltas, 'lotes': lotes}
+
+
+@shared_task(name='apps.citas.tasks.notificar_conflictos_bloqueo')
+def notificar_conflictos_bloqueo(cita_ids, bloqueo_id, accion):
+    """Avisa a los pacientes de un lote de citas afectadas por un bloqueo de horario"""
+    citas = Cita.objects.filter(id__in=cita_ids).select_related('paciente', 'profesional__usuario')
+    notificadas = 0
+    errores = 0
+    
+    for cita in citas:
+        try:
+            _notificar_conflicto(cita, bloqueo_id, accion)
+            notificadas += 1
+        except Exception as e:
+            logger.error(f"Error notificando conflicto de la cita #{cita.id}: {str(e)}")
+            errores += 1
+    
+    return {'notificadas': notificadas, 'errores': errores}
+
+
+def _notificar_conflicto(cita, bloqueo_id, accion):
+    """Notifica al paciente que su cita fue cancelada o debe reagendarse"""
+    # Como los recordatorios, por ahora solo se registra en logs
+    logger.info(
+        f"Conflicto con bloqueo #{bloqueo_id} ({accion}): Cita #{cita.id} - "
+        f"Paciente: {cita.paciente.get_full_name()} - "
+        f"Profesional: {cita.profesional.usuario.get_full_name()} - "
+        f"Fecha: {timezone.localtime(cita.fecha_hora).strftime('%d/%m/%Y %H:%M')}"
+    )
+
+
 @shared_task(name='apps.citas.tasks.generar_reporte_mensual')
 def generar_reporte_mensual():
     """
@@ -108,17 +326,18 @@ def generar_reporte_mensual():
     """
     logger.info("Generando reporte mensual...")
     
-    primer_dia_mes = timezone.now().replace(day=1)
+    primer_dia_mes = timezone.localdate().replace(day=1)
     
-    citas_mes = Cita.objects.filter(
-        fecha_hora__gte=primer_dia_mes
+    # Se suman los resúmenes diarios en lugar de recorrer las citas del mes
+    resumen = estadisticas_desde_resumen(
+        ResumenDiarioCitas.objects.filter(fecha__gte=primer_dia_mes)
     )
     
     estadisticas = {
-        'total_citas': citas_mes.count(),
-        'completadas': citas_mes.filter(estado='COMPLETADA').count(),
-        'canceladas': citas_mes.filter(estado='CANCELADA').count(),
-        'no_asistio': citas_mes.filter(estado='NO_ASISTIO').count(),
+        'total_citas': resumen['total_citas'],
+        'completadas': resumen['citas_completadas'],
+        'canceladas': resumen['citas_canceladas'],
+        'no_asistio': resumen['citas_no_asistio'],
     }
     
     logger.info(f"Reporte generado: {estadisticas}")
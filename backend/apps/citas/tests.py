@@ -1,3 +1,572 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from unittest import mock, skipUnless
+from django.contrib import admin
+from django.db import connection, connections
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from config.pruebas import PresupuestoConsultasMixin, cliente_jwt
+from apps.usuarios.models import Usuario
+from apps.profesionales.models import Profesional, DisponibilidadProfesional
+from apps.reportes.models import ResumenDiarioCitas
+from .admin import CitaAdmin
+from .datos_sinteticos import GeneradorDatos
+from .models import Cita, HistorialCita
+from .transiciones import transicionar
+from .views import CitaViewSet
+from . import tasks
 
-# Create your tests here.
+
+def crear_profesional():
+    """Crea un profesional de prueba"""
+    usuario = Usuario.objects.create_user(
+        rut='11111111-1', email='doctor@clinica.cl', password='doctor123',
+        nombre='Juan', apellido='Pérez', rol='PROFESIONAL'
+    )
+    return Profesional.objects.create(
+        usuario=usuario, especialidad='Medicina General',
+        registro_profesional='MED123456', anos_experiencia=10,
+        titulo_profesional='Médico Cirujano'
+    )
+
+
+def crear_pacientes(cantidad):
+    """Crea pacientes de prueba con un único INSERT"""
+    Usuario.objects.bulk_create([
+        Usuario(
+            rut=f'{20000000 + i}-{i % 10}', email=f'paciente{i}@correo.cl',
+            nombre='Paciente', apellido=str(i), rol='PACIENTE'
+        )
+        for i in range(cantidad)
+    ])
+    return list(Usuario.objects.filter(rol='PACIENTE').order_by('id'))
+
+
+def horario_manana(hora, minuto=0):
+    """Retorna un datetime con zona horaria para mañana a la hora indicada"""
+    manana = timezone.localdate() + timedelta(days=2)
+    return timezone.make_aware(datetime.combine(manana, time(hora, minuto)))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requiere la restricción de exclusión de PostgreSQL')
+class ReservaCitaTest(TestCase):
+    """La restricción 'cita_sin_solapamiento' decide qué reservas se aceptan"""
+    
+    def setUp(self):
+        self.profesional = crear_profesional()
+        self.paciente, self.otro_paciente = crear_pacientes(2)
+    
+    def reservar(self, paciente, fecha_hora, duracion=30):
+        client = APIClient()
+        client.force_authenticate(paciente)
+        return client.post('/api/v1/citas/', {
+            'profesional': self.profesional.id,
+            'fecha_hora': fecha_hora.isoformat(),
+            'duracion_minutos': duracion,
+            'motivo_consulta': 'Control'
+        }, format='json')
+    
+    def test_solapamiento_parcial_responde_409(self):
+        self.assertEqual(self.reservar(self.paciente, horario_manana(10), duracion=60).status_code, 201)
+        
+        response = self.reservar(self.otro_paciente, horario_manana(10, 30))
+        
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['detail'], 'Este horario ya está ocupado')
+    
+    def test_horario_contiguo_se_acepta(self):
+        self.assertEqual(self.reservar(self.paciente, horario_manana(10)).status_code, 201)
+        self.assertEqual(self.reservar(self.otro_paciente, horario_manana(10, 30)).status_code, 201)
+    
+    def test_cita_cancelada_libera_el_horario(self):
+        self.reservar(self.paciente, horario_manana(10))
+        Cita.objects.update(estado='CANCELADA')
+        
+        self.assertEqual(self.reservar(self.otro_paciente, horario_manana(10)).status_code, 201)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requiere la restricción de exclusión de PostgreSQL')
+class ReservaConcurrenteTest(TransactionTestCase):
+    """Cientos de reservas simultáneas del mismo horario: solo una puede ganar"""
+    
+    INTENTOS = 200
+    HILOS = 20
+    
+    def setUp(self):
+        self.profesional = crear_profesional()
+        self.pacientes = crear_pacientes(self.INTENTOS)
+        self.datos = {
+            'profesional': self.profesional.id,
+            'fecha_hora': horario_manana(9).isoformat(),
+            'duracion_minutos': 30,
+            'motivo_consulta': 'Control'
+        }
+    
+    def reservar(self, paciente):
+        try:
+            client = APIClient()
+            client.force_authenticate(paciente)
+            return client.post('/api/v1/citas/', self.datos, format='json').status_code
+        finally:
+            connections.close_all()
+    
+    def test_una_sola_reserva_gana(self):
+        with ThreadPoolExecutor(max_workers=self.HILOS) as pool:
+            codigos = list(pool.map(self.reservar, self.pacientes))
+        
+        self.assertEqual(codigos.count(201), 1)
+        self.assertEqual(codigos.count(409), self.INTENTOS - 1)
+        self.assertEqual(
+            Cita.objects.filter(estado__in=Cita.ESTADOS_ACTIVOS).count(), 1
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requiere EXPLAIN de PostgreSQL')
+class PlanConsultasCitaTest(TestCase):
+    """Las consultas frecuentes sobre citas deben usar índices en una tabla grande"""
+    
+    PROFESIONALES = 50
+    PACIENTES = 200
+    CITAS_POR_PROFESIONAL = 1000
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.pacientes = crear_pacientes(cls.PACIENTES)
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(
+                rut=f'{10000000 + i}-{i % 10}', email=f'profesional{i}@clinica.cl',
+                nombre='Profesional', apellido=str(i), rol='PROFESIONAL'
+            )
+            for i in range(cls.PROFESIONALES)
+        ])
+        profesionales = Profesional.objects.bulk_create([
+            Profesional(
+                usuario=usuario, especialidad='Medicina General',
+                registro_profesional=f'REG{usuario.id}', anos_experiencia=5,
+                titulo_profesional='Médico Cirujano'
+            )
+            for usuario in usuarios
+        ])
+        cls.profesional = profesionales[0]
+        DisponibilidadProfesional.objects.bulk_create([
+            DisponibilidadProfesional(
+                profesional=cls.profesional, dia_semana=dia,
+                hora_inicio=time(0), hora_fin=time(23, 30)
+            )
+            for dia in range(7)
+        ])
+        
+        # Citas cada 12 horas por profesional, desde 250 días atrás, con estados variados
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {Cita._meta.db_table} (
+                    paciente_id, profesional_id, fecha_hora, duracion_minutos, motivo_consulta,
+                    estado, confirmada_por_paciente, recordatorio_enviado, motivo_cancelacion,
+                    observaciones, notas_profesional, fecha_creacion, fecha_actualizacion
+                )
+                SELECT
+                    pacientes[1 + i %% cardinality(pacientes)],
+                    profesionales[1 + i %% cardinality(profesionales)],
+                    %s + (i / cardinality(profesionales)) * INTERVAL '12 hours',
+                    30, 'Control',
+                    (ARRAY['AGENDADA', 'CONFIRMADA', 'COMPLETADA', 'CANCELADA', 'NO_ASISTIO'])
+                        [1 + (i / cardinality(profesionales)) %% 5],
+                    false, false, '', '', '', now(), now()
+                FROM generate_series(0, %s - 1) AS i,
+                     (SELECT %s::bigint[] AS pacientes, %s::bigint[] AS profesionales) AS ids
+            """, [
+                timezone.now() - timedelta(days=250),
+                cls.PROFESIONALES * cls.CITAS_POR_PROFESIONAL,
+                [paciente.id for paciente in cls.pacientes],
+                [profesional.id for profesional in profesionales],
+            ])
+            cursor.execute(f'ANALYZE {Cita._meta.db_table}')
+    
+    def assertSinSeqScan(self, contexto):
+        """Ejecuta EXPLAIN de cada consulta capturada sobre citas_cita"""
+        consultas = [
+            consulta['sql'] for consulta in contexto.captured_queries
+            if f'"{Cita._meta.db_table}"' in consulta['sql']
+            and consulta['sql'].lstrip().startswith(('SELECT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertTrue(consultas)
+        for sql in consultas:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN {sql}')
+                plan = '\n'.join(fila[0] for fila in cursor.fetchall())
+            self.assertNotIn(f'Seq Scan on {Cita._meta.db_table}', plan, f'{sql}\n{plan}')
+    
+    def capturar(self, usuario, *urls):
+        client = cliente_jwt(usuario)
+        with CaptureQueriesContext(connection) as contexto:
+            for url in urls:
+                self.assertEqual(client.get(url).status_code, 200, url)
+        return contexto
+    
+    def test_listados_y_proximas_citas_de_paciente(self):
+        dia = timezone.localdate().isoformat()
+        self.assertSinSeqScan(self.capturar(
+            self.pacientes[0],
+            '/api/v1/citas/', f'/api/v1/citas/?fecha={dia}', '/api/v1/citas/mis_proximas_citas/'
+        ))
+    
+    def test_listados_y_proximas_citas_de_profesional(self):
+        dia = timezone.localdate().isoformat()
+        self.assertSinSeqScan(self.capturar(
+            self.profesional.usuario,
+            '/api/v1/citas/', f'/api/v1/citas/?fecha={dia}&estado=AGENDADA',
+            '/api/v1/citas/mis_proximas_citas/'
+        ))
+    
+    def test_listado_por_fecha_de_administrador(self):
+        admin = Usuario.objects.create_superuser(
+            rut='99999999-9', email='admin@clinica.cl', password='admin123',
+            nombre='Admin', apellido='SGC'
+        )
+        self.assertSinSeqScan(self.capturar(
+            admin, f'/api/v1/citas/?fecha={timezone.localdate().isoformat()}'
+        ))
+    
+    def test_horarios_del_profesional(self):
+        manana = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertSinSeqScan(self.capturar(
+            self.pacientes[0],
+            f'/api/v1/profesionales/{self.profesional.id}/horarios_rango/'
+            f'?fecha_desde={manana}&fecha_hasta={manana}'
+        ))
+    
+    @mock.patch.object(tasks, 'programar_recordatorio', return_value=False)
+    @mock.patch.object(tasks.enviar_lote_recordatorios, 'delay')
+    def test_tareas_programadas(self, *mocks):
+        with CaptureQueriesContext(connection) as contexto:
+            tasks.enviar_recordatorios_citas()
+            tasks.limpiar_citas_no_confirmadas()
+        self.assertSinSeqScan(contexto)
+
+
+class PresupuestoConsultasCitaTest(PresupuestoConsultasMixin, TestCase):
+    """Cada acción de CitaViewSet respeta su presupuesto de consultas con varias citas por usuario"""
+    
+    viewset = CitaViewSet
+    CITAS = 20
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesional = crear_profesional()
+        cls.paciente, cls.otro_paciente = crear_pacientes(2)
+        cls.admin = Usuario.objects.create_superuser(
+            rut='99999999-9', email='admin@clinica.cl', password='admin123',
+            nombre='Admin', apellido='SGC'
+        )
+        Cita.objects.bulk_create([
+            Cita(
+                paciente=cls.paciente if i % 2 else cls.otro_paciente,
+                profesional=cls.profesional,
+                fecha_hora=horario_manana(8) + timedelta(hours=i),
+                duracion_minutos=30,
+                motivo_consulta='Control',
+                estado='CONFIRMADA' if i % 3 else 'AGENDADA'
+            )
+            for i in range(cls.CITAS)
+        ])
+        cls.cita = Cita.objects.filter(paciente=cls.paciente, estado='AGENDADA').first()
+        cls.confirmada = Cita.objects.filter(paciente=cls.paciente, estado='CONFIRMADA').first()
+    
+    def setUp(self):
+        self.client_paciente = cliente_jwt(self.paciente)
+        self.client_profesional = cliente_jwt(self.profesional.usuario)
+        self.client_admin = cliente_jwt(self.admin)
+    
+    def test_lecturas(self):
+        for client in (self.client_paciente, self.client_profesional, self.client_admin):
+            self.assertPresupuestoConsultas('list', client, 'get', '/api/v1/citas/', codigo=200)
+            self.assertPresupuestoConsultas(
+                'mis_proximas_citas', client, 'get', '/api/v1/citas/mis_proximas_citas/', codigo=200
+            )
+        self.assertPresupuestoConsultas(
+            'retrieve', self.client_paciente, 'get', f'/api/v1/citas/{self.cita.id}/', codigo=200
+        )
+        self.assertPresupuestoConsultas(
+            'estadisticas', self.client_admin, 'get', '/api/v1/citas/estadisticas/?group_by=profesional',
+            codigo=200
+        )
+    
+    def test_crear(self):
+        self.assertPresupuestoConsultas('create', self.client_paciente, 'post', '/api/v1/citas/', {
+            'profesional': self.profesional.id,
+            'fecha_hora': (horario_manana(8) + timedelta(days=1)).isoformat(),
+            'duracion_minutos': 30,
+            'motivo_consulta': 'Control'
+        }, codigo=201)
+    
+    def test_modificar_y_eliminar(self):
+        url = f'/api/v1/citas/{self.cita.id}/'
+        self.assertPresupuestoConsultas(
+            'partial_update', self.client_paciente, 'patch', url, {'motivo_consulta': 'Dolor'}, codigo=200
+        )
+        self.assertPresupuestoConsultas('update', self.client_paciente, 'put', url, {
+            'paciente': self.paciente.id,
+            'profesional': self.profesional.id,
+            'fecha_hora': self.cita.fecha_hora.isoformat(),
+            'duracion_minutos': 30,
+            'motivo_consulta': 'Control'
+        }, codigo=200)
+        self.assertPresupuestoConsultas('destroy', self.client_paciente, 'delete', url, codigo=204)
+    
+    def test_transicion_masiva(self):
+        citas = Cita.objects.filter(profesional=self.profesional, estado__in=Cita.ESTADOS_ACTIVOS)
+        transiciones = [
+            {'id': cita_id, 'accion': 'completar' if i % 2 else 'marcar_no_asistio', 'notas': f'Nota {cita_id}'}
+            for i, cita_id in enumerate(citas.values_list('id', flat=True)[:10])
+        ]
+        response = self.assertPresupuestoConsultas(
+            'transicion_masiva', self.client_profesional, 'post', '/api/v1/citas/bulk_transition/',
+            {'transiciones': transiciones + [{'id': 0, 'accion': 'completar'}]}, codigo=200
+        )
+        self.assertEqual((response.data['aplicadas'], response.data['rechazadas']), (10, 1))
+    
+    def test_transiciones(self):
+        self.assertPresupuestoConsultas(
+            'confirmar', self.client_paciente, 'post', f'/api/v1/citas/{self.cita.id}/confirmar/', codigo=200
+        )
+        self.assertPresupuestoConsultas(
+            'completar', self.client_profesional, 'post', f'/api/v1/citas/{self.cita.id}/completar/', codigo=200
+        )
+        self.assertPresupuestoConsultas(
+            'marcar_no_asistio', self.client_profesional, 'post',
+            f'/api/v1/citas/{self.confirmada.id}/marcar_no_asistio/', codigo=200
+        )
+        otra = Cita.objects.filter(paciente=self.paciente, estado='CONFIRMADA').first()
+        self.assertPresupuestoConsultas(
+            'cancelar', self.client_paciente, 'post', f'/api/v1/citas/{otra.id}/cancelar/',
+            {'motivo_cancelacion': 'Viaje'}, codigo=200
+        )
+
+
+class TransicionCitaTest(TestCase):
+    """Las transiciones solo parten de estados permitidos y registran el estado anterior"""
+    
+    def setUp(self):
+        self.profesional = crear_profesional()
+        self.paciente, = crear_pacientes(1)
+        self.cita = Cita.objects.create(
+            paciente=self.paciente, profesional=self.profesional, fecha_hora=horario_manana(10),
+            duracion_minutos=30, motivo_consulta='Control'
+        )
+        self.client_paciente = cliente_jwt(self.paciente)
+        self.client_profesional = cliente_jwt(self.profesional.usuario)
+    
+    def test_historial_registra_estado_anterior(self):
+        self.client_paciente.post(f'/api/v1/citas/{self.cita.id}/confirmar/')
+        response = self.client_profesional.post(
+            f'/api/v1/citas/{self.cita.id}/completar/', {'notas_profesional': 'Sin novedad'}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.cita.refresh_from_db()
+        self.assertEqual(self.cita.estado, 'COMPLETADA')
+        self.assertEqual(self.cita.notas_profesional, 'Sin novedad')
+        self.assertTrue(self.cita.confirmada_por_paciente)
+        self.assertEqual(
+            list(self.cita.historial.order_by('id').values_list('estado_anterior', 'estado_nuevo')),
+            [('AGENDADA', 'CONFIRMADA'), ('CONFIRMADA', 'COMPLETADA')]
+        )
+        resumen = ResumenDiarioCitas.objects.get(profesional=self.profesional)
+        self.assertEqual((resumen.citas_confirmadas, resumen.citas_completadas), (0, 1))
+    
+    def test_cancelar_registra_quien_cancela(self):
+        self.client_paciente.post(f'/api/v1/citas/{self.cita.id}/confirmar/')
+        response = self.client_paciente.post(
+            f'/api/v1/citas/{self.cita.id}/cancelar/', {'motivo_cancelacion': 'Viaje'}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        historial = self.cita.historial.latest('id')
+        self.assertEqual((historial.estado_anterior, historial.estado_nuevo), ('CONFIRMADA', 'CANCELADA'))
+        self.assertEqual(historial.observaciones, f'Cancelada por: {self.paciente.get_full_name()}')
+        self.cita.refresh_from_db()
+        self.assertEqual(self.cita.cancelada_por_id, self.paciente.id)
+    
+    def test_transicion_no_permitida(self):
+        Cita.objects.filter(id=self.cita.id).update(estado='COMPLETADA')
+        
+        response = self.client_profesional.post(f'/api/v1/citas/{self.cita.id}/marcar_no_asistio/')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.cita.historial.exists())
+        self.paciente.refresh_from_db()
+        self.assertEqual(self.paciente.contador_inasistencias, 0)
+    
+    def test_solo_el_paciente_confirma(self):
+        response = self.client_profesional.post(f'/api/v1/citas/{self.cita.id}/confirmar/')
+        
+        self.assertEqual(response.status_code, 403)
+        self.cita.refresh_from_db()
+        self.assertEqual(self.cita.estado, 'AGENDADA')
+    
+    @mock.patch('apps.citas.transiciones.revocar_recordatorios')
+    def test_efectos_por_transicion(self, revocar):
+        otra = Cita.objects.create(
+            paciente=self.paciente, profesional=self.profesional, fecha_hora=horario_manana(11),
+            duracion_minutos=30, motivo_consulta='Control'
+        )
+        
+        # UPDATE de las citas, INSERT del historial y un UPDATE del resumen del día
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(3):
+            canceladas = transicionar(Cita.objects.filter(profesional=self.profesional), 'cancelar')
+        
+        self.assertEqual(len(canceladas), 2)
+        revocar.assert_called_once_with(
+            sorted([(self.cita.id, self.cita.fecha_hora), (otra.id, otra.fecha_hora)])
+        )
+        resumen = ResumenDiarioCitas.objects.get(profesional=self.profesional)
+        self.assertEqual((resumen.total_citas, resumen.citas_agendadas, resumen.citas_canceladas), (2, 0, 2))
+        
+        # Las instancias retornadas quedan al día para un save() posterior
+        canceladas[0].save()
+        resumen.refresh_from_db()
+        self.assertEqual((resumen.total_citas, resumen.citas_canceladas), (2, 2))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requiere UPDATE ... RETURNING con FOR UPDATE')
+class TransicionConcurrenteTest(TransactionTestCase):
+    """Transiciones simultáneas sobre la misma cita: solo una se aplica"""
+    
+    HILOS = 10
+    
+    def setUp(self):
+        profesional = crear_profesional()
+        paciente, = crear_pacientes(1)
+        self.cita = Cita.objects.create(
+            paciente=paciente, profesional=profesional, fecha_hora=horario_manana(10),
+            duracion_minutos=30, motivo_consulta='Control'
+        )
+    
+    def transicionar(self, accion):
+        try:
+            return len(transicionar(Cita.objects.filter(id=self.cita.id), accion))
+        finally:
+            connections.close_all()
+    
+    def test_una_sola_transicion_gana(self):
+        acciones = ['completar', 'marcar_no_asistio'] * (self.HILOS // 2)
+        with ThreadPoolExecutor(max_workers=self.HILOS) as pool:
+            aplicadas = list(pool.map(self.transicionar, acciones))
+        
+        self.assertEqual(sum(aplicadas), 1)
+        self.assertEqual(HistorialCita.objects.filter(cita=self.cita).count(), 1)
+        historial = HistorialCita.objects.get(cita=self.cita)
+        self.cita.refresh_from_db()
+        self.assertEqual((historial.estado_anterior, historial.estado_nuevo), ('AGENDADA', self.cita.estado))
+
+
+class TransicionMasivaTest(TestCase):
+    """Transiciones masivas: resultado por elemento, historial y resúmenes por lote"""
+    
+    URL = '/api/v1/citas/bulk_transition/'
+    
+    def setUp(self):
+        self.profesional = crear_profesional()
+        self.pacientes = crear_pacientes(4)
+        self.citas = [
+            Cita.objects.create(
+                paciente=paciente, profesional=self.profesional, fecha_hora=horario_manana(9 + i),
+                duracion_minutos=30, motivo_consulta='Control', estado=estado
+            )
+            for i, (paciente, estado) in enumerate(
+                zip(self.pacientes, ['AGENDADA', 'CONFIRMADA', 'CONFIRMADA', 'CANCELADA'])
+            )
+        ]
+        self.client_profesional = cliente_jwt(self.profesional.usuario)
+    
+    def test_resultado_por_elemento(self):
+        agendada, confirmada, otra, cancelada = self.citas
+        response = self.client_profesional.post(self.URL, {'transiciones': [
+            {'id': agendada.id, 'accion': 'completar', 'notas': 'Control normal'},
+            {'id': confirmada.id, 'accion': 'marcar_no_asistio'},
+            {'id': cancelada.id, 'accion': 'completar'},
+            {'id': 0, 'accion': 'completar'},
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['aplicadas'], response.data['rechazadas']), (2, 2))
+        self.assertEqual(
+            [resultado['exito'] for resultado in response.data['resultados']], [True, True, False, False]
+        )
+        self.assertEqual(response.data['resultados'][3]['detail'], 'Cita no encontrada')
+        
+        agendada.refresh_from_db()
+        self.assertEqual((agendada.estado, agendada.notas_profesional), ('COMPLETADA', 'Control normal'))
+        self.assertEqual(
+            sorted(HistorialCita.objects.values_list('estado_anterior', 'estado_nuevo')),
+            [('AGENDADA', 'COMPLETADA'), ('CONFIRMADA', 'NO_ASISTIO')]
+        )
+        self.pacientes[1].refresh_from_db()
+        self.assertEqual(self.pacientes[1].contador_inasistencias, 1)
+        
+        resumen = ResumenDiarioCitas.objects.get(profesional=self.profesional)
+        self.assertEqual(
+            (resumen.citas_agendadas, resumen.citas_confirmadas, resumen.citas_completadas,
+             resumen.citas_no_asistio, resumen.citas_canceladas),
+            (0, 1, 1, 1, 1)
+        )
+    
+    def test_rechaza_citas_repetidas(self):
+        cita = self.citas[0]
+        response = self.client_profesional.post(self.URL, {'transiciones': [
+            {'id': cita.id, 'accion': 'completar'}, {'id': cita.id, 'accion': 'marcar_no_asistio'},
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(HistorialCita.objects.exists())
+    
+    def test_paciente_no_puede_usarla(self):
+        response = cliente_jwt(self.pacientes[0]).post(self.URL, {'transiciones': [
+            {'id': self.citas[0].id, 'accion': 'completar'},
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, 403)
+    
+    def test_accion_del_admin_penaliza(self):
+        admin_usuario = Usuario.objects.create_superuser(
+            rut='99999999-9', email='admin@clinica.cl', password='admin123', nombre='Admin', apellido='SGC'
+        )
+        request = RequestFactory().post('/admin/citas/cita/')
+        request.user = admin_usuario
+        citas = Cita.objects.filter(id__in=[self.citas[1].id, self.citas[3].id])
+        
+        with mock.patch.object(CitaAdmin, 'message_user') as message_user:
+            CitaAdmin(Cita, admin.site).marcar_no_asistio(request, citas)
+        
+        message_user.assert_called_once_with(request, '1 cita(s) marcada(s) como No Asistió.')
+        self.assertEqual(
+            list(HistorialCita.objects.values_list('cita_id', 'estado_anterior', 'modificado_por_id')),
+            [(self.citas[1].id, 'CONFIRMADA', admin_usuario.id)]
+        )
+        self.pacientes[1].refresh_from_db()
+        self.assertEqual(self.pacientes[1].contador_inasistencias, 1)
+
+
+class DatosSinteticosTest(TestCase):
+    """Con la misma semilla y fecha de referencia, las citas no dependen del reloj"""
+    
+    def generar(self, ahora):
+        referencia = datetime(2026, 3, 2).date()
+        generador = GeneradorDatos(0, 0, 0, semilla=7, fecha_referencia=referencia)
+        profesional = Profesional(id=1, duracion_cita_minutos=30)
+        inicios = [generador.momento_referencia + timedelta(hours=12 * i) for i in range(-40, 40)]
+        with mock.patch('django.utils.timezone.now', return_value=ahora):
+            citas = [generador._cita(profesional, inicio, [1, 2, 3]) for inicio in inicios]
+        return generador.momento_referencia, [
+            (cita.estado, cita.paciente_id, cita.fecha_confirmacion, cita.fecha_cancelacion) for cita in citas
+        ]
+    
+    def test_deterministas_segun_la_referencia(self):
+        referencia, citas = self.generar(timezone.now())
+        self.assertEqual(self.generar(timezone.now() - timedelta(days=30))[1], citas)
+        self.assertTrue(all(
+            fecha is None or fecha <= referencia
+            for _, _, confirmacion, cancelacion in citas for fecha in (confirmacion, cancelacion)
+        ))
@@ -0,0 +1,195 @@
+"""
+Máquina de estados de las citas.
+
+Cada transición es un único UPDATE condicionado al estado de origen:
+
+    WITH anterior AS (SELECT id, estado ... WHERE estado IN (...) FOR UPDATE)
+    UPDATE citas_cita SET estado = ..., <campos> FROM anterior ... RETURNING ...
+
+que escribe solo las columnas que cambian y retorna el estado anterior, más
+un INSERT del historial, ambos en la misma transacción. Si dos transiciones
+compiten por la misma cita, la segunda espera el candado de la fila, vuelve a
+evaluar la condición y no la modifica: nunca pueden aplicarse las dos.
+
+Como el UPDATE no pasa por Model.save(), no se envía post_save: los datos
+derivados (resúmenes diarios, inventario de horarios, recordatorios y el
+resumen del administrador) se mantienen una vez por transición, para todas
+las citas modificadas. transicionar() ajusta los resúmenes con un UPDATE por
+día y profesional; transicionar_lote() aplica varias transiciones en una
+sola transacción y recalcula los resúmenes de los días afectados.
+"""
+from django.db import connections, router, transaction
+from django.db.models.signals import post_init
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+from apps.profesionales.inventario import inventario_activo, recalcular_intervalos
+from apps.reportes.resumen import aplicar_transiciones, clave_resumen, recalcular_dias
+from apps.reportes.tablero import invalidar_resumen_admin
+from .models import Cita, HistorialCita
+from .recordatorios import revocar_recordatorios
+
+
+# Acción: (estados de origen permitidos, estado de destino)
+TRANSICIONES = {
+    'confirmar': (('AGENDADA',), 'CONFIRMADA'),
+    'cancelar': (('AGENDADA', 'CONFIRMADA'), 'CANCELADA'),
+    'completar': (('AGENDADA', 'CONFIRMADA', 'EN_CURSO'), 'COMPLETADA'),
+    'marcar_no_asistio': (('AGENDADA', 'CONFIRMADA', 'EN_CURSO'), 'NO_ASISTIO'),
+}
+
+
+def _sql_transicion(candidatas, valores, conexion):
+    """UPDATE ... FROM (citas candidatas bloqueadas) RETURNING, con el estado anterior"""
+    campos = {campo.attname: campo for campo in Cita._meta.concrete_fields}
+    tabla = conexion.ops.quote_name(Cita._meta.db_table)
+    sql_candidatas, params = candidatas.query.sql_with_params()
+    consulta = UpdateQuery(Cita)
+    compilador = consulta.get_compiler(connection=conexion)
+    
+    asignaciones = []
+    params = list(params)
+    for attname, valor in valores.items():
+        campo = campos[attname]
+        if hasattr(valor, 'resolve_expression'):
+            # Expresiones como Case/When permiten valores distintos por cita
+            sql_valor, params_valor = compilador.compile(
+                valor.resolve_expression(consulta, allow_joins=False, for_save=True)
+            )
+        else:
+            sql_valor, params_valor = '%s', [campo.get_db_prep_save(valor, conexion)]
+        asignaciones.append(f'{conexion.ops.quote_name(campo.column)} = {sql_valor}')
+        params.extend(params_valor)
+    
+    # Todas las columnas de la cita, con el estado anterior en lugar del nuevo
+    retorno = ', '.join(
+        'anterior.estado' if attname == 'estado' else f'{tabla}.{conexion.ops.quote_name(campo.column)}'
+        for attname, campo in campos.items()
+    )
+    sql = (
+        f'WITH anterior AS ({sql_candidatas}) '
+        f'UPDATE {tabla} SET {", ".join(asignaciones)} '
+        f'FROM anterior WHERE {tabla}.id = anterior.id '
+        f'RETURNING {retorno}'
+    )
+    return sql, params, list(campos)
+
+
+def _actualizar(citas, accion, campos, alias):
+    """
+    Ejecuta el UPDATE de la transición. Retorna las citas modificadas, creadas
+    con from_db con su estado anterior (post_init lo registra para las señales).
+    """
+    origenes, destino = TRANSICIONES[accion]
+    conexion = connections[alias]
+    valores = {'estado': destino, **campos, 'fecha_actualizacion': timezone.now()}
+    candidatas = citas.using(alias).filter(estado__in=origenes).order_by('id').select_for_update(
+        of=('self',)
+    ).values('id', 'estado')
+    
+    sql, params, columnas = _sql_transicion(candidatas, valores, conexion)
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, params)
+        filas = cursor.fetchall()
+    return [Cita.from_db(alias, columnas, fila) for fila in filas]
+
+
+def _historial(cita, destino, usuario, observaciones):
+    return HistorialCita(
+        cita_id=cita.id,
+        estado_anterior=cita.estado,
+        estado_nuevo=destino,
+        modificado_por_id=getattr(usuario, 'id', None),
+        observaciones=observaciones
+    )
+
+
+def _mantener_derivados(citas, alias):
+    """
+    Después del commit de las citas ya transicionadas (con su estado nuevo):
+    libera los horarios del inventario, revoca los recordatorios de las que
+    dejaron de estar activas e invalida el resumen del administrador.
+    """
+    intervalos = [(cita.profesional_id, cita.fecha_hora, cita.get_hora_fin()) for cita in citas]
+    if inventario_activo():
+        transaction.on_commit(lambda: recalcular_intervalos(intervalos), using=alias)
+    
+    inactivas = [(cita.id, cita.fecha_hora) for cita in citas if cita.estado not in Cita.ESTADOS_ACTIVOS]
+    if inactivas:
+        transaction.on_commit(lambda: revocar_recordatorios(inactivas), using=alias)
+    transaction.on_commit(invalidar_resumen_admin, using=alias)
+    
+    # Las señales toman el estado nuevo como original: un save() posterior no repite los efectos
+    for cita in citas:
+        post_init.send(sender=Cita, instance=cita)
+
+
+def transicionar(citas, accion, usuario=None, observaciones='', **campos):
+    """
+    Aplica 'accion' a las citas del queryset que estén en un estado de origen
+    permitido, asignando además 'campos' (por attname). El queryset puede
+    llevar las condiciones de permiso y de negocio de la acción.
+    
+    Retorna las citas modificadas, con los valores nuevos. Las citas que no
+    cumplen las condiciones (o que otra transición cambió antes) no se tocan.
+    'observaciones' puede ser una expresión (se evalúa al insertar el historial).
+    """
+    destino = TRANSICIONES[accion][1]
+    alias = router.db_for_write(Cita)
+    
+    # Sin savepoint: un error dentro de la transición revierte también a quien la llama
+    with transaction.atomic(using=alias, savepoint=False):
+        modificadas = _actualizar(citas, accion, campos, alias)
+        if not modificadas:
+            return []
+        
+        HistorialCita.objects.using(alias).bulk_create([
+            _historial(cita, destino, usuario, observaciones) for cita in modificadas
+        ])
+        aplicar_transiciones(
+            (
+                clave_resumen(cita.fecha_hora, cita.profesional_id, cita.estado),
+                clave_resumen(cita.fecha_hora, cita.profesional_id, destino)
+            )
+            for cita in modificadas
+        )
+        for cita in modificadas:
+            cita.estado = destino
+        _mantener_derivados(modificadas, alias)
+    return modificadas
+
+
+def transicionar_lote(operaciones, usuario=None):
+    """
+    Aplica varias transiciones en una transacción. 'operaciones' es una lista
+    de (citas, accion, observaciones, campos) y se ejecuta un UPDATE por
+    operación; los valores que cambian por cita se pasan como Case/When.
+    
+    Como limpiar_citas_no_confirmadas, no envía post_save por cita: registra
+    todo el historial con un único bulk_create, recalcula una vez los
+    resúmenes de los días afectados y mantiene el resto de los datos
+    derivados de todas las citas juntas (ver _mantener_derivados).
+    
+    Retorna una lista con las citas modificadas de cada operación.
+    """
+    alias = router.db_for_write(Cita)
+    resultados = []
+    historial = []
+    
+    # Sin savepoint: un error dentro de la transición revierte también a quien la llama
+    with transaction.atomic(using=alias, savepoint=False):
+        for citas, accion, observaciones, campos in operaciones:
+            destino = TRANSICIONES[accion][1]
+            modificadas = _actualizar(citas, accion, campos, alias)
+            historial.extend(_historial(cita, destino, usuario, observaciones) for cita in modificadas)
+            for cita in modificadas:
+                cita.estado = destino
+            resultados.append(modificadas)
+        
+        todas = [cita for modificadas in resultados for cita in modificadas]
+        if not todas:
+            return resultados
+        
+        HistorialCita.objects.using(alias).bulk_create(historial)
+        recalcular_dias({(timezone.localdate(cita.fecha_hora), cita.profesional_id) for cita in todas})
+        _mantener_derivados(todas, alias)
+    return resultados
@@ -1,15 +1,55 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from collections import Counter
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Subquery, TextField, Value, When
+from django.db.models.functions import Concat
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
-from django.db.models import Q, Count
 from .models import Cita, HistorialCita
 from .serializers import (
     CitaSerializer, CitaCreateSerializer, CitaListSerializer,
     CancelarCitaSerializer, ConfirmarCitaSerializer, HistorialCitaSerializer,
-    EstadisticasCitasSerializer
+    EstadisticasCitasSerializer, ParametrosEstadisticasSerializer, TransicionMasivaSerializer
 )
+from .estadisticas import calcular_estadisticas
+from .transiciones import TRANSICIONES, transicionar, transicionar_lote
+from apps.profesionales.horarios import rango_fechas
+from apps.usuarios.inasistencias import penalizar_inasistencias
+from apps.usuarios.models import Usuario
+from config.condicional import calcular_etag, respuesta_condicional
+from config.paginacion import PaginacionKeyset
+from apps.reportes.models import ResumenDiarioCitas
+from apps.reportes.resumen import estadisticas_desde_resumen
+
+
+def _fecha_o_none(valor):
+    """Retorna la fecha si el valor es un día completo (YYYY-MM-DD), si no None"""
+    try:
+        return parse_date(valor) if valor else None
+    except ValueError:
+        return None
+
+
+# Observaciones del historial para las transiciones del profesional
+OBSERVACIONES_TRANSICION = {
+    'completar': 'Cita completada por el profesional',
+    'marcar_no_asistio': 'Paciente no asistió a la cita',
+}
+
+
+class PaginacionCitas(PaginacionKeyset):
+    """Cursor sobre (fecha_hora, id), de la más reciente a la más antigua"""
+    ordering = ('-fecha_hora', '-id')
+
+
+class PaginacionHistorial(PaginacionKeyset):
+    """Cursor sobre (fecha_cambio, id), del cambio más reciente al más antiguo"""
+    ordering = ('-fecha_cambio', '-id')
 
 
 class CitaViewSet(viewsets.ModelViewSet):
@@ -18,6 +58,24 @@ class CitaViewSet(viewsets.ModelViewSet):
     queryset = Cita.objects.all()
     serializer_class = CitaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PaginacionCitas
+    
+    # Consultas máximas por acción (exigidas en tests.PresupuestoConsultasCitaTest)
+    presupuesto_consultas = {
+        'list': 1,
+        'create': 9,
+        'retrieve': 1,
+        'update': 7,
+        'partial_update': 4,
+        'destroy': 5,
+        'mis_proximas_citas': 2,
+        'cancelar': 4,
+        'confirmar': 4,
+        'completar': 4,
+        'marcar_no_asistio': 8,
+        'transicion_masiva': 13,
+        'estadisticas': 1,
+    }
     
     def get_serializer_class(self):
         """Retorna el serializer según la acción"""
@@ -34,23 +92,28 @@ class CitaViewSet(viewsets.ModelViewSet):
         )
         
         # Si es paciente, solo ver sus propias citas
-        if not self.request.user.is_staff and not hasattr(self.request.user, 'perfil_profesional'):
+        if not self.request.user.is_staff and not self.request.user.profesional_id:
             queryset = queryset.filter(paciente=self.request.user)
         
         # Si es profesional, solo ver sus propias citas
-        if hasattr(self.request.user, 'perfil_profesional'):
-            queryset = queryset.filter(profesional=self.request.user.perfil_profesional)
+        if self.request.user.profesional_id:
+            queryset = queryset.filter(profesional_id=self.request.user.profesional_id)
         
         # Filtros adicionales
+        # Rango semiabierto [00:00, 00:00 del día siguiente) para usar los índices de fecha_hora
         fecha = self.request.query_params.get('fecha', None)
         if fecha:
-            queryset = queryset.filter(fecha_hora__date=fecha)
+            dia = _fecha_o_none(fecha)
+            if dia is None:
+                raise ValidationError({'fecha': 'Formato de fecha inválido. Use YYYY-MM-DD'})
+            inicio, fin = rango_fechas(dia, dia)
+            queryset = queryset.filter(fecha_hora__gte=inicio, fecha_hora__lt=fin)
         
         estado = self.request.query_params.get('estado', None)
         if estado:
             queryset = queryset.filter(estado=estado)
         
-        return queryset.order_by('-fecha_hora')
+        return queryset.order_by('-fecha_hora', '-id')
     
     def perform_create(self, serializer):
         """Asigna automáticamente el paciente al crear la cita"""
@@ -61,58 +124,87 @@ class CitaViewSet(viewsets.ModelViewSet):
         """Obtiene las próximas citas del usuario actual"""
         ahora = timezone.now()
         
-        if hasattr(request.user, 'perfil_profesional'):
+        if request.user.profesional_id:
             # Si es profesional, obtiene sus próximas citas
             citas = Cita.objects.filter(
-                profesional=request.user.perfil_profesional,
+                profesional_id=request.user.profesional_id,
                 fecha_hora__gte=ahora,
                 estado__in=['AGENDADA', 'CONFIRMADA']
-            ).order_by('fecha_hora')[:10]
+            )
         else:
             # Si es paciente, obtiene sus próximas citas
             citas = Cita.objects.filter(
                 paciente=request.user,
                 fecha_hora__gte=ahora,
                 estado__in=['AGENDADA', 'CONFIRMADA']
-            ).order_by('fecha_hora')[:10]
+            )
         
-        serializer = CitaListSerializer(citas, many=True)
-        return Response(serializer.data)
+        # Validador: cualquier cambio, alta o cita que pasa al pasado altera el máximo o el conteo
+        version = citas.order_by().aggregate(ultima=Max('fecha_actualizacion'), total=Count('id'))
+        etag = calcular_etag('proximas', request.user.id, version['total'], version['ultima'])
+        
+        return respuesta_condicional(
+            request,
+            lambda: CitaListSerializer(
+                citas.select_related('paciente', 'profesional__usuario').order_by('fecha_hora')[:10],
+                many=True
+            ).data,
+            etag=etag
+        )
+    
+    def _transicionar(self, citas, accion, observaciones='', **campos):
+        """
+        Aplica la transición a la cita de la URL dentro de 'citas' (las que el
+        usuario puede modificar). Retorna la cita modificada o None si no estaba
+        en un estado de origen permitido o no cumplía las condiciones.
+        """
+        citas = self.filter_queryset(citas).filter(pk=self.kwargs['pk'])
+        modificadas = transicionar(citas, accion, self.request.user, observaciones, **campos)
+        return modificadas[0] if modificadas else None
+    
+    def _conflicto_transicion(self):
+        """La cita cambió de estado entre la transición y la verificación del rechazo"""
+        return Response(
+            {'detail': 'La cita cambió de estado. Actualice e intente nuevamente.'},
+            status=status.HTTP_409_CONFLICT
+        )
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def cancelar(self, request, pk=None):
         """Cancela una cita si cumple con las condiciones"""
-        cita = self.get_object()
-        
-        # Validar que sea el paciente quien cancela
-        if request.user != cita.paciente and not request.user.is_staff:
-            return Response(
-                {'detail': 'No tiene permiso para cancelar esta cita'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        serializer = CancelarCitaSerializer(
-            data=request.data,
-            context={'cita': cita}
-        )
+        serializer = CancelarCitaSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Cancelar la cita
-        cita.estado = 'CANCELADA'
-        cita.fecha_cancelacion = timezone.now()
-        cita.motivo_cancelacion = serializer.validated_data['motivo_cancelacion']
-        cita.cancelada_por = request.user
-        cita.save()
-        
-        # Registrar en historial
-        HistorialCita.objects.create(
-            cita=cita,
-            estado_anterior='AGENDADA',
-            estado_nuevo='CANCELADA',
-            modificado_por=request.user,
-            observaciones=f"Cancelada por: {request.user.get_full_name()}"
+        # Solo el paciente (o un administrador), con la anticipación mínima
+        citas = self.get_queryset()
+        if not request.user.is_staff:
+            citas = citas.filter(paciente_id=request.user.id)
+        limite = timezone.now() + timedelta(hours=settings.HORAS_ANTICIPACION_CANCELACION)
+        cancelada_por = Usuario.objects.filter(id=request.user.id).order_by().values(
+            texto=Concat(Value('Cancelada por: '), 'nombre', Value(' '), 'apellido')
+        )
+        cita = self._transicionar(
+            citas.filter(fecha_hora__gt=limite), 'cancelar',
+            observaciones=Subquery(cancelada_por[:1]),
+            fecha_cancelacion=timezone.now(),
+            motivo_cancelacion=serializer.validated_data['motivo_cancelacion'],
+            cancelada_por_id=request.user.id
         )
         
+        if cita is None:
+            cita = self.get_object()
+            
+            # Validar que sea el paciente quien cancela
+            if request.user != cita.paciente and not request.user.is_staff:
+                return Response(
+                    {'detail': 'No tiene permiso para cancelar esta cita'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            serializer = CancelarCitaSerializer(data=request.data, context={'cita': cita})
+            serializer.is_valid(raise_exception=True)
+            return self._conflicto_transicion()
+        
         return Response(
             {'detail': 'Cita cancelada exitosamente'},
             status=status.HTTP_200_OK
@@ -121,36 +213,30 @@ class CitaViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def confirmar(self, request, pk=None):
         """Confirma la asistencia a una cita"""
-        cita = self.get_object()
-        
-        # Validar que sea el paciente quien confirma
-        if request.user != cita.paciente:
-            return Response(
-                {'detail': 'Solo el paciente puede confirmar la cita'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        if cita.estado != 'AGENDADA':
-            return Response(
-                {'detail': 'Solo se pueden confirmar citas en estado AGENDADA'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Confirmar la cita
-        cita.confirmada_por_paciente = True
-        cita.fecha_confirmacion = timezone.now()
-        cita.estado = 'CONFIRMADA'
-        cita.save()
-        
-        # Registrar en historial
-        HistorialCita.objects.create(
-            cita=cita,
-            estado_anterior='AGENDADA',
-            estado_nuevo='CONFIRMADA',
-            modificado_por=request.user,
-            observaciones="Confirmada por el paciente"
+        cita = self._transicionar(
+            self.get_queryset().filter(paciente_id=request.user.id), 'confirmar',
+            observaciones='Confirmada por el paciente',
+            confirmada_por_paciente=True,
+            fecha_confirmacion=timezone.now()
         )
         
+        if cita is None:
+            cita = self.get_object()
+            
+            # Validar que sea el paciente quien confirma
+            if request.user != cita.paciente:
+                return Response(
+                    {'detail': 'Solo el paciente puede confirmar la cita'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            if cita.estado != 'AGENDADA':
+                return Response(
+                    {'detail': 'Solo se pueden confirmar citas en estado AGENDADA'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return self._conflicto_transicion()
+        
         return Response(
             {'detail': 'Cita confirmada exitosamente'},
             status=status.HTTP_200_OK
@@ -159,114 +245,199 @@ class CitaViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def completar(self, request, pk=None):
         """Marca una cita como completada (solo profesionales)"""
-        cita = self.get_object()
-        
-        if not hasattr(request.user, 'perfil_profesional'):
+        if not request.user.profesional_id:
             return Response(
                 {'detail': 'Solo profesionales pueden completar citas'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        if cita.profesional != request.user.perfil_profesional:
-            return Response(
-                {'detail': 'Solo puede completar sus propias citas'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        if cita.estado != 'CONFIRMADA' and cita.estado != 'AGENDADA':
-            return Response(
-                {'detail': 'Solo se pueden completar citas agendadas o confirmadas'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        cita.estado = 'COMPLETADA'
-        cita.notas_profesional = request.data.get('notas_profesional', '')
-        cita.save()
-        
-        # Registrar en historial
-        HistorialCita.objects.create(
-            cita=cita,
-            estado_anterior=cita.estado,
-            estado_nuevo='COMPLETADA',
-            modificado_por=request.user,
-            observaciones="Cita completada por el profesional"
+        cita = self._transicionar(
+            self.get_queryset().filter(profesional_id=request.user.profesional_id), 'completar',
+            observaciones=OBSERVACIONES_TRANSICION['completar'],
+            notas_profesional=request.data.get('notas_profesional', '')
         )
         
+        if cita is None:
+            cita = self.get_object()
+            
+            if cita.profesional_id != request.user.profesional_id:
+                return Response(
+                    {'detail': 'Solo puede completar sus propias citas'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            if cita.estado not in TRANSICIONES['completar'][0]:
+                return Response(
+                    {'detail': 'Solo se pueden completar citas agendadas o confirmadas'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return self._conflicto_transicion()
+        
         return Response({'detail': 'Cita completada exitosamente'})
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def marcar_no_asistio(self, request, pk=None):
         """Marca una cita como 'No Asistió' y penaliza al paciente"""
-        cita = self.get_object()
-        
-        if not hasattr(request.user, 'perfil_profesional') and not request.user.is_staff:
+        if not request.user.profesional_id and not request.user.is_staff:
             return Response(
                 {'detail': 'No tiene permiso para esta acción'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        if cita.estado == 'NO_ASISTIO':
-            return Response(
-                {'detail': 'Esta cita ya está marcada como No Asistió'},
-                status=status.HTTP_400_BAD_REQUEST
+        # La cita y la penalización del paciente se confirman juntas
+        with transaction.atomic():
+            cita = self._transicionar(
+                self.get_queryset(), 'marcar_no_asistio',
+                observaciones=OBSERVACIONES_TRANSICION['marcar_no_asistio']
             )
+            if cita is not None:
+                inasistencias, bloqueado = penalizar_inasistencias({cita.paciente_id: 1})[cita.paciente_id]
+        
+        if cita is None:
+            cita = self.get_object()
+            
+            if cita.estado == 'NO_ASISTIO':
+                return Response(
+                    {'detail': 'Esta cita ya está marcada como No Asistió'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if cita.estado not in TRANSICIONES['marcar_no_asistio'][0]:
+                return Response(
+                    {'detail': 'Solo se pueden marcar citas agendadas o confirmadas'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return self._conflicto_transicion()
         
-        cita.marcar_no_asistio()
+        return Response({
+            'detail': 'Marcado como No Asistió. Inasistencia registrada.',
+            'inasistencias_paciente': inasistencias,
+            'paciente_bloqueado': bloqueado
+        })
+    
+    @action(
+        detail=False, methods=['post'], url_path='bulk_transition',
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def transicion_masiva(self, request):
+        """
+        Completa o marca como 'No Asistió' varias citas en una petición.
+        
+        Recibe {'transiciones': [{'id', 'accion', 'notas'}]} y aplica un UPDATE
+        por acción sobre las citas que el usuario puede modificar. Responde el
+        resultado de cada elemento; los rechazados no impiden aplicar el resto.
+        """
+        if not request.user.profesional_id and not request.user.is_staff:
+            return Response(
+                {'detail': 'No tiene permiso para esta acción'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        # Registrar en historial
-        HistorialCita.objects.create(
-            cita=cita,
-            estado_anterior=cita.estado,
-            estado_nuevo='NO_ASISTIO',
-            modificado_por=request.user,
-            observaciones="Paciente no asistió a la cita"
-        )
+        serializer = TransicionMasivaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['transiciones']
+        
+        por_accion = {}
+        for item in items:
+            por_accion.setdefault(item['accion'], []).append(item)
+        
+        citas = self.get_queryset()
+        rechazos = {}
+        operaciones = []
+        for accion, grupo in por_accion.items():
+            if accion == 'completar' and not request.user.profesional_id:
+                rechazos.update((item['id'], 'Solo profesionales pueden completar citas') for item in grupo)
+                continue
+            
+            campos = {}
+            notas = [When(id=item['id'], then=Value(item['notas'])) for item in grupo if 'notas' in item]
+            if notas:
+                campos['notas_profesional'] = Case(*notas, default=F('notas_profesional'), output_field=TextField())
+            operaciones.append((
+                citas.filter(id__in=[item['id'] for item in grupo]),
+                accion,
+                OBSERVACIONES_TRANSICION[accion],
+                campos
+            ))
+        
+        with transaction.atomic():
+            aplicadas = {
+                cita.id: cita
+                for modificadas in transicionar_lote(operaciones, request.user)
+                for cita in modificadas
+            }
+            penalizar_inasistencias(Counter(
+                cita.paciente_id for cita in aplicadas.values() if cita.estado == 'NO_ASISTIO'
+            ))
+        
+        # Motivo de cada rechazo, con una consulta sobre las citas no aplicadas
+        pendientes = {item['id'] for item in items} - aplicadas.keys() - rechazos.keys()
+        if pendientes:
+            estados = dict(citas.filter(id__in=pendientes).order_by().values_list('id', 'estado'))
+            for item in items:
+                if item['id'] not in pendientes:
+                    continue
+                estado = estados.get(item['id'])
+                if estado is None:
+                    rechazos[item['id']] = 'Cita no encontrada'
+                elif estado not in TRANSICIONES[item['accion']][0]:
+                    rechazos[item['id']] = f'No se puede aplicar {item["accion"]} a una cita en estado {estado}'
+                else:
+                    rechazos[item['id']] = 'La cita cambió de estado. Actualice e intente nuevamente.'
+        
+        resultados = []
+        for item in items:
+            cita = aplicadas.get(item['id'])
+            if cita is not None:
+                resultados.append({'id': cita.id, 'accion': item['accion'], 'exito': True, 'estado': cita.estado})
+            else:
+                resultados.append({
+                    'id': item['id'], 'accion': item['accion'], 'exito': False, 'detail': rechazos[item['id']]
+                })
         
         return Response({
-            'detail': 'Marcado como No Asistió. Inasistencia registrada.',
-            'inasistencias_paciente': cita.paciente.contador_inasistencias,
-            'paciente_bloqueado': cita.paciente.bloqueado
+            'aplicadas': len(aplicadas),
+            'rechazadas': len(items) - len(aplicadas),
+            'resultados': resultados
         })
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
     def estadisticas(self, request):
-        """Obtiene estadísticas de citas (solo admin)"""
+        """
+        Obtiene estadísticas de citas (solo admin).
+        
+        Acepta 'group_by' con una o más agrupaciones separadas por coma
+        (profesional, especialidad, dia) para incluir un desglose. Si los
+        filtros son días completos (YYYY-MM-DD, ambos inclusive) se leen los
+        resúmenes diarios; con fecha y hora se cuenta sobre las citas.
+        """
         fecha_desde = request.query_params.get('fecha_desde', None)
         fecha_hasta = request.query_params.get('fecha_hasta', None)
         
-        queryset = Cita.objects.all()
-        
-        if fecha_desde:
-            queryset = queryset.filter(fecha_hora__gte=fecha_desde)
-        if fecha_hasta:
-            queryset = queryset.filter(fecha_hora__lte=fecha_hasta)
-        
-        # Calcular estadísticas
-        total_citas = queryset.count()
-        estadisticas_por_estado = queryset.values('estado').annotate(
-            total=Count('id')
-        )
-        
-        citas_agendadas = queryset.filter(estado='AGENDADA').count()
-        citas_confirmadas = queryset.filter(estado='CONFIRMADA').count()
-        citas_completadas = queryset.filter(estado='COMPLETADA').count()
-        citas_canceladas = queryset.filter(estado='CANCELADA').count()
-        citas_no_asistio = queryset.filter(estado='NO_ASISTIO').count()
-        
-        # Calcular tasa de inasistencia
-        citas_realizadas = citas_completadas + citas_no_asistio
-        tasa_inasistencia = (citas_no_asistio / citas_realizadas * 100) if citas_realizadas > 0 else 0
-        
-        data = {
-            'total_citas': total_citas,
-            'citas_agendadas': citas_agendadas,
-            'citas_confirmadas': citas_confirmadas,
-            'citas_completadas': citas_completadas,
-            'citas_canceladas': citas_canceladas,
-            'citas_no_asistio': citas_no_asistio,
-            'tasa_inasistencia': round(tasa_inasistencia, 2),
-            'estadisticas_por_estado': estadisticas_por_estado,
-        }
+        parametros = ParametrosEstadisticasSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        agrupaciones = parametros.validated_data.get('group_by', ())
+        
+        # Con filtros por día completo se suman los resúmenes diarios
+        dia_desde = _fecha_o_none(fecha_desde)
+        dia_hasta = _fecha_o_none(fecha_hasta)
+        if (not fecha_desde or dia_desde) and (not fecha_hasta or dia_hasta):
+            resumenes = ResumenDiarioCitas.objects.all()
+            if dia_desde:
+                resumenes = resumenes.filter(fecha__gte=dia_desde)
+            if dia_hasta:
+                resumenes = resumenes.filter(fecha__lte=dia_hasta)
+            data = estadisticas_desde_resumen(resumenes, agrupaciones)
+        else:
+            queryset = Cita.objects.all()
+            
+            if fecha_desde:
+                queryset = queryset.filter(fecha_hora__gte=fecha_desde)
+            if fecha_hasta:
+                queryset = queryset.filter(fecha_hora__lte=fecha_hasta)
+            
+            # Conteos por estado (y desglose opcional) en una sola consulta
+            data = calcular_estadisticas(queryset, agrupaciones)
         
         serializer = EstadisticasCitasSerializer(data)
         return Response(serializer.data)
@@ -278,6 +449,7 @@ class HistorialCitaViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = HistorialCita.objects.all()
     serializer_class = HistorialCitaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PaginacionHistorial
     
     def get_queryset(self):
         """Filtra el historial según el usuario"""
@@ -286,16 +458,16 @@ class HistorialCitaViewSet(viewsets.ReadOnlyModelViewSet):
         )
         
         # Si es paciente, solo ver historial de sus citas
-        if not self.request.user.is_staff and not hasattr(self.request.user, 'perfil_profesional'):
+        if not self.request.user.is_staff and not self.request.user.profesional_id:
             queryset = queryset.filter(cita__paciente=self.request.user)
         
         # Si es profesional, solo ver historial de sus citas
-        if hasattr(self.request.user, 'perfil_profesional'):
-            queryset = queryset.filter(cita__profesional=self.request.user.perfil_profesional)
+        if self.request.user.profesional_id:
+            queryset = queryset.filter(cita__profesional_id=self.request.user.profesional_id)
         
         # Filtrar por cita específica si se proporciona
         cita_id = self.request.query_params.get('cita', None)
         if cita_id:
             queryset = queryset.filter(cita_id=cita_id)
         
-        return queryset.order_by('-fecha_cambio')
\ No newline at end of file
+        return queryset.order_by('-fecha_cambio', '-id')
\ No newline at end of file
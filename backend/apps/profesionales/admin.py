@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profesional, DisponibilidadProfesional, BloqueoHorario
+from .models import Profesional, DisponibilidadProfesional, BloqueoHorario, SlotInventario
 
 @admin.register(Profesional)
 class ProfesionalAdmin(admin.ModelAdmin):
@@ -80,4 +80,23 @@ class BloqueoHorarioAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimiza las consultas"""
         qs = super().get_queryset(request)
-        return qs.select_related('profesional__usuario', 'creado_por')
\ No newline at end of file
+        return qs.select_related('profesional__usuario', 'creado_por')
+
+
+@admin.register(SlotInventario)
+class SlotInventarioAdmin(admin.ModelAdmin):
+    """Administración del inventario de horarios (solo lectura)"""
+    
+    list_display = ('profesional', 'fecha_hora', 'duracion_minutos', 'disponible', 'fecha_actualizacion')
+    list_filter = ('disponible', 'profesional')
+    date_hierarchy = 'fecha_hora'
+    readonly_fields = ('profesional', 'fecha_hora', 'duracion_minutos', 'disponible', 'fecha_actualizacion')
+    
+    def has_add_permission(self, request):
+        """El inventario se genera automáticamente"""
+        return False
+    
+    def get_queryset(self, request):
+        """Optimiza las consultas"""
+        qs = super().get_queryset(request)
+        return qs.select_related('profesional__usuario')
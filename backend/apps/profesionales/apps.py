@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class ProfesionalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.profesionales'  # ← Debe incluir 'apps.'
\ No newline at end of file
+    name = 'apps.profesionales'  # ← Debe incluir 'apps.'
+    
+    def ready(self):
+        """Registra las señales que mantienen el inventario de horarios"""
+        from . import signals  # noqa: F401
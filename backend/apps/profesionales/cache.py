@@ -0,0 +1,102 @@
+"""
+Caché de lectura (read-through) del catálogo de profesionales.
+
+Guarda las respuestas del listado (por filtros y página), del perfil y de la
+disponibilidad semanal de cada profesional. Cada grupo de entradas lleva una
+versión en su clave: las señales de Profesional, DisponibilidadProfesional y
+Usuario cambian la versión afectada después del commit, de modo que una
+respuesta calculada con datos antiguos nunca vuelve a leerse.
+
+Para evitar estampidas, cada entrada guarda su vencimiento lógico y vive un
+margen adicional en la caché. Cuando vence, solo el proceso que obtiene el
+candado la recalcula mientras los demás siguen sirviendo el valor anterior;
+ante una ausencia total, los demás esperan brevemente al que calcula.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+
+PREFIJO = 'profesionales'
+
+# Segundos que una entrada vencida se mantiene para servirla mientras se recalcula
+MARGEN_VENCIDO = 60
+
+# Duración máxima del candado de recálculo y espera de quienes no lo obtienen
+DURACION_CANDADO = 10
+ESPERA_CANDADO = 2.0
+PAUSA_CANDADO = 0.05
+
+
+def _clave_version(grupo):
+    return f'{PREFIJO}:version:{grupo}'
+
+
+def version(grupo):
+    """Retorna la versión vigente del grupo, inicializándola si no existe"""
+    clave = _clave_version(grupo)
+    actual = cache.get(clave)
+    if actual is None:
+        cache.add(clave, time.time_ns(), timeout=None)
+        actual = cache.get(clave)
+    return actual
+
+
+def invalidar(*grupos):
+    """Asigna una versión nueva a cada grupo; sus entradas dejan de leerse"""
+    nueva = time.time_ns()
+    cache.set_many({_clave_version(grupo): nueva for grupo in grupos}, timeout=None)
+
+
+def grupo_lista():
+    return 'lista'
+
+
+def grupo_perfil(profesional_id):
+    return f'perfil:{profesional_id}'
+
+
+def grupo_disponibilidad(profesional_id):
+    return f'disponibilidad:{profesional_id}'
+
+
+def clave_peticion(grupo, request):
+    """Clave de la respuesta de una petición dentro de un grupo versionado"""
+    # Las URLs absolutas de la respuesta (paginación, foto) dependen del host
+    huella = hashlib.md5(
+        f'{request.get_host()}{request.get_full_path()}'.encode('utf-8')
+    ).hexdigest()
+    return f'{PREFIJO}:{grupo}:{version(grupo)}:{huella}'
+
+
+def obtener_o_calcular(clave, calcular, ttl=None):
+    """
+    Retorna el valor en caché de 'clave' o lo calcula con 'calcular()'.
+    Protege contra estampidas con un candado por clave (cache.add).
+    """
+    ttl = ttl or settings.CACHE_TTL_PROFESIONALES
+    candado = f'{clave}:candado'
+    
+    entrada = cache.get(clave)
+    if entrada is not None:
+        valor, vence = entrada
+        # Vigente, o vencido mientras otro proceso lo recalcula
+        if time.time() < vence or not cache.add(candado, 1, DURACION_CANDADO):
+            return valor
+    elif not cache.add(candado, 1, DURACION_CANDADO):
+        limite = time.time() + ESPERA_CANDADO
+        while time.time() < limite:
+            time.sleep(PAUSA_CANDADO)
+            entrada = cache.get(clave)
+            if entrada is not None:
+                return entrada[0]
+        # El proceso que calculaba no terminó a tiempo: calcular sin candado
+        return calcular()
+    
+    try:
+        valor = calcular()
+        cache.set(clave, (valor, time.time() + ttl), ttl + MARGEN_VENCIDO)
+    finally:
+        cache.delete(candado)
+    return valor
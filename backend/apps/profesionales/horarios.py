@@ -0,0 +1,221 @@
+"""
+Motor de cálculo de horarios disponibles de un profesional.
+
+Carga las disponibilidades, citas y bloqueos de un rango de fechas con una
+consulta por tabla y calcula los horarios libres en memoria mediante un
+barrido ordenado sobre los intervalos ocupados.
+"""
+import heapq
+from datetime import datetime, timedelta
+from itertools import islice
+from django.utils import timezone
+from .models import DisponibilidadProfesional, BloqueoHorario
+
+
+# Estados de cita que ocupan el horario del profesional
+ESTADOS_OCUPAN_HORARIO = ('AGENDADA', 'CONFIRMADA')
+
+# Una cita iniciada el día anterior puede extenderse dentro del rango consultado
+MARGEN_CITAS_PREVIAS = timedelta(days=1)
+
+
+def rango_fechas(fecha_desde, fecha_hasta):
+    """Retorna el intervalo [inicio, fin) con zona horaria que cubre ambas fechas"""
+    tz = timezone.get_current_timezone()
+    inicio = timezone.make_aware(datetime.combine(fecha_desde, datetime.min.time()), tz)
+    fin = timezone.make_aware(
+        datetime.combine(fecha_hasta + timedelta(days=1), datetime.min.time()), tz
+    )
+    return inicio, fin
+
+
+def fusionar_intervalos(intervalos):
+    """Ordena y fusiona intervalos [inicio, fin) que se solapan o son contiguos"""
+    fusionados = []
+    for inicio, fin in sorted(intervalos):
+        if fusionados and inicio <= fusionados[-1][1]:
+            if fin > fusionados[-1][1]:
+                fusionados[-1][1] = fin
+        else:
+            fusionados.append([inicio, fin])
+    return fusionados
+
+
+def candidatos_dia(fecha, disponibilidades, duracion):
+    """Genera los inicios de horario de un día según sus bloques de disponibilidad"""
+    tz = timezone.get_current_timezone()
+    candidatos = set()
+    for hora_inicio, hora_fin in disponibilidades:
+        actual = timezone.make_aware(datetime.combine(fecha, hora_inicio), tz)
+        limite = timezone.make_aware(datetime.combine(fecha, hora_fin), tz)
+        while actual + duracion <= limite:
+            candidatos.add(actual)
+            actual += duracion
+    return sorted(candidatos)
+
+
+def iterar_horarios_libres(fecha_desde, fecha_hasta, bloques_por_dia, ocupados, duracion, desde):
+    """
+    Genera perezosamente los pares (fecha, inicio) libres entre dos fechas.
+    
+    Recorre los candidatos día a día junto a los intervalos ocupados (ordenados
+    y fusionados) con un único puntero, descartando los anteriores a 'desde' y
+    los que se solapan con algún intervalo ocupado.
+    """
+    i = 0
+    fecha = fecha_desde
+    while fecha <= fecha_hasta:
+        bloques = bloques_por_dia.get(fecha.weekday())
+        if bloques:
+            for inicio in candidatos_dia(fecha, bloques, duracion):
+                if inicio < desde:
+                    continue
+                fin = inicio + duracion
+                # Descartar intervalos ocupados que terminan antes del horario
+                while i < len(ocupados) and ocupados[i][1] <= inicio:
+                    i += 1
+                if i < len(ocupados) and ocupados[i][0] < fin:
+                    continue
+                yield fecha, inicio
+        fecha += timedelta(days=1)
+
+
+def cargar_bloques(profesional_ids):
+    """Retorna {profesional_id: {dia_semana: [(hora_inicio, hora_fin), ...]}} en una consulta"""
+    bloques = {}
+    for profesional_id, dia_semana, hora_inicio, hora_fin in DisponibilidadProfesional.objects.filter(
+        profesional_id__in=profesional_ids,
+        activo=True
+    ).values_list('profesional_id', 'dia_semana', 'hora_inicio', 'hora_fin'):
+        bloques.setdefault(profesional_id, {}).setdefault(dia_semana, []).append(
+            (hora_inicio, hora_fin)
+        )
+    return bloques
+
+
+def cargar_ocupados(profesional_ids, inicio_rango, fin_rango):
+    """
+    Retorna {profesional_id: [[inicio, fin], ...]} con los intervalos ocupados
+    por citas activas y bloqueos del rango, ordenados y fusionados.
+    Ejecuta una consulta para citas y otra para bloqueos.
+    """
+    from apps.citas.models import Cita
+    
+    intervalos = {}
+    for profesional_id, fecha_hora, duracion_minutos in Cita.objects.filter(
+        profesional_id__in=profesional_ids,
+        fecha_hora__gte=inicio_rango - MARGEN_CITAS_PREVIAS,
+        fecha_hora__lt=fin_rango,
+        estado__in=ESTADOS_OCUPAN_HORARIO
+    ).values_list('profesional_id', 'fecha_hora', 'duracion_minutos'):
+        intervalos.setdefault(profesional_id, []).append(
+            (fecha_hora, fecha_hora + timedelta(minutes=duracion_minutos))
+        )
+    
+    for profesional_id, fecha_inicio, fecha_fin in BloqueoHorario.objects.filter(
+        profesional_id__in=profesional_ids,
+        fecha_inicio__lt=fin_rango,
+        fecha_fin__gt=inicio_rango
+    ).values_list('profesional_id', 'fecha_inicio', 'fecha_fin'):
+        intervalos.setdefault(profesional_id, []).append((fecha_inicio, fecha_fin))
+    
+    return {
+        profesional_id: fusionar_intervalos(lista)
+        for profesional_id, lista in intervalos.items()
+    }
+
+
+def calcular_horarios_libres(profesional, fecha_desde, fecha_hasta=None):
+    """
+    Calcula los horarios libres del profesional entre dos fechas (inclusive).
+    
+    Retorna un diccionario {fecha: [datetime, ...]} con una entrada por cada
+    día que tenga disponibilidad configurada. Ejecuta a lo más tres consultas
+    sin importar la cantidad de días ni de horarios.
+    """
+    fecha_hasta = fecha_hasta or fecha_desde
+    bloques_por_dia = cargar_bloques([profesional.id]).get(profesional.id)
+    if not bloques_por_dia:
+        return {}
+    
+    inicio_rango, fin_rango = rango_fechas(fecha_desde, fecha_hasta)
+    ocupados = cargar_ocupados([profesional.id], inicio_rango, fin_rango).get(profesional.id, [])
+    duracion = timedelta(minutes=profesional.duracion_cita_minutos)
+    
+    horarios = {}
+    fecha = fecha_desde
+    while fecha <= fecha_hasta:
+        if fecha.weekday() in bloques_por_dia:
+            horarios[fecha] = []
+        fecha += timedelta(days=1)
+    
+    for fecha, inicio in iterar_horarios_libres(
+        fecha_desde, fecha_hasta, bloques_por_dia, ocupados, duracion, timezone.now()
+    ):
+        horarios[fecha].append(inicio)
+    
+    return horarios
+
+
+def _flujo_profesional(profesional, fecha_desde, fecha_hasta, bloques_por_dia, ocupados, desde):
+    """Flujo perezoso de pares (inicio, profesional) libres de un profesional"""
+    duracion = timedelta(minutes=profesional.duracion_cita_minutos)
+    for _, inicio in iterar_horarios_libres(
+        fecha_desde, fecha_hasta, bloques_por_dia, ocupados, duracion, desde
+    ):
+        yield inicio, profesional
+
+
+def proximos_horarios_libres(profesionales, fecha_desde, cantidad, dias_horizonte):
+    """
+    Retorna los 'cantidad' horarios libres más próximos entre varios profesionales.
+    
+    Recorre el horizonte en ventanas que duplican su tamaño (1, 2, 4... días).
+    En cada ventana carga citas y bloqueos de todos los profesionales con dos
+    consultas y mezcla (k-way merge) el flujo perezoso de cada uno, deteniéndose
+    apenas se reúnen los horarios pedidos. Retorna una lista de (inicio, profesional).
+    """
+    profesionales = list(profesionales)
+    bloques = cargar_bloques([p.id for p in profesionales])
+    profesionales = [p for p in profesionales if p.id in bloques]
+    
+    ahora = timezone.now()
+    limite = fecha_desde + timedelta(days=dias_horizonte - 1)
+    resultados = []
+    fecha = fecha_desde
+    dias = 1
+    
+    while profesionales and len(resultados) < cantidad and fecha <= limite:
+        hasta = min(fecha + timedelta(days=dias - 1), limite)
+        inicio_rango, fin_rango = rango_fechas(fecha, hasta)
+        ocupados = cargar_ocupados([p.id for p in profesionales], inicio_rango, fin_rango)
+        
+        flujos = [
+            _flujo_profesional(p, fecha, hasta, bloques[p.id], ocupados.get(p.id, []), ahora)
+            for p in profesionales
+        ]
+        mezcla = heapq.merge(*flujos, key=lambda horario: horario[0])
+        resultados.extend(islice(mezcla, cantidad - len(resultados)))
+        
+        fecha = hasta + timedelta(days=1)
+        dias *= 2
+    
+    return resultados
+
+
+def comprimir_horarios(inicios, duracion):
+    """
+    Comprime una lista ordenada de horarios en tramos [hora_inicio, cantidad].
+    
+    Cada tramo agrupa horarios consecutivos separados exactamente por la
+    duración de la cita, de modo que un día completo ocupa pocos elementos.
+    """
+    tramos = []
+    anterior = None
+    for inicio in inicios:
+        if anterior is not None and inicio - anterior == duracion:
+            tramos[-1][1] += 1
+        else:
+            tramos.append([timezone.localtime(inicio).strftime('%H:%M'), 1])
+        anterior = inicio
+    return tramos
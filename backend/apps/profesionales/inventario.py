@@ -0,0 +1,249 @@
+"""
+Mantenimiento del inventario precalculado de horarios (SlotInventario).
+
+El inventario guarda una fila por profesional y horario dentro de un horizonte
+móvil de DIAS_HORIZONTE_INVENTARIO días. Se reconstruye completo con el comando
+'reconstruir_inventario' y se mantiene incrementalmente recalculando solo los
+horarios afectados por cada cambio de citas, bloqueos o disponibilidades.
+"""
+import math
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists
+from django.utils import timezone
+from .models import Profesional, SlotInventario
+from .horarios import (
+    rango_fechas, candidatos_dia, iterar_horarios_libres,
+    cargar_bloques, cargar_ocupados, calcular_horarios_libres,
+    proximos_horarios_libres, MARGEN_CITAS_PREVIAS
+)
+
+
+def inventario_activo():
+    """Indica si las lecturas y el mantenimiento usan el inventario"""
+    return settings.INVENTARIO_SLOTS_ACTIVO
+
+
+def horizonte_inventario():
+    """Retorna (fecha_desde, fecha_hasta) del horizonte móvil del inventario"""
+    hoy = timezone.localdate()
+    return hoy, hoy + timedelta(days=settings.DIAS_HORIZONTE_INVENTARIO - 1)
+
+
+def cubre_rango(fecha_desde, fecha_hasta):
+    """Indica si el rango de fechas puede responderse desde el inventario"""
+    if not inventario_activo():
+        return False
+    desde, hasta = horizonte_inventario()
+    return desde <= fecha_desde and fecha_hasta <= hasta
+
+
+def reconstruir_inventario(profesionales=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Reconstruye el inventario de los profesionales indicados (todos si es None)
+    dentro del rango de fechas (por defecto, el horizonte completo).
+    
+    Usa una consulta para disponibilidades, dos para citas y bloqueos, y
+    reemplaza las filas del rango con un DELETE y un bulk_create por lote.
+    Retorna la cantidad de filas creadas.
+    """
+    if profesionales is None:
+        profesionales = Profesional.objects.filter(activo_para_citas=True)
+    profesionales = list(profesionales)
+    ids = [p.id for p in profesionales]
+    
+    desde_defecto, hasta_defecto = horizonte_inventario()
+    fecha_desde = fecha_desde or desde_defecto
+    fecha_hasta = fecha_hasta or hasta_defecto
+    inicio_rango, fin_rango = rango_fechas(fecha_desde, fecha_hasta)
+    
+    bloques = cargar_bloques(ids)
+    ocupados = cargar_ocupados(ids, inicio_rango, fin_rango)
+    ahora = timezone.now()
+    
+    filas = []
+    for profesional in profesionales:
+        bloques_por_dia = bloques.get(profesional.id)
+        if not bloques_por_dia:
+            continue
+        duracion = timedelta(minutes=profesional.duracion_cita_minutos)
+        libres = {
+            inicio for _, inicio in iterar_horarios_libres(
+                fecha_desde, fecha_hasta, bloques_por_dia,
+                ocupados.get(profesional.id, []), duracion, ahora
+            )
+        }
+        fecha = fecha_desde
+        while fecha <= fecha_hasta:
+            for inicio in candidatos_dia(fecha, bloques_por_dia.get(fecha.weekday(), []), duracion):
+                if inicio < ahora:
+                    continue
+                filas.append(SlotInventario(
+                    profesional=profesional,
+                    fecha_hora=inicio,
+                    duracion_minutos=profesional.duracion_cita_minutos,
+                    disponible=inicio in libres
+                ))
+            fecha += timedelta(days=1)
+    
+    with transaction.atomic():
+        SlotInventario.objects.filter(
+            profesional_id__in=ids,
+            fecha_hora__gte=inicio_rango,
+            fecha_hora__lt=fin_rango
+        ).delete()
+        SlotInventario.objects.bulk_create(filas, batch_size=1000)
+    
+    return len(filas)
+
+
+def recalcular_intervalo(profesional_id, inicio, fin):
+    """
+    Recalcula la disponibilidad de los horarios del profesional que se solapan
+    con [inicio, fin) a partir de las citas y bloqueos vigentes.
+    Solo actualiza las filas cuyo estado cambia.
+    """
+    filas = [
+        (slot_id, fecha_hora, fecha_hora + timedelta(minutes=duracion_minutos), disponible)
+        for slot_id, fecha_hora, duracion_minutos, disponible in SlotInventario.objects.filter(
+            profesional_id=profesional_id,
+            fecha_hora__gte=inicio - MARGEN_CITAS_PREVIAS,
+            fecha_hora__lt=fin
+        ).order_by('fecha_hora').values_list('id', 'fecha_hora', 'duracion_minutos', 'disponible')
+    ]
+    filas = [fila for fila in filas if fila[2] > inicio]
+    if not filas:
+        return 0
+    
+    ocupados = cargar_ocupados(
+        [profesional_id], filas[0][1], max(fila[2] for fila in filas)
+    ).get(profesional_id, [])
+    
+    liberar, ocupar = [], []
+    for slot_id, slot_inicio, slot_fin, disponible in filas:
+        libre = not any(o_inicio < slot_fin and slot_inicio < o_fin for o_inicio, o_fin in ocupados)
+        if libre and not disponible:
+            liberar.append(slot_id)
+        elif not libre and disponible:
+            ocupar.append(slot_id)
+    
+    if liberar:
+        SlotInventario.objects.filter(id__in=liberar).update(disponible=True, fecha_actualizacion=timezone.now())
+    if ocupar:
+        SlotInventario.objects.filter(id__in=ocupar).update(disponible=False, fecha_actualizacion=timezone.now())
+    
+    return len(liberar) + len(ocupar)
+
+
+def recalcular_intervalos(intervalos):
+    """
+    Recalcula el inventario de varios intervalos (profesional_id, inicio, fin).
+    Por cada profesional recalcula una sola vez el tramo que cubre todos sus
+    intervalos, pensado para cambios masivos acotados en el tiempo.
+    """
+    tramos = {}
+    for profesional_id, inicio, fin in intervalos:
+        if profesional_id in tramos:
+            tramo_inicio, tramo_fin = tramos[profesional_id]
+            tramos[profesional_id] = (min(inicio, tramo_inicio), max(fin, tramo_fin))
+        else:
+            tramos[profesional_id] = (inicio, fin)
+    
+    return sum(
+        recalcular_intervalo(profesional_id, inicio, fin)
+        for profesional_id, (inicio, fin) in tramos.items()
+    )
+
+
+def _filtro_solapados(profesional_id, inicio, fin, duracion_slot):
+    """Filtra las filas del profesional cuyo horario se solapa con [inicio, fin)"""
+    return SlotInventario.objects.filter(
+        profesional_id=profesional_id,
+        fecha_hora__gt=inicio - duracion_slot,
+        fecha_hora__lt=fin
+    )
+
+
+def reclamar_horario(profesional, inicio, duracion_minutos):
+    """
+    Reclama en el inventario los horarios que cubre una nueva cita.
+    
+    Es un único UPDATE condicional sobre las filas disponibles del intervalo,
+    que debe marcar exactamente los horarios que la cita necesita según
+    duracion_cita_minutos. La cita debe comenzar en un horario de la grilla:
+    si no, un inicio desplazado cubriría más horarios de los que cuenta.
+    Si el inicio está fuera de la grilla, algún horario falta en el
+    inventario (fuera del horizonte o de la disponibilidad del profesional)
+    o ya estaba ocupado, retorna False y la transacción que lo envuelve debe
+    revertirse.
+    """
+    fin = inicio + timedelta(minutes=duracion_minutos)
+    necesarios = math.ceil(duracion_minutos / profesional.duracion_cita_minutos)
+    reclamados = _filtro_solapados(
+        profesional.id, inicio, fin, timedelta(minutes=profesional.duracion_cita_minutos)
+    ).filter(
+        Exists(SlotInventario.objects.filter(profesional_id=profesional.id, fecha_hora=inicio)),
+        disponible=True
+    ).update(
+        disponible=False, fecha_actualizacion=timezone.now()
+    )
+    return reclamados == necesarios
+
+
+def horarios_desde_inventario(profesional, fecha_desde, fecha_hasta):
+    """
+    Lee los horarios libres del profesional desde el inventario con una sola
+    consulta por rango de índice. Retorna el mismo formato que
+    calcular_horarios_libres: {fecha: [datetime, ...]}.
+    """
+    inicio_rango, fin_rango = rango_fechas(fecha_desde, fecha_hasta)
+    horarios = {}
+    for fecha_hora, disponible in SlotInventario.objects.filter(
+        profesional=profesional,
+        fecha_hora__gte=max(inicio_rango, timezone.now()),
+        fecha_hora__lt=fin_rango
+    ).order_by('fecha_hora').values_list('fecha_hora', 'disponible'):
+        fecha_hora = timezone.localtime(fecha_hora)
+        libres = horarios.setdefault(fecha_hora.date(), [])
+        if disponible:
+            libres.append(fecha_hora)
+    return horarios
+
+
+def proximos_desde_inventario(profesionales, cantidad):
+    """
+    Retorna los 'cantidad' horarios libres más próximos entre los profesionales
+    con una sola consulta ordenada sobre el índice del inventario.
+    """
+    profesionales = {p.id: p for p in profesionales}
+    return [
+        (timezone.localtime(fecha_hora), profesionales[profesional_id])
+        for profesional_id, fecha_hora in SlotInventario.objects.filter(
+            profesional_id__in=list(profesionales),
+            disponible=True,
+            fecha_hora__gte=timezone.now()
+        ).order_by('fecha_hora', 'profesional_id').values_list(
+            'profesional_id', 'fecha_hora'
+        )[:cantidad]
+    ]
+
+
+def obtener_horarios_libres(profesional, fecha_desde, fecha_hasta=None):
+    """
+    Punto de entrada de lectura de horarios libres: usa el inventario cuando
+    está activo y cubre el rango, y en otro caso el cálculo en memoria.
+    """
+    fecha_hasta = fecha_hasta or fecha_desde
+    if cubre_rango(fecha_desde, fecha_hasta):
+        return horarios_desde_inventario(profesional, fecha_desde, fecha_hasta)
+    return calcular_horarios_libres(profesional, fecha_desde, fecha_hasta)
+
+
+def obtener_proximos_horarios(profesionales, fecha_desde, cantidad):
+    """Punto de entrada de la búsqueda de próximos horarios libres"""
+    if inventario_activo() and fecha_desde <= timezone.localdate():
+        return proximos_desde_inventario(profesionales, cantidad)
+    return proximos_horarios_libres(
+        profesionales, fecha_desde, cantidad, settings.DIAS_MAXIMOS_RANGO_HORARIOS
+    )
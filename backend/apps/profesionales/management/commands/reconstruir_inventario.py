@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from apps.profesionales.models import Profesional
+from apps.profesionales.inventario import reconstruir_inventario
+
+
+class Command(BaseCommand):
+    """Reconstruye el inventario precalculado de horarios (SlotInventario)"""
+    
+    help = 'Reconstruye el inventario de horarios de los profesionales activos'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profesional',
+            type=int,
+            action='append',
+            help='ID de profesional a reconstruir (se puede repetir). Por defecto, todos.'
+        )
+    
+    def handle(self, *args, **options):
+        profesionales = Profesional.objects.filter(activo_para_citas=True)
+        if options['profesional']:
+            profesionales = profesionales.filter(id__in=options['profesional'])
+        
+        total = 0
+        for profesional in profesionales.iterator():
+            total += reconstruir_inventario([profesional])
+        
+        self.stdout.write(self.style.SUCCESS(f'Inventario reconstruido: {total} horarios'))
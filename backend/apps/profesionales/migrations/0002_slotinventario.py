@@ -0,0 +1,63 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profesionales", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotInventario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha_hora", models.DateTimeField(verbose_name="Fecha y Hora")),
+                (
+                    "duracion_minutos",
+                    models.IntegerField(verbose_name="Duración (minutos)"),
+                ),
+                (
+                    "disponible",
+                    models.BooleanField(default=True, verbose_name="Disponible"),
+                ),
+                (
+                    "fecha_actualizacion",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Última Actualización"
+                    ),
+                ),
+                (
+                    "profesional",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="slots",
+                        to="profesionales.profesional",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Slot de Inventario",
+                "verbose_name_plural": "Inventario de Slots",
+                "ordering": ["profesional", "fecha_hora"],
+                "indexes": [
+                    models.Index(
+                        fields=["profesional", "disponible", "fecha_hora"],
+                        name="slot_prof_disp_fecha_idx",
+                    )
+                ],
+                "unique_together": {("profesional", "fecha_hora")},
+            },
+        ),
+    ]
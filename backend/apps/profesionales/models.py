@@ -1,4 +1,5 @@
 from django.db import models
+from datetime import timedelta
 from apps.usuarios.models import Usuario
 
 class Profesional(models.Model):
@@ -118,4 +119,41 @@ class BloqueoHorario(models.Model):
         ordering = ['-fecha_inicio']
     
     def __str__(self):
-        return f"{self.profesional} - {self.get_motivo_display()} ({self.fecha_inicio.strftime('%d/%m/%Y')})"
\ No newline at end of file
+        return f"{self.profesional} - {self.get_motivo_display()} ({self.fecha_inicio.strftime('%d/%m/%Y')})"
+
+class SlotInventario(models.Model):
+    """
+    Inventario precalculado de horarios de un profesional.
+    Una fila por profesional y horario dentro del horizonte configurado;
+    se mantiene incrementalmente mediante señales.
+    """
+    
+    profesional = models.ForeignKey(
+        Profesional, 
+        on_delete=models.CASCADE, 
+        related_name='slots'
+    )
+    fecha_hora = models.DateTimeField(verbose_name='Fecha y Hora')
+    duracion_minutos = models.IntegerField(verbose_name='Duración (minutos)')
+    disponible = models.BooleanField(default=True, verbose_name='Disponible')
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name='Última Actualización')
+    
+    class Meta:
+        verbose_name = 'Slot de Inventario'
+        verbose_name_plural = 'Inventario de Slots'
+        ordering = ['profesional', 'fecha_hora']
+        unique_together = ['profesional', 'fecha_hora']
+        indexes = [
+            models.Index(
+                fields=['profesional', 'disponible', 'fecha_hora'],
+                name='slot_prof_disp_fecha_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        estado = 'Disponible' if self.disponible else 'Ocupado'
+        return f"{self.profesional_id} - {self.fecha_hora.strftime('%d/%m/%Y %H:%M')} ({estado})"
+    
+    def get_hora_fin(self):
+        """Retorna la hora de fin del horario"""
+        return self.fecha_hora + timedelta(minutes=self.duracion_minutos)
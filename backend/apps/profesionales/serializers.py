@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from datetime import date
+from django.conf import settings
+from apps.citas.conflictos import RESOLUCIONES_CONFLICTO
 from .models import Profesional, DisponibilidadProfesional, BloqueoHorario
 
 
@@ -56,13 +58,18 @@ class BloqueoHorarioSerializer(serializers.ModelSerializer):
     profesional_nombre = serializers.CharField(source='profesional.usuario.get_full_name', read_only=True)
     creado_por_nombre = serializers.CharField(source='creado_por.get_full_name', read_only=True)
     motivo_display = serializers.CharField(source='get_motivo_display', read_only=True)
+    # Al crear: qué hacer con las citas activas que quedan dentro del bloqueo
+    resolver_conflictos = serializers.ChoiceField(
+        choices=RESOLUCIONES_CONFLICTO, required=False, write_only=True
+    )
     
     class Meta:
         model = BloqueoHorario
         fields = [
             'id', 'profesional', 'profesional_nombre',
             'fecha_inicio', 'fecha_fin', 'motivo', 'motivo_display',
-            'descripcion', 'creado_por', 'creado_por_nombre', 'fecha_creacion'
+            'descripcion', 'creado_por', 'creado_por_nombre', 'fecha_creacion',
+            'resolver_conflictos'
         ]
         read_only_fields = ['id', 'fecha_creacion']
     
@@ -73,6 +80,11 @@ class BloqueoHorarioSerializer(serializers.ModelSerializer):
                 "fecha_fin": "La fecha de fin debe ser posterior a la fecha de inicio"
             })
         return data
+    
+    def update(self, instance, validated_data):
+        # Los conflictos solo se resuelven al crear el bloqueo
+        validated_data.pop('resolver_conflictos', None)
+        return super().update(instance, validated_data)
 
 
 class HorariosDisponiblesSerializer(serializers.Serializer):
@@ -83,4 +95,41 @@ class HorariosDisponiblesSerializer(serializers.Serializer):
         """Valida que la fecha no sea en el pasado"""
         if value < date.today():
             raise serializers.ValidationError("No se pueden consultar horarios en fechas pasadas")
-        return value
\ No newline at end of file
+        return value
+
+
+class RangoHorariosSerializer(serializers.Serializer):
+    """Serializer para consultar horarios disponibles en un rango de fechas"""
+    fecha_desde = serializers.DateField()
+    fecha_hasta = serializers.DateField()
+    
+    def validate_fecha_desde(self, value):
+        """Valida que la fecha inicial no sea en el pasado"""
+        if value < date.today():
+            raise serializers.ValidationError("No se pueden consultar horarios en fechas pasadas")
+        return value
+    
+    def validate(self, data):
+        """Valida que el rango sea coherente y no exceda el máximo permitido"""
+        dias = (data['fecha_hasta'] - data['fecha_desde']).days + 1
+        if dias < 1:
+            raise serializers.ValidationError({
+                "fecha_hasta": "La fecha final debe ser igual o posterior a la fecha inicial"
+            })
+        if dias > settings.DIAS_MAXIMOS_RANGO_HORARIOS:
+            raise serializers.ValidationError({
+                "fecha_hasta": f"El rango no puede superar {settings.DIAS_MAXIMOS_RANGO_HORARIOS} días"
+            })
+        return data
+
+
+class ProximoDisponibleSerializer(serializers.Serializer):
+    """Serializer para buscar los próximos horarios libres de una especialidad"""
+    cantidad = serializers.IntegerField(default=5, min_value=1, max_value=50)
+    fecha_desde = serializers.DateField(required=False)
+    
+    def validate_fecha_desde(self, value):
+        """Valida que la fecha no sea en el pasado"""
+        if value < date.today():
+            raise serializers.ValidationError("No se pueden consultar horarios en fechas pasadas")
+        return value
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .models import Profesional, DisponibilidadProfesional, BloqueoHorario
+from .inventario import inventario_activo, recalcular_intervalo, reconstruir_inventario
+from . import cache as cache_catalogo
+
+
+def _intervalo_cita(cita):
+    """Retorna (profesional_id, inicio, fin) de la cita sin disparar consultas"""
+    fecha_hora = cita.__dict__.get('fecha_hora')
+    duracion = cita.__dict__.get('duracion_minutos')
+    if fecha_hora is None or duracion is None:
+        return None
+    return cita.__dict__.get('profesional_id'), fecha_hora, fecha_hora + timedelta(minutes=duracion)
+
+
+@receiver(post_init, sender='citas.Cita')
+def recordar_intervalo_cita(sender, instance, **kwargs):
+    """Guarda el intervalo original para detectar reagendamientos"""
+    instance._intervalo_inventario = _intervalo_cita(instance)
+
+
+@receiver(post_save, sender='citas.Cita')
+def actualizar_inventario_cita(sender, instance, **kwargs):
+    """Recalcula los horarios afectados al crear, cancelar o reagendar una cita"""
+    if not inventario_activo():
+        return
+    
+    intervalos = {_intervalo_cita(instance), getattr(instance, '_intervalo_inventario', None)}
+    intervalos.discard(None)
+    for profesional_id, inicio, fin in intervalos:
+        transaction.on_commit(
+            lambda p=profesional_id, i=inicio, f=fin: recalcular_intervalo(p, i, f)
+        )
+    instance._intervalo_inventario = _intervalo_cita(instance)
+
+
+@receiver(post_delete, sender='citas.Cita')
+def liberar_inventario_cita(sender, instance, **kwargs):
+    """Libera los horarios de una cita eliminada"""
+    intervalo = _intervalo_cita(instance)
+    if inventario_activo() and intervalo:
+        profesional_id, inicio, fin = intervalo
+        transaction.on_commit(lambda: recalcular_intervalo(profesional_id, inicio, fin))
+
+
+def _intervalo_bloqueo(bloqueo):
+    """Retorna (profesional_id, inicio, fin) del bloqueo sin disparar consultas"""
+    if bloqueo.__dict__.get('fecha_inicio') is None or bloqueo.__dict__.get('fecha_fin') is None:
+        return None
+    return bloqueo.__dict__.get('profesional_id'), bloqueo.fecha_inicio, bloqueo.fecha_fin
+
+
+@receiver(post_init, sender=BloqueoHorario)
+def recordar_intervalo_bloqueo(sender, instance, **kwargs):
+    """Guarda el intervalo original para detectar cambios de fechas"""
+    instance._intervalo_inventario = _intervalo_bloqueo(instance)
+
+
+@receiver([post_save, post_delete], sender=BloqueoHorario)
+def actualizar_inventario_bloqueo(sender, instance, **kwargs):
+    """Recalcula los horarios cubiertos por un bloqueo creado, editado o eliminado"""
+    if not inventario_activo():
+        return
+    
+    intervalos = {_intervalo_bloqueo(instance), getattr(instance, '_intervalo_inventario', None)}
+    intervalos.discard(None)
+    for profesional_id, inicio, fin in intervalos:
+        transaction.on_commit(
+            lambda p=profesional_id, i=inicio, f=fin: recalcular_intervalo(p, i, f)
+        )
+    instance._intervalo_inventario = _intervalo_bloqueo(instance)
+
+
+@receiver(post_init, sender=Profesional)
+def recordar_duracion_cita(sender, instance, **kwargs):
+    """Guarda la duración original de las citas para detectar cambios de grilla"""
+    instance._duracion_inventario = instance.__dict__.get('duracion_cita_minutos')
+
+
+@receiver(post_save, sender=Profesional)
+def reconstruir_inventario_duracion(sender, instance, created, **kwargs):
+    """Con otra duración de cita cambian todos los horarios: se reconstruye el horizonte"""
+    anterior = getattr(instance, '_duracion_inventario', None)
+    instance._duracion_inventario = instance.__dict__.get('duracion_cita_minutos')
+    if created or not inventario_activo() or anterior == instance._duracion_inventario:
+        return
+    transaction.on_commit(
+        lambda: reconstruir_inventario(Profesional.objects.filter(id=instance.id))
+    )
+
+
+@receiver([post_save, post_delete], sender=DisponibilidadProfesional)
+def reconstruir_inventario_disponibilidad(sender, instance, **kwargs):
+    """Reconstruye el inventario del profesional cuando cambia su disponibilidad"""
+    if not inventario_activo():
+        return
+    transaction.on_commit(
+        lambda: reconstruir_inventario(Profesional.objects.filter(id=instance.profesional_id))
+    )
+
+
+def _invalidar_catalogo(*grupos):
+    """Invalida los grupos de la caché cuando la transacción se confirma"""
+    transaction.on_commit(lambda: cache_catalogo.invalidar(*grupos))
+
+
+@receiver([post_save, post_delete], sender=Profesional)
+def invalidar_cache_profesional(sender, instance, **kwargs):
+    """El perfil y el listado cambian; la disponibilidad depende de activo_para_citas"""
+    _invalidar_catalogo(
+        cache_catalogo.grupo_lista(),
+        cache_catalogo.grupo_perfil(instance.id),
+        cache_catalogo.grupo_disponibilidad(instance.id),
+    )
+
+
+@receiver([post_save, post_delete], sender=DisponibilidadProfesional)
+def invalidar_cache_disponibilidad(sender, instance, **kwargs):
+    """Solo cambia la disponibilidad semanal del profesional"""
+    _invalidar_catalogo(cache_catalogo.grupo_disponibilidad(instance.profesional_id))
+
+
+@receiver([post_save, post_delete], sender='usuarios.Usuario')
+def invalidar_cache_usuario(sender, instance, update_fields=None, **kwargs):
+    """El nombre y los datos de contacto del usuario se muestran en el catálogo"""
+    if instance.rol != 'PROFESIONAL' or update_fields == frozenset({'last_login'}):
+        return
+    
+    profesional_id = Profesional.objects.filter(usuario_id=instance.id).values_list('id', flat=True).first()
+    if profesional_id is not None:
+        _invalidar_catalogo(
+            cache_catalogo.grupo_lista(),
+            cache_catalogo.grupo_perfil(profesional_id),
+            cache_catalogo.grupo_disponibilidad(profesional_id),
+        )
@@ -0,0 +1,30 @@
+from celery import shared_task
+from django.utils import timezone
+from .models import Profesional, SlotInventario
+from .inventario import inventario_activo, horizonte_inventario, reconstruir_inventario
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task(name='apps.profesionales.tasks.avanzar_horizonte_inventario')
+def avanzar_horizonte_inventario():
+    """
+    Avanza el horizonte móvil del inventario de horarios.
+    Elimina los horarios ya transcurridos y genera el último día del horizonte.
+    Se ejecuta todos los días a las 00:05.
+    """
+    if not inventario_activo():
+        return {'eliminados': 0, 'creados': 0}
+    
+    eliminados, _ = SlotInventario.objects.filter(fecha_hora__lt=timezone.now()).delete()
+    
+    _, ultimo_dia = horizonte_inventario()
+    creados = reconstruir_inventario(
+        Profesional.objects.filter(activo_para_citas=True),
+        fecha_desde=ultimo_dia,
+        fecha_hasta=ultimo_dia
+    )
+    
+    logger.info(f"Horizonte de inventario avanzado. Eliminados: {eliminados}, Creados: {creados}")
+    
+    return {'eliminados': eliminados, 'creados': creados}
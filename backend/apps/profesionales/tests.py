@@ -1,3 +1,257 @@
-from django.test import TestCase
+from datetime import time, timedelta
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from config.pruebas import PresupuestoConsultasMixin, cliente_jwt
+from apps.citas import tasks
+from apps.citas.models import Cita, HistorialCita
+from apps.citas.tests import crear_pacientes, crear_profesional, horario_manana
+from apps.usuarios.models import Usuario
+from .inventario import reclamar_horario, reconstruir_inventario
+from .models import Profesional, DisponibilidadProfesional, BloqueoHorario, SlotInventario
+from .views import BloqueoHorarioViewSet, ProfesionalViewSet
 
-# Create your tests here.
+
+class PresupuestoConsultasProfesionalTest(PresupuestoConsultasMixin, TestCase):
+    """Cada acción de ProfesionalViewSet respeta su presupuesto de consultas con varios profesionales"""
+    
+    viewset = ProfesionalViewSet
+    PROFESIONALES = 10
+    
+    @classmethod
+    def setUpTestData(cls):
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(
+                rut=f'{10000000 + i}-{i % 10}', email=f'profesional{i}@clinica.cl',
+                nombre='Profesional', apellido=str(i), rol='PROFESIONAL'
+            )
+            for i in range(cls.PROFESIONALES)
+        ])
+        profesionales = Profesional.objects.bulk_create([
+            Profesional(
+                usuario=usuario, especialidad='Medicina General',
+                registro_profesional=f'REG{usuario.id}', anos_experiencia=5,
+                titulo_profesional='Médico Cirujano'
+            )
+            for usuario in usuarios
+        ])
+        DisponibilidadProfesional.objects.bulk_create([
+            DisponibilidadProfesional(
+                profesional=profesional, dia_semana=dia,
+                hora_inicio=time(9), hora_fin=time(13)
+            )
+            for profesional in profesionales
+            for dia in range(7)
+        ])
+        cls.profesional = profesionales[0]
+        cls.paciente = Usuario.objects.create_user(
+            rut='20000000-0', email='paciente@correo.cl', password='paciente123',
+            nombre='Paciente', apellido='Prueba'
+        )
+    
+    def setUp(self):
+        # Se mide la consulta a la base, no la respuesta en caché
+        cache.clear()
+        self.client = cliente_jwt(self.paciente)
+    
+    def test_catalogo(self):
+        url = f'/api/v1/profesionales/{self.profesional.id}/'
+        self.assertPresupuestoConsultas('list', self.client, 'get', '/api/v1/profesionales/', codigo=200)
+        self.assertPresupuestoConsultas('retrieve', self.client, 'get', url, codigo=200)
+        self.assertPresupuestoConsultas('disponibilidad', self.client, 'get', f'{url}disponibilidad/', codigo=200)
+    
+    def test_horarios(self):
+        url = f'/api/v1/profesionales/{self.profesional.id}/'
+        manana = timezone.localdate() + timedelta(days=1)
+        self.assertPresupuestoConsultas(
+            'horarios_disponibles', self.client, 'post', f'{url}horarios_disponibles/',
+            {'fecha': manana.isoformat()}, codigo=200
+        )
+        self.assertPresupuestoConsultas(
+            'horarios_rango', self.client, 'get',
+            f'{url}horarios_rango/?fecha_desde={manana}&fecha_hasta={manana + timedelta(days=6)}',
+            codigo=200
+        )
+        self.assertPresupuestoConsultas(
+            'proximo_disponible', self.client, 'get', '/api/v1/profesionales/proximo_disponible/?cantidad=20',
+            codigo=200
+        )
+
+
+@override_settings(INVENTARIO_SLOTS_ACTIVO=True)
+class ReclamarHorarioTest(TestCase):
+    """Una reserva solo reclama el inventario si todos los horarios que necesita están libres"""
+    
+    def setUp(self):
+        self.profesional = crear_profesional()
+        DisponibilidadProfesional.objects.bulk_create([
+            DisponibilidadProfesional(
+                profesional=self.profesional, dia_semana=dia, hora_inicio=time(9), hora_fin=time(13)
+            )
+            for dia in range(7)
+        ])
+        reconstruir_inventario([self.profesional])
+    
+    def test_reclama_una_sola_vez(self):
+        self.assertTrue(reclamar_horario(self.profesional, horario_manana(9), 60))
+        self.assertFalse(reclamar_horario(self.profesional, horario_manana(9, 30), 30))
+        self.assertEqual(SlotInventario.objects.filter(disponible=False).count(), 2)
+    
+    def test_intervalo_sin_inventario(self):
+        # Fuera de la disponibilidad, parcialmente fuera y más allá del horizonte
+        self.assertFalse(reclamar_horario(self.profesional, horario_manana(14), 30))
+        self.assertFalse(reclamar_horario(self.profesional, horario_manana(12, 30), 60))
+        fuera = horario_manana(9) + timedelta(days=settings.DIAS_HORIZONTE_INVENTARIO)
+        self.assertFalse(reclamar_horario(self.profesional, fuera, 30))
+    
+    def test_inicio_fuera_de_la_grilla(self):
+        # A las 10:15 la cita tocaría los horarios de 10:00 y 10:30
+        self.assertFalse(reclamar_horario(self.profesional, horario_manana(10, 15), 30))
+        
+        # Con el horario de 11:00 bloqueado, una cita de 10:45 tampoco reclama el de 10:30
+        with self.captureOnCommitCallbacks(execute=True):
+            BloqueoHorario.objects.create(
+                profesional=self.profesional, fecha_inicio=horario_manana(11),
+                fecha_fin=horario_manana(11, 30), motivo='ADMINISTRATIVO'
+            )
+        self.assertFalse(reclamar_horario(self.profesional, horario_manana(10, 45), 30))
+        self.assertEqual(
+            list(SlotInventario.objects.filter(disponible=False).values_list('fecha_hora', flat=True)),
+            [horario_manana(11)]
+        )
+    
+    def test_cambio_de_duracion_reconstruye_el_inventario(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profesional.duracion_cita_minutos = 60
+            self.profesional.save()
+        
+        duraciones = set(SlotInventario.objects.values_list('duracion_minutos', flat=True))
+        self.assertEqual(duraciones, {60})
+        self.assertTrue(reclamar_horario(self.profesional, horario_manana(10), 60))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requiere los rangos de PostgreSQL')
+class ConflictosBloqueoTest(PresupuestoConsultasMixin, TestCase):
+    """Al crear un bloqueo se informan las citas activas que quedan dentro y se pueden resolver en lotes"""
+    
+    viewset = BloqueoHorarioViewSet
+    URL = '/api/v1/bloqueos/'
+    
+    def setUp(self):
+        self.profesional = crear_profesional()
+        self.pacientes = crear_pacientes(6)
+        self.admin = Usuario.objects.create_superuser(
+            rut='99999999-9', email='admin@clinica.cl', password='admin123',
+            nombre='Admin', apellido='SGC'
+        )
+        # Bloqueo de 10:00 a 12:00: las citas de 9:45, 10:30 y 11:30 lo tocan
+        horarios = [(9, 15), (9, 45), (10, 30), (11, 30), (12, 0), (11, 0)]
+        estados = ['AGENDADA', 'CONFIRMADA', 'AGENDADA', 'CONFIRMADA', 'AGENDADA', 'CANCELADA']
+        self.citas = [
+            Cita.objects.create(
+                paciente=paciente, profesional=self.profesional, fecha_hora=horario_manana(*horario),
+                duracion_minutos=30, motivo_consulta='Control', estado=estado
+            )
+            for paciente, horario, estado in zip(self.pacientes, horarios, estados)
+        ]
+        self.en_conflicto = [cita.id for cita in self.citas[1:4]]
+        self.client_admin = cliente_jwt(self.admin)
+    
+    def _datos(self, **extra):
+        return {
+            'profesional': self.profesional.id,
+            'fecha_inicio': horario_manana(10).isoformat(),
+            'fecha_fin': horario_manana(12).isoformat(),
+            'motivo': 'VACACIONES',
+            **extra
+        }
+    
+    def test_informa_conflictos(self):
+        response = self.assertPresupuestoConsultas(
+            'create', self.client_admin, 'post', self.URL, self._datos(), codigo=201
+        )
+        
+        self.assertEqual([cita['id'] for cita in response.data['citas_en_conflicto']], self.en_conflicto)
+        self.assertEqual(response.data['citas_en_conflicto'][0]['paciente_nombre'], 'Paciente 1')
+        self.assertIsNone(response.data['resolucion'])
+        self.assertFalse(HistorialCita.objects.exists())
+    
+    def test_presupuesto_resto_de_acciones(self):
+        bloqueo = BloqueoHorario.objects.create(
+            profesional=self.profesional, fecha_inicio=horario_manana(14), fecha_fin=horario_manana(15),
+            motivo='OTRO', creado_por=self.admin
+        )
+        url = f'{self.URL}{bloqueo.id}/'
+        self.assertPresupuestoConsultas('list', self.client_admin, 'get', self.URL, codigo=200)
+        self.assertPresupuestoConsultas('retrieve', self.client_admin, 'get', url, codigo=200)
+        self.assertPresupuestoConsultas(
+            'partial_update', self.client_admin, 'patch', url, {
+                'fecha_inicio': horario_manana(14).isoformat(), 'fecha_fin': horario_manana(15).isoformat(),
+                'descripcion': 'Reunión',
+            }, codigo=200
+        )
+        self.assertPresupuestoConsultas('update', self.client_admin, 'put', url, {
+            'profesional': self.profesional.id, 'fecha_inicio': horario_manana(14).isoformat(),
+            'fecha_fin': horario_manana(16).isoformat(), 'motivo': 'OTRO',
+        }, codigo=200)
+        self.assertPresupuestoConsultas('destroy', self.client_admin, 'delete', url, codigo=204)
+    
+    @override_settings(TAMANO_LOTE_CONFLICTOS=2)
+    def test_cancela_en_lotes(self):
+        with mock.patch.object(tasks.resolver_conflictos_bloqueo, 'delay') as delay:
+            response = self.client_admin.post(self.URL, self._datos(resolver_conflictos='cancelar'), format='json')
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['resolucion'], {'accion': 'cancelar', 'encolada': True})
+        delay.assert_called_once_with(response.data['id'], 'cancelar', self.admin.id)
+        
+        with mock.patch.object(tasks.notificar_conflictos_bloqueo, 'delay') as notificar:
+            with self.captureOnCommitCallbacks(execute=True):
+                resultado = tasks.resolver_conflictos_bloqueo(*delay.call_args.args)
+        
+        self.assertEqual(resultado, {'resueltas': 3, 'lotes': 2})
+        self.assertEqual(
+            [llamada.args[0] for llamada in notificar.call_args_list],
+            [self.en_conflicto[:2], self.en_conflicto[2:]]
+        )
+        self.assertEqual(
+            sorted(Cita.objects.filter(estado='CANCELADA').values_list('id', flat=True)),
+            sorted(self.en_conflicto + [self.citas[5].id])
+        )
+        self.assertEqual(
+            set(HistorialCita.objects.values_list('cita_id', 'estado_nuevo', 'modificado_por_id')),
+            {(cita_id, 'CANCELADA', self.admin.id) for cita_id in self.en_conflicto}
+        )
+        self.assertEqual(tasks.notificar_conflictos_bloqueo(self.en_conflicto, response.data['id'], 'cancelar'), {
+            'notificadas': 3, 'errores': 0
+        })
+    
+    def test_marca_sin_cambiar_estado(self):
+        bloqueo = BloqueoHorario.objects.create(
+            profesional=self.profesional, fecha_inicio=horario_manana(10), fecha_fin=horario_manana(12),
+            motivo='VACACIONES', creado_por=self.admin
+        )
+        with mock.patch.object(tasks.notificar_conflictos_bloqueo, 'delay') as notificar:
+            with self.captureOnCommitCallbacks(execute=True):
+                resultado = tasks.resolver_conflictos_bloqueo(bloqueo.id, 'marcar')
+        
+        self.assertEqual(resultado, {'resueltas': 3, 'lotes': 1})
+        notificar.assert_called_once_with(self.en_conflicto, bloqueo.id, 'marcar')
+        self.assertEqual(
+            sorted(HistorialCita.objects.values_list('cita_id', 'estado_anterior', 'estado_nuevo')),
+            [(cita.id, cita.estado, cita.estado) for cita in self.citas[1:4]]
+        )
+        self.assertEqual(Cita.objects.filter(estado='CANCELADA').count(), 1)
+    
+    def test_paciente_no_puede_resolver(self):
+        with mock.patch.object(tasks.resolver_conflictos_bloqueo, 'delay') as delay:
+            response = cliente_jwt(self.pacientes[0]).post(
+                self.URL, self._datos(resolver_conflictos='cancelar'), format='json'
+            )
+        
+        self.assertEqual(response.status_code, 403)
+        delay.assert_not_called()
+        self.assertFalse(BloqueoHorario.objects.exists())
@@ -1,14 +1,21 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
+from django.http import Http404
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import timedelta
+from config.condicional import calcular_etag, respuesta_condicional
+from apps.citas.conflictos import conflictos_bloqueo, programar_resolucion
 from .models import Profesional, DisponibilidadProfesional, BloqueoHorario
 from .serializers import (
     ProfesionalSerializer, ProfesionalListSerializer,
     DisponibilidadProfesionalSerializer, BloqueoHorarioSerializer,
-    HorariosDisponiblesSerializer
+    HorariosDisponiblesSerializer, RangoHorariosSerializer, ProximoDisponibleSerializer
 )
+from .horarios import comprimir_horarios
+from .inventario import obtener_horarios_libres, obtener_proximos_horarios
+from . import cache as cache_catalogo
 
 
 class ProfesionalViewSet(viewsets.ReadOnlyModelViewSet):
@@ -18,6 +25,16 @@ class ProfesionalViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ProfesionalSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Consultas máximas por acción, sin caché (exigidas en tests.PresupuestoConsultasProfesionalTest)
+    presupuesto_consultas = {
+        'list': 2,
+        'retrieve': 1,
+        'disponibilidad': 2,
+        'horarios_disponibles': 4,
+        'horarios_rango': 4,
+        'proximo_disponible': 4,
+    }
+    
     def get_serializer_class(self):
         """Retorna serializer según la acción"""
         if self.action == 'list':
@@ -34,17 +51,57 @@ class ProfesionalViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
     
+    def _id_profesional(self, pk):
+        """Normaliza el id de la URL para que coincida con el que invalidan las señales"""
+        try:
+            return int(pk)
+        except (TypeError, ValueError):
+            raise Http404
+    
+    def list(self, request, *args, **kwargs):
+        """Listado de profesionales, en caché por filtros y página"""
+        listar = super().list
+        clave = cache_catalogo.clave_peticion(cache_catalogo.grupo_lista(), request)
+        # La clave ya contiene la versión del listado: sirve de ETag sin consultar la base
+        return respuesta_condicional(
+            request,
+            lambda: cache_catalogo.obtener_o_calcular(clave, lambda: listar(request, *args, **kwargs).data),
+            etag=calcular_etag(clave)
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Perfil de un profesional, en caché hasta que cambie"""
+        detalle = super().retrieve
+        clave = cache_catalogo.clave_peticion(
+            cache_catalogo.grupo_perfil(self._id_profesional(kwargs['pk'])), request
+        )
+        return respuesta_condicional(
+            request,
+            lambda: cache_catalogo.obtener_o_calcular(clave, lambda: detalle(request, *args, **kwargs).data),
+            etag=calcular_etag(clave)
+        )
+    
     @action(detail=True, methods=['get'])
     def disponibilidad(self, request, pk=None):
         """Obtiene la disponibilidad semanal de un profesional"""
+        clave = cache_catalogo.clave_peticion(
+            cache_catalogo.grupo_disponibilidad(self._id_profesional(pk)), request
+        )
+        return respuesta_condicional(
+            request,
+            lambda: cache_catalogo.obtener_o_calcular(clave, self._calcular_disponibilidad),
+            etag=calcular_etag(clave)
+        )
+    
+    def _calcular_disponibilidad(self):
         profesional = self.get_object()
         disponibilidades = DisponibilidadProfesional.objects.filter(
             profesional=profesional,
             activo=True
-        ).order_by('dia_semana', 'hora_inicio')
+        ).select_related('profesional__usuario').order_by('dia_semana', 'hora_inicio')
         
         serializer = DisponibilidadProfesionalSerializer(disponibilidades, many=True)
-        return Response(serializer.data)
+        return serializer.data
     
     @action(detail=True, methods=['post'])
     def horarios_disponibles(self, request, pk=None):
@@ -54,66 +111,81 @@ class ProfesionalViewSet(viewsets.ReadOnlyModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         fecha = serializer.validated_data['fecha']
-        dia_semana = fecha.weekday()
+        horarios_por_dia = obtener_horarios_libres(profesional, fecha)
         
-        # Obtener disponibilidad para ese día
-        disponibilidad = DisponibilidadProfesional.objects.filter(
-            profesional=profesional,
-            dia_semana=dia_semana,
-            activo=True
-        ).first()
-        
-        if not disponibilidad:
+        if fecha not in horarios_por_dia:
             return Response({
                 'horarios': [],
                 'mensaje': 'Profesional no tiene disponibilidad este día'
             })
         
-        # Generar horarios disponibles
-        horarios = self._generar_horarios(
-            profesional, 
-            fecha, 
-            disponibilidad.hora_inicio,
-            disponibilidad.hora_fin
-        )
+        horarios = [
+            {
+                'hora': timezone.localtime(inicio).strftime('%H:%M'),
+                'disponible': True
+            }
+            for inicio in horarios_por_dia[fecha]
+        ]
         
         return Response({'horarios': horarios})
     
-    def _generar_horarios(self, profesional, fecha, hora_inicio, hora_fin):
-        """Genera lista de horarios disponibles"""
-        from apps.citas.models import Cita
-        
-        horarios = []
-        duracion = profesional.duracion_cita_minutos
-        
-        # Convertir a datetime
-        current_time = datetime.combine(fecha, hora_inicio)
-        end_time = datetime.combine(fecha, hora_fin)
-        
-        while current_time < end_time:
-            # Verificar si hay cita en este horario
-            cita_existe = Cita.objects.filter(
-                profesional=profesional,
-                fecha_hora=current_time,
-                estado__in=['AGENDADA', 'CONFIRMADA']
-            ).exists()
-            
-            # Verificar si hay bloqueo en este horario
-            bloqueo_existe = BloqueoHorario.objects.filter(
-                profesional=profesional,
-                fecha_inicio__lte=current_time,
-                fecha_fin__gt=current_time
-            ).exists()
-            
-            if not cita_existe and not bloqueo_existe:
-                horarios.append({
-                    'hora': current_time.strftime('%H:%M'),
-                    'disponible': True
-                })
-            
-            current_time += timedelta(minutes=duracion)
-        
-        return horarios
+    @action(detail=True, methods=['get'])
+    def horarios_rango(self, request, pk=None):
+        """
+        Obtiene los horarios disponibles de varios días en una sola respuesta.
+        
+        Cada día se entrega como tramos [hora_inicio, cantidad] de horarios
+        consecutivos separados por 'duracion_minutos'.
+        """
+        profesional = self.get_object()
+        serializer = RangoHorariosSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        
+        fecha_desde = serializer.validated_data['fecha_desde']
+        fecha_hasta = serializer.validated_data['fecha_hasta']
+        horarios_por_dia = obtener_horarios_libres(profesional, fecha_desde, fecha_hasta)
+        
+        duracion = timedelta(minutes=profesional.duracion_cita_minutos)
+        dias = {
+            fecha.isoformat(): comprimir_horarios(inicios, duracion)
+            for fecha, inicios in horarios_por_dia.items()
+        }
+        
+        return Response({
+            'profesional': profesional.id,
+            'fecha_desde': fecha_desde,
+            'fecha_hasta': fecha_hasta,
+            'duracion_minutos': profesional.duracion_cita_minutos,
+            'dias': dias
+        })
+    
+    @action(detail=False, methods=['get'])
+    def proximo_disponible(self, request):
+        """
+        Obtiene los horarios libres más próximos entre todos los profesionales
+        (filtrados por 'especialidad' si se especifica).
+        """
+        serializer = ProximoDisponibleSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        
+        fecha_desde = serializer.validated_data.get('fecha_desde') or timezone.localdate()
+        horarios = obtener_proximos_horarios(
+            self.get_queryset(),
+            fecha_desde,
+            serializer.validated_data['cantidad']
+        )
+        
+        return Response({
+            'horarios': [
+                {
+                    'fecha_hora': inicio,
+                    'profesional': profesional.id,
+                    'profesional_nombre': profesional.usuario.get_full_name(),
+                    'especialidad': profesional.especialidad
+                }
+                for inicio, profesional in horarios
+            ]
+        })
 
 
 class DisponibilidadProfesionalViewSet(viewsets.ModelViewSet):
@@ -128,9 +200,9 @@ class DisponibilidadProfesionalViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset().select_related('profesional__usuario')
         
         # Si es profesional, solo ver su propia disponibilidad
-        if hasattr(self.request.user, 'perfil_profesional'):
+        if self.request.user.profesional_id:
             queryset = queryset.filter(
-                profesional=self.request.user.perfil_profesional
+                profesional_id=self.request.user.profesional_id
             )
         
         profesional_id = self.request.query_params.get('profesional', None)
@@ -141,7 +213,7 @@ class DisponibilidadProfesionalViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Solo profesionales y admins pueden crear"""
-        if not self.request.user.is_staff and not hasattr(self.request.user, 'perfil_profesional'):
+        if not self.request.user.is_staff and not self.request.user.profesional_id:
             raise permissions.PermissionDenied('No tiene permiso para crear disponibilidad')
         serializer.save()
 
@@ -153,6 +225,16 @@ class BloqueoHorarioViewSet(viewsets.ModelViewSet):
     serializer_class = BloqueoHorarioSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Consultas máximas por acción (exigidas en tests.ConflictosBloqueoTest)
+    presupuesto_consultas = {
+        'list': 2,
+        'create': 4,
+        'retrieve': 1,
+        'update': 4,
+        'partial_update': 2,
+        'destroy': 2,
+    }
+    
     def get_queryset(self):
         """Filtrar por profesional y fecha"""
         queryset = super().get_queryset().select_related(
@@ -160,9 +242,9 @@ class BloqueoHorarioViewSet(viewsets.ModelViewSet):
         )
         
         # Si es profesional, solo ver sus propios bloqueos
-        if hasattr(self.request.user, 'perfil_profesional'):
+        if self.request.user.profesional_id:
             queryset = queryset.filter(
-                profesional=self.request.user.perfil_profesional
+                profesional_id=self.request.user.profesional_id
             )
         
         profesional_id = self.request.query_params.get('profesional', None)
@@ -179,6 +261,54 @@ class BloqueoHorarioViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def create(self, request, *args, **kwargs):
+        """
+        Crea el bloqueo y retorna las citas activas que quedan dentro de él.
+        Con 'resolver_conflictos' ('cancelar' o 'marcar') encola además su
+        resolución en lotes (ver apps.citas.tasks.resolver_conflictos_bloqueo).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        resolucion = serializer.validated_data.pop('resolver_conflictos', None)
+        profesional = serializer.validated_data['profesional']
+        if resolucion and not request.user.is_staff and request.user.profesional_id != profesional.id:
+            raise PermissionDenied('No tiene permiso para modificar las citas de este profesional')
+        
+        self.perform_create(serializer)
+        bloqueo = serializer.instance
+        
+        conflictos = [
+            {
+                'id': id,
+                'fecha_hora': fecha_hora,
+                'duracion_minutos': duracion,
+                'estado': estado,
+                'paciente': paciente_id,
+                'paciente_nombre': f'{nombre} {apellido}',
+            }
+            for id, fecha_hora, duracion, estado, paciente_id, nombre, apellido in conflictos_bloqueo(
+                bloqueo
+            ).order_by('fecha_hora', 'id').values_list(
+                'id', 'fecha_hora', 'duracion_minutos', 'estado',
+                'paciente_id', 'paciente__nombre', 'paciente__apellido'
+            )
+        ]
+        
+        # Una consulta con los nombres, en vez de leer el profesional y el usuario del token
+        bloqueo = BloqueoHorario.objects.select_related('profesional__usuario', 'creado_por').get(pk=bloqueo.pk)
+        data = dict(self.get_serializer(bloqueo).data)
+        data['citas_en_conflicto'] = conflictos
+        data['resolucion'] = None
+        if resolucion and conflictos:
+            data['resolucion'] = {
+                'accion': resolucion,
+                'encolada': programar_resolucion(bloqueo, resolucion, request.user),
+            }
+        
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+    
     def perform_create(self, serializer):
         """Registrar quién creó el bloqueo"""
         serializer.save(creado_por=self.request.user)
\ No newline at end of file
@@ -1,71 +1,38 @@
 from django.contrib import admin
+from .models import ResumenDiarioCitas, DiaPendienteReporte
 
-# Asumiendo que tienes modelos de Reportes en apps/reportes/models.py
-# Si no los tienes, primero necesitas crearlos
 
-# Ejemplo básico de admin para reportes:
-# Descomenta y adapta cuando tengas los modelos
-
-"""
-from .models import Reporte, ReporteAgendamiento, ReporteInasistencias
-
-@admin.register(Reporte)
-class ReporteAdmin(admin.ModelAdmin):
-    '''Administración de reportes generales'''
+@admin.register(ResumenDiarioCitas)
+class ResumenDiarioCitasAdmin(admin.ModelAdmin):
+    """Administración de resúmenes diarios de citas (solo lectura)"""
     
-    list_display = ('id', 'titulo', 'tipo', 'generado_por', 'fecha_generacion')
-    list_filter = ('tipo', 'fecha_generacion')
-    search_fields = ('titulo', 'descripcion', 'generado_por__nombre')
-    date_hierarchy = 'fecha_generacion'
-    readonly_fields = ('fecha_generacion',)
+    list_display = ('fecha', 'profesional', 'especialidad', 'total_citas', 'citas_completadas',
+                    'citas_canceladas', 'citas_no_asistio', 'fecha_actualizacion')
+    list_filter = ('especialidad', 'fecha')
+    search_fields = ('profesional__usuario__nombre', 'profesional__usuario__apellido')
+    date_hierarchy = 'fecha'
     
-    fieldsets = (
-        ('Información del Reporte', {
-            'fields': ('titulo', 'tipo', 'descripcion')
-        }),
-        ('Período', {
-            'fields': ('fecha_inicio', 'fecha_fin')
-        }),
-        ('Generado Por', {
-            'fields': ('generado_por', 'fecha_generacion')
-        }),
-    )
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('generado_por')
+        return qs.select_related('profesional__usuario')
 
 
-@admin.register(ReporteAgendamiento)
-class ReporteAgendamientoAdmin(admin.ModelAdmin):
-    '''Administración de reportes de agendamiento'''
+@admin.register(DiaPendienteReporte)
+class DiaPendienteReporteAdmin(admin.ModelAdmin):
+    """Días pendientes de reconciliar en los resúmenes"""
     
-    list_display = ('periodo', 'total_citas', 'citas_completadas', 'citas_canceladas', 
-                    'porcentaje_cumplimiento', 'fecha_generacion')
-    list_filter = ('fecha_generacion',)
-    date_hierarchy = 'fecha_generacion'
-    readonly_fields = ('fecha_generacion', 'porcentaje_cumplimiento')
+    list_display = ('fecha', 'profesional', 'fecha_registro')
+    date_hierarchy = 'fecha'
     
-    def porcentaje_cumplimiento(self, obj):
-        if obj.total_citas > 0:
-            return f"{(obj.citas_completadas / obj.total_citas * 100):.2f}%"
-        return "0%"
-    porcentaje_cumplimiento.short_description = '% Cumplimiento'
-
-
-@admin.register(ReporteInasistencias)
-class ReporteInasistenciasAdmin(admin.ModelAdmin):
-    '''Administración de reportes de inasistencias'''
-    
-    list_display = ('paciente', 'total_inasistencias', 'periodo_inicio', 'periodo_fin', 'bloqueado')
-    list_filter = ('bloqueado', 'periodo_inicio')
-    search_fields = ('paciente__rut', 'paciente__nombre', 'paciente__apellido')
-    date_hierarchy = 'periodo_inicio'
+    def has_add_permission(self, request):
+        return False
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('paciente')
-"""
-
-# Register your models here.
-# Por ahora deja este comentario hasta que crees los modelos de Reportes
\ No newline at end of file
+        return qs.select_related('profesional__usuario')
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class ReportesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.reportes'  # ← Asegúrate que sea "apps.reportes"
\ No newline at end of file
+    name = 'apps.reportes'  # ← Asegúrate que sea "apps.reportes"
+    
+    def ready(self):
+        """Registra las señales que mantienen los resúmenes diarios de citas"""
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+from apps.reportes.resumen import reconstruir_resumenes, reconciliar_pendientes
+
+
+class Command(BaseCommand):
+    """Reconstruye los resúmenes diarios de citas (ResumenDiarioCitas)"""
+    
+    help = 'Reconstruye los resúmenes diarios de citas desde la tabla de citas'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=parse_date, help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--hasta', type=parse_date, help='Fecha final (YYYY-MM-DD)')
+        parser.add_argument(
+            '--pendientes',
+            action='store_true',
+            help='Recalcula solo los días marcados como pendientes'
+        )
+    
+    def handle(self, *args, **options):
+        if options['pendientes']:
+            total = reconciliar_pendientes()
+            self.stdout.write(self.style.SUCCESS(f'Días pendientes recalculados: {total}'))
+            return
+        
+        total = reconstruir_resumenes(options['desde'], options['hasta'])
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes reconstruidos: {total}'))
@@ -0,0 +1,166 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+ESTADOS = {
+    "AGENDADA": "citas_agendadas",
+    "CONFIRMADA": "citas_confirmadas",
+    "EN_CURSO": "citas_en_curso",
+    "COMPLETADA": "citas_completadas",
+    "CANCELADA": "citas_canceladas",
+    "NO_ASISTIO": "citas_no_asistio",
+}
+
+
+def poblar_resumenes(apps, schema_editor):
+    """Genera los resúmenes diarios de las citas existentes"""
+    Cita = apps.get_model("citas", "Cita")
+    ResumenDiarioCitas = apps.get_model("reportes", "ResumenDiarioCitas")
+
+    agregados = {"total_citas": Count("id")}
+    for estado, campo in ESTADOS.items():
+        agregados[campo] = Count("id", filter=Q(estado=estado))
+
+    filas = (
+        Cita.objects.order_by()
+        .annotate(dia=TruncDate("fecha_hora"))
+        .values("dia", "profesional_id", "profesional__especialidad")
+        .annotate(**agregados)
+    )
+    ResumenDiarioCitas.objects.bulk_create(
+        (
+            ResumenDiarioCitas(
+                fecha=fila["dia"],
+                profesional_id=fila["profesional_id"],
+                especialidad=fila["profesional__especialidad"],
+                **{campo: fila[campo] for campo in agregados},
+            )
+            for fila in filas.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("profesionales", "0002_slotinventario"),
+        ("citas", "0002_cita_sin_solapamiento"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DiaPendienteReporte",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha", models.DateField(verbose_name="Fecha")),
+                (
+                    "fecha_registro",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de Registro"
+                    ),
+                ),
+                (
+                    "profesional",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dias_pendientes_reporte",
+                        to="profesionales.profesional",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Día Pendiente de Reporte",
+                "verbose_name_plural": "Días Pendientes de Reporte",
+                "ordering": ["fecha"],
+                "unique_together": {("fecha", "profesional")},
+            },
+        ),
+        migrations.CreateModel(
+            name="ResumenDiarioCitas",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha", models.DateField(verbose_name="Fecha")),
+                (
+                    "especialidad",
+                    models.CharField(max_length=100, verbose_name="Especialidad"),
+                ),
+                (
+                    "total_citas",
+                    models.IntegerField(default=0, verbose_name="Total de Citas"),
+                ),
+                (
+                    "citas_agendadas",
+                    models.IntegerField(default=0, verbose_name="Agendadas"),
+                ),
+                (
+                    "citas_confirmadas",
+                    models.IntegerField(default=0, verbose_name="Confirmadas"),
+                ),
+                (
+                    "citas_en_curso",
+                    models.IntegerField(default=0, verbose_name="En Curso"),
+                ),
+                (
+                    "citas_completadas",
+                    models.IntegerField(default=0, verbose_name="Completadas"),
+                ),
+                (
+                    "citas_canceladas",
+                    models.IntegerField(default=0, verbose_name="Canceladas"),
+                ),
+                (
+                    "citas_no_asistio",
+                    models.IntegerField(default=0, verbose_name="No Asistió"),
+                ),
+                (
+                    "fecha_actualizacion",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Última Actualización"
+                    ),
+                ),
+                (
+                    "profesional",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumenes_diarios",
+                        to="profesionales.profesional",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen Diario de Citas",
+                "verbose_name_plural": "Resúmenes Diarios de Citas",
+                "ordering": ["-fecha", "profesional"],
+                "indexes": [
+                    models.Index(fields=["fecha"], name="resumen_fecha_idx"),
+                    models.Index(
+                        fields=["especialidad", "fecha"], name="resumen_esp_fecha_idx"
+                    ),
+                ],
+                "unique_together": {("fecha", "profesional")},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
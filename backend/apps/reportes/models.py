@@ -1,3 +1,68 @@
 from django.db import models
+from apps.profesionales.models import Profesional
 
-# Create your models here.
+
+class ResumenDiarioCitas(models.Model):
+    """
+    Resumen diario de citas por profesional (y su especialidad).
+    Se mantiene incrementalmente con cada cambio de estado de una cita y
+    se reconcilia cada noche para los días marcados como pendientes.
+    """
+    
+    fecha = models.DateField(verbose_name='Fecha')
+    profesional = models.ForeignKey(
+        Profesional,
+        on_delete=models.CASCADE,
+        related_name='resumenes_diarios'
+    )
+    especialidad = models.CharField(max_length=100, verbose_name='Especialidad')
+    
+    # Conteos por estado (ver Cita.ESTADOS)
+    total_citas = models.IntegerField(default=0, verbose_name='Total de Citas')
+    citas_agendadas = models.IntegerField(default=0, verbose_name='Agendadas')
+    citas_confirmadas = models.IntegerField(default=0, verbose_name='Confirmadas')
+    citas_en_curso = models.IntegerField(default=0, verbose_name='En Curso')
+    citas_completadas = models.IntegerField(default=0, verbose_name='Completadas')
+    citas_canceladas = models.IntegerField(default=0, verbose_name='Canceladas')
+    citas_no_asistio = models.IntegerField(default=0, verbose_name='No Asistió')
+    
+    # Metadata
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name='Última Actualización')
+    
+    class Meta:
+        verbose_name = 'Resumen Diario de Citas'
+        verbose_name_plural = 'Resúmenes Diarios de Citas'
+        ordering = ['-fecha', 'profesional']
+        unique_together = ['fecha', 'profesional']
+        indexes = [
+            models.Index(fields=['fecha'], name='resumen_fecha_idx'),
+            models.Index(fields=['especialidad', 'fecha'], name='resumen_esp_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.profesional_id} - {self.fecha.strftime('%d/%m/%Y')} ({self.total_citas} citas)"
+
+
+class DiaPendienteReporte(models.Model):
+    """
+    Día de un profesional cuyo resumen debe recalcularse.
+    Se registra cuando las citas cambian sin pasar por las señales
+    (por ejemplo, actualizaciones masivas con QuerySet.update()).
+    """
+    
+    fecha = models.DateField(verbose_name='Fecha')
+    profesional = models.ForeignKey(
+        Profesional,
+        on_delete=models.CASCADE,
+        related_name='dias_pendientes_reporte'
+    )
+    fecha_registro = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Registro')
+    
+    class Meta:
+        verbose_name = 'Día Pendiente de Reporte'
+        verbose_name_plural = 'Días Pendientes de Reporte'
+        ordering = ['fecha']
+        unique_together = ['fecha', 'profesional']
+    
+    def __str__(self):
+        return f"{self.profesional_id} - {self.fecha.strftime('%d/%m/%Y')}"
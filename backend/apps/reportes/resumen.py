@@ -0,0 +1,273 @@
+"""
+Resúmenes diarios de citas (ResumenDiarioCitas).
+
+Cada fila guarda los conteos por estado de un profesional en un día. Las
+señales de Cita aplican deltas de +1/-1 con expresiones F() dentro de la misma
+transacción que el cambio; las actualizaciones masivas registran el día como
+pendiente (DiaPendienteReporte) y la reconciliación nocturna recalcula solo
+esos días. Los tableros y el reporte mensual leen estos resúmenes en lugar de
+recorrer la tabla de citas.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.citas.models import Cita
+from apps.citas.estadisticas import (
+    CAMPOS_ESTADO, CAMPOS_CONTEO, agregados_por_estado, calcular_estadisticas, nombre_profesional
+)
+from apps.profesionales.horarios import rango_fechas
+from apps.profesionales.models import Profesional
+from .models import ResumenDiarioCitas, DiaPendienteReporte
+
+
+# Días que se recalculan por consulta durante la reconciliación
+LOTE_RECONCILIACION = 500
+
+# Agrupaciones de calcular_estadisticas sobre los resúmenes diarios
+AGRUPACIONES_RESUMEN = {
+    'profesional': {
+        'profesional': F('profesional_id'),
+        'profesional_nombre': nombre_profesional(),
+    },
+    'especialidad': {'especialidad': F('especialidad')},
+    'dia': {'dia': F('fecha')},
+}
+
+
+def clave_resumen(fecha_hora, profesional_id, estado):
+    """Retorna (fecha local, profesional_id, estado) de una cita"""
+    return timezone.localdate(fecha_hora), profesional_id, estado
+
+
+def aplicar_transicion(anterior, actual):
+    """
+    Mueve una cita entre resúmenes: resta en la clave 'anterior' y suma en la
+    'actual' (cualquiera puede ser None al crear o eliminar la cita).
+    Cuando ambas caen en el mismo día y profesional basta un UPDATE.
+    """
+    if anterior == actual:
+        return
+    
+    if anterior and actual and anterior[:2] == actual[:2]:
+        fecha, profesional_id, _ = actual
+        _ajustar(fecha, profesional_id, {anterior[2]: -1, actual[2]: 1})
+        return
+    
+    if anterior:
+        fecha, profesional_id, estado = anterior
+        _ajustar(fecha, profesional_id, {estado: -1}, total=-1)
+    if actual:
+        fecha, profesional_id, estado = actual
+        _ajustar(fecha, profesional_id, {estado: 1}, total=1)
+
+
+def aplicar_transiciones(transiciones):
+    """
+    Como aplicar_transicion para varios pares (anterior, actual): acumula los
+    deltas por día y profesional y aplica un solo UPDATE por resumen.
+    """
+    deltas = {}
+    totales = {}
+    for anterior, actual in transiciones:
+        if anterior == actual:
+            continue
+        for clave, signo in ((anterior, -1), (actual, 1)):
+            if clave:
+                dia, estado = clave[:2], clave[2]
+                por_estado = deltas.setdefault(dia, {})
+                por_estado[estado] = por_estado.get(estado, 0) + signo
+                totales[dia] = totales.get(dia, 0) + signo
+    
+    for (fecha, profesional_id), por_estado in deltas.items():
+        por_estado = {estado: delta for estado, delta in por_estado.items() if delta}
+        if por_estado:
+            _ajustar(fecha, profesional_id, por_estado, total=totales[(fecha, profesional_id)])
+
+
+def _ajustar(fecha, profesional_id, deltas, total=0):
+    """Aplica los deltas por estado al resumen del día, creándolo si no existe"""
+    cambios = {
+        CAMPOS_ESTADO[estado]: F(CAMPOS_ESTADO[estado]) + delta
+        for estado, delta in deltas.items()
+    }
+    if total:
+        cambios['total_citas'] = F('total_citas') + total
+    cambios['fecha_actualizacion'] = timezone.now()
+    
+    resumenes = ResumenDiarioCitas.objects.filter(fecha=fecha, profesional_id=profesional_id)
+    if resumenes.update(**cambios):
+        return
+    
+    # Sin fila previa solo se puede sumar; una resta indica un resumen desfasado
+    if total <= 0 or any(delta < 0 for delta in deltas.values()):
+        marcar_dias_pendientes([(fecha, profesional_id)])
+        return
+    
+    especialidad = Profesional.objects.filter(id=profesional_id).values_list(
+        'especialidad', flat=True
+    ).first()
+    try:
+        with transaction.atomic():
+            ResumenDiarioCitas.objects.create(
+                fecha=fecha,
+                profesional_id=profesional_id,
+                especialidad=especialidad or '',
+                total_citas=total,
+                **{CAMPOS_ESTADO[estado]: delta for estado, delta in deltas.items()}
+            )
+    except IntegrityError:
+        # Otra transacción creó la fila del día entre el UPDATE y el INSERT
+        resumenes.update(**cambios)
+
+
+def marcar_dias_pendientes(dias):
+    """
+    Registra días por reconciliar. Acepta pares (fecha, profesional_id) o un
+    queryset de Cita, del que se obtienen sus días con una sola consulta.
+    """
+    if hasattr(dias, 'model'):
+        dias = dias.order_by().annotate(
+            dia=TruncDate('fecha_hora')
+        ).values_list('dia', 'profesional_id').distinct()
+    
+    DiaPendienteReporte.objects.bulk_create(
+        [DiaPendienteReporte(fecha=fecha, profesional_id=profesional_id) for fecha, profesional_id in dias],
+        ignore_conflicts=True
+    )
+
+
+def recalcular_dias(dias):
+    """
+    Recalcula desde Cita los resúmenes de los pares (fecha, profesional_id).
+    Usa una consulta agregada por lote y reemplaza las filas con un upsert;
+    los días que quedaron sin citas se eliminan. Retorna los días recalculados.
+    """
+    dias = sorted(set(dias))
+    for i in range(0, len(dias), LOTE_RECONCILIACION):
+        _recalcular_lote(dias[i:i + LOTE_RECONCILIACION])
+    return len(dias)
+
+
+def _recalcular_lote(dias):
+    """Recalcula un lote de días con una consulta agregada y un upsert"""
+    por_profesional = {}
+    for fecha, profesional_id in dias:
+        por_profesional.setdefault(profesional_id, []).append(fecha)
+    
+    # Rango de fecha_hora por profesional, para usar el índice (profesional, fecha_hora)
+    filtro = Q()
+    for profesional_id, fechas in por_profesional.items():
+        inicio, fin = rango_fechas(min(fechas), max(fechas))
+        filtro |= Q(profesional_id=profesional_id, fecha_hora__gte=inicio, fecha_hora__lt=fin)
+    
+    filas = Cita.objects.order_by().filter(filtro).annotate(dia=TruncDate('fecha_hora')).values(
+        'dia', 'profesional_id', 'profesional__especialidad'
+    ).annotate(**agregados_por_estado())
+    
+    # El rango puede incluir días intermedios que no se pidieron
+    pedidos = set(dias)
+    resumenes = [
+        ResumenDiarioCitas(
+            fecha=fila['dia'],
+            profesional_id=fila['profesional_id'],
+            especialidad=fila['profesional__especialidad'],
+            **{campo: fila[campo] for campo in CAMPOS_CONTEO}
+        )
+        for fila in filas
+        if (fila['dia'], fila['profesional_id']) in pedidos
+    ]
+    
+    vacios = set(dias) - {(r.fecha, r.profesional_id) for r in resumenes}
+    with transaction.atomic():
+        if vacios:
+            filtro_vacios = Q()
+            for fecha, profesional_id in vacios:
+                filtro_vacios |= Q(fecha=fecha, profesional_id=profesional_id)
+            ResumenDiarioCitas.objects.filter(filtro_vacios).delete()
+        guardar_resumenes(resumenes)
+
+
+def guardar_resumenes(resumenes):
+    """Inserta o reemplaza resúmenes diarios con un único upsert por lote"""
+    ahora = timezone.now()
+    for resumen in resumenes:
+        resumen.fecha_actualizacion = ahora
+    ResumenDiarioCitas.objects.bulk_create(
+        resumenes,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['fecha', 'profesional'],
+        update_fields=['especialidad', *CAMPOS_CONTEO, 'fecha_actualizacion']
+    )
+
+
+def reconciliar_pendientes():
+    """
+    Recalcula los días marcados como pendientes y los desmarca.
+    Las marcas se eliminan antes de recalcular, dentro de la misma transacción,
+    de modo que un cambio posterior vuelve a registrar su día para la siguiente
+    ejecución en lugar de perderse.
+    """
+    with transaction.atomic():
+        pendientes = list(
+            DiaPendienteReporte.objects.select_for_update().values_list('id', 'fecha', 'profesional_id')
+        )
+        if not pendientes:
+            return 0
+        DiaPendienteReporte.objects.filter(id__in=[id_ for id_, _, _ in pendientes]).delete()
+        return recalcular_dias((fecha, profesional_id) for _, fecha, profesional_id in pendientes)
+
+
+def reconstruir_resumenes(fecha_desde=None, fecha_hasta=None):
+    """
+    Reconstruye todos los resúmenes (opcionalmente de un rango de fechas)
+    con una sola consulta agregada sobre Cita. Retorna las filas generadas.
+    """
+    citas = Cita.objects.order_by()
+    resumenes = ResumenDiarioCitas.objects.all()
+    if fecha_desde:
+        citas = citas.filter(fecha_hora__gte=rango_fechas(fecha_desde, fecha_desde)[0])
+        resumenes = resumenes.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        citas = citas.filter(fecha_hora__lt=rango_fechas(fecha_hasta, fecha_hasta)[1])
+        resumenes = resumenes.filter(fecha__lte=fecha_hasta)
+    
+    filas = citas.annotate(dia=TruncDate('fecha_hora')).values(
+        'dia', 'profesional_id', 'profesional__especialidad'
+    ).annotate(**agregados_por_estado())
+    
+    total = 0
+    lote = []
+    with transaction.atomic():
+        resumenes.delete()
+        for fila in filas.iterator(chunk_size=LOTE_RECONCILIACION):
+            lote.append(ResumenDiarioCitas(
+                fecha=fila['dia'],
+                profesional_id=fila['profesional_id'],
+                especialidad=fila['profesional__especialidad'],
+                **{campo: fila[campo] for campo in CAMPOS_CONTEO}
+            ))
+            if len(lote) >= LOTE_RECONCILIACION:
+                guardar_resumenes(lote)
+                total += len(lote)
+                lote = []
+        guardar_resumenes(lote)
+        total += len(lote)
+    return total
+
+
+def estadisticas_desde_resumen(queryset=None, agrupaciones=()):
+    """
+    Calcula las mismas estadísticas que calcular_estadisticas sobre Cita,
+    pero sumando los resúmenes diarios (una fila por profesional y día).
+    Se omiten los días que quedaron sin citas tras reagendamientos.
+    """
+    if queryset is None:
+        queryset = ResumenDiarioCitas.objects.all()
+    return calcular_estadisticas(
+        queryset.filter(total_citas__gt=0),
+        agrupaciones,
+        agregados={campo: Sum(campo) for campo in CAMPOS_CONTEO},
+        expresiones=AGRUPACIONES_RESUMEN
+    )
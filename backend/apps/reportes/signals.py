@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .resumen import clave_resumen, aplicar_transicion
+from .tablero import invalidar_resumen_admin
+
+
+# Campos de Cita que determinan el resumen diario al que pertenece
+CAMPOS_RESUMEN = ('fecha_hora', 'profesional_id', 'estado')
+
+
+def _estado_resumen(cita):
+    """Retorna los valores de CAMPOS_RESUMEN sin disparar consultas"""
+    valores = tuple(cita.__dict__.get(campo) for campo in CAMPOS_RESUMEN)
+    return None if None in valores else valores
+
+
+@receiver(post_init, sender='citas.Cita')
+def recordar_estado_resumen(sender, instance, **kwargs):
+    """Guarda día, profesional y estado originales de la cita"""
+    instance._estado_resumen = _estado_resumen(instance)
+
+
+@receiver(post_save, sender='citas.Cita')
+def actualizar_resumen_cita(sender, instance, created, update_fields=None, **kwargs):
+    """Aplica al resumen diario la creación o el cambio de estado/fecha de una cita"""
+    anterior = None if created else getattr(instance, '_estado_resumen', None)
+    actual = _estado_resumen(instance)
+    
+    # Con update_fields solo cambian en la base de datos los campos guardados
+    if anterior and actual and update_fields is not None:
+        actual = tuple(
+            nuevo if campo in update_fields or campo.removesuffix('_id') in update_fields else viejo
+            for campo, viejo, nuevo in zip(CAMPOS_RESUMEN, anterior, actual)
+        )
+    
+    if anterior != actual:
+        aplicar_transicion(
+            clave_resumen(*anterior) if anterior else None,
+            clave_resumen(*actual) if actual else None
+        )
+    instance._estado_resumen = actual
+
+
+@receiver(post_delete, sender='citas.Cita')
+def descontar_resumen_cita(sender, instance, **kwargs):
+    """Descuenta una cita eliminada de su resumen diario"""
+    anterior = getattr(instance, '_estado_resumen', None) or _estado_resumen(instance)
+    if anterior:
+        aplicar_transicion(clave_resumen(*anterior), None)
+
+
+@receiver([post_save, post_delete], sender='citas.Cita')
+@receiver([post_save, post_delete], sender='profesionales.Profesional')
+@receiver([post_save, post_delete], sender='usuarios.Usuario')
+def invalidar_resumen_admin_cambio(sender, instance, update_fields=None, **kwargs):
+    """Invalida el resumen del administrador cuando la transacción se confirma"""
+    if update_fields == frozenset({'last_login'}):
+        return
+    transaction.on_commit(invalidar_resumen_admin)
@@ -0,0 +1,111 @@
+"""
+Resumen del panel de administración.
+
+Reúne en una respuesta lo que muestran el tablero y la página de reportes del
+administrador: usuarios por rol, bloqueados, profesionales activos, conteos de
+citas por estado, la carga del día y la tasa de inasistencia, más las listas
+cortas de profesionales, usuarios bloqueados y pacientes con inasistencias.
+
+Se calcula con un número fijo de consultas (dos agregados y tres listas
+acotadas) y se guarda en caché CACHE_TTL_RESUMEN_ADMIN segundos. Las señales
+de Usuario, Profesional y Cita cambian su versión después del commit, y las
+transiciones de estado (también las de las tareas programadas) lo invalidan
+desde apps.citas.transiciones.
+"""
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from apps.citas.estadisticas import CAMPOS_CONTEO, tasa_inasistencia
+from apps.profesionales.cache import invalidar, obtener_o_calcular, version
+from apps.profesionales.models import Profesional
+from apps.usuarios.models import Usuario
+from .models import ResumenDiarioCitas
+
+
+GRUPO = 'reportes.resumen_admin'
+
+# Elementos de cada lista del resumen
+LIMITE_LISTAS = 10
+
+
+def invalidar_resumen_admin():
+    invalidar(GRUPO)
+
+
+def obtener_resumen_admin():
+    """Resumen vigente, desde la caché o recalculado"""
+    return obtener_o_calcular(
+        f'reportes:resumen_admin:{version(GRUPO)}',
+        calcular_resumen_admin,
+        ttl=settings.CACHE_TTL_RESUMEN_ADMIN
+    )
+
+
+def _conteos_citas(fila, prefijo):
+    conteos = {campo: fila[prefijo + campo] or 0 for campo in CAMPOS_CONTEO}
+    conteos['citas_pendientes'] = conteos['citas_agendadas'] + conteos['citas_confirmadas']
+    conteos['tasa_inasistencia'] = tasa_inasistencia(conteos)
+    return conteos
+
+
+def calcular_resumen_admin():
+    """Calcula el resumen con cinco consultas, independientes del volumen de datos"""
+    hoy = timezone.localdate()
+    
+    # Usuarios por rol y profesionales activos en un solo recorrido
+    usuarios = Usuario.objects.order_by().aggregate(
+        total=Count('id'),
+        bloqueados=Count('id', filter=Q(bloqueado=True)),
+        con_inasistencias=Count('id', filter=Q(rol='PACIENTE', contador_inasistencias__gt=0)),
+        profesionales_activos=Count(
+            'perfil_profesional', filter=Q(perfil_profesional__activo_para_citas=True)
+        ),
+        **{f'rol_{rol}': Count('id', filter=Q(rol=rol)) for rol, _ in Usuario.ROLES}
+    )
+    
+    # Citas por estado, totales y del día, desde los resúmenes diarios
+    citas = ResumenDiarioCitas.objects.order_by().aggregate(
+        **{f'todas_{campo}': Sum(campo) for campo in CAMPOS_CONTEO},
+        **{f'hoy_{campo}': Sum(campo, filter=Q(fecha=hoy)) for campo in CAMPOS_CONTEO}
+    )
+    
+    profesionales = [
+        {
+            'id': id,
+            'nombre_completo': f'{nombre} {apellido}',
+            'especialidad': especialidad,
+            'duracion_cita_minutos': duracion,
+        }
+        for id, nombre, apellido, especialidad, duracion in Profesional.objects.filter(
+            activo_para_citas=True
+        ).order_by('usuario__nombre', 'id').values_list(
+            'id', 'usuario__nombre', 'usuario__apellido', 'especialidad', 'duracion_cita_minutos'
+        )[:LIMITE_LISTAS]
+    ]
+    campos_usuario = ('id', 'rut', 'nombre', 'apellido', 'contador_inasistencias')
+    bloqueados = list(
+        Usuario.objects.filter(bloqueado=True).order_by('-fecha_bloqueo', 'id').values(
+            *campos_usuario
+        )[:LIMITE_LISTAS]
+    )
+    con_inasistencias = list(
+        Usuario.objects.filter(rol='PACIENTE', contador_inasistencias__gt=0).order_by(
+            '-contador_inasistencias', 'id'
+        ).values(*campos_usuario)[:LIMITE_LISTAS]
+    )
+    
+    return {
+        'usuarios': {
+            'total': usuarios['total'],
+            'por_rol': {rol: usuarios[f'rol_{rol}'] for rol, _ in Usuario.ROLES},
+            'bloqueados': usuarios['bloqueados'],
+            'con_inasistencias': usuarios['con_inasistencias'],
+        },
+        'profesionales_activos': usuarios['profesionales_activos'],
+        'citas': _conteos_citas(citas, 'todas_'),
+        'hoy': {'fecha': hoy, **_conteos_citas(citas, 'hoy_')},
+        'profesionales': profesionales,
+        'usuarios_bloqueados': bloqueados,
+        'pacientes_con_inasistencias': con_inasistencias,
+        'generado': timezone.now(),
+    }
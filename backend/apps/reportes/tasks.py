@@ -0,0 +1,17 @@
+from celery import shared_task
+from .resumen import reconciliar_pendientes
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task(name='apps.reportes.tasks.reconciliar_resumenes_diarios')
+def reconciliar_resumenes_diarios():
+    """
+    Recalcula los resúmenes diarios de los días marcados como pendientes.
+    Se ejecuta todos los días a las 02:00.
+    """
+    recalculados = reconciliar_pendientes()
+    
+    logger.info(f"Resúmenes diarios reconciliados. Días recalculados: {recalculados}")
+    
+    return {'recalculados': recalculados}
@@ -1,3 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from config.pruebas import PresupuestoConsultasMixin, cliente_jwt
+from apps.citas import tasks
+from apps.citas.models import Cita
+from apps.citas.tests import crear_pacientes, crear_profesional
+from apps.usuarios.models import Usuario
+from .views import ReportesViewSet
 
-# Create your tests here.
+
+class ResumenAdminTest(PresupuestoConsultasMixin, TestCase):
+    """El resumen del administrador usa pocas consultas, se guarda en caché y se invalida con los cambios"""
+    
+    viewset = ReportesViewSet
+    URL = '/api/v1/reportes/resumen/'
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesional = crear_profesional()
+        cls.pacientes = crear_pacientes(6)
+        cls.admin = Usuario.objects.create_superuser(
+            rut='99999999-9', email='admin@clinica.cl', password='admin123',
+            nombre='Admin', apellido='SGC'
+        )
+        Usuario.objects.filter(id=cls.pacientes[0].id).update(bloqueado=True, contador_inasistencias=3)
+        Usuario.objects.filter(id=cls.pacientes[1].id).update(contador_inasistencias=1)
+        
+        ahora = timezone.localtime()
+        estados = ['AGENDADA', 'CONFIRMADA', 'COMPLETADA', 'COMPLETADA', 'NO_ASISTIO', 'CANCELADA']
+        for i, estado in enumerate(estados):
+            Cita.objects.create(
+                paciente=cls.pacientes[i], profesional=cls.profesional,
+                fecha_hora=ahora - timedelta(days=2, hours=i) if i else ahora.replace(hour=8, minute=0),
+                duracion_minutos=30, motivo_consulta='Control', estado=estado
+            )
+    
+    def setUp(self):
+        cache.clear()
+        self.client_admin = cliente_jwt(self.admin)
+    
+    def test_resumen(self):
+        response = self.assertPresupuestoConsultas('resumen', self.client_admin, 'get', self.URL, codigo=200)
+        datos = response.data
+        
+        self.assertEqual(datos['usuarios']['total'], 8)
+        self.assertEqual(datos['usuarios']['por_rol'], {'PACIENTE': 6, 'PROFESIONAL': 1, 'ADMIN': 1})
+        self.assertEqual(datos['usuarios']['bloqueados'], 1)
+        self.assertEqual(datos['usuarios']['con_inasistencias'], 2)
+        self.assertEqual(datos['profesionales_activos'], 1)
+        self.assertEqual(datos['citas']['total_citas'], 6)
+        self.assertEqual(datos['citas']['citas_completadas'], 2)
+        self.assertEqual(datos['citas']['tasa_inasistencia'], round(1 / 3 * 100, 2))
+        self.assertEqual(datos['hoy']['total_citas'], 1)
+        self.assertEqual(datos['hoy']['citas_pendientes'], 1)
+        self.assertEqual([u['id'] for u in datos['usuarios_bloqueados']], [self.pacientes[0].id])
+        self.assertEqual(
+            [u['id'] for u in datos['pacientes_con_inasistencias']],
+            [self.pacientes[0].id, self.pacientes[1].id]
+        )
+        self.assertEqual(datos['profesionales'][0]['nombre_completo'], 'Juan Pérez')
+    
+    def test_cache_e_invalidacion(self):
+        self.client_admin.get(self.URL)
+        with self.assertNumQueries(0):
+            self.client_admin.get(self.URL)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pacientes[0].desbloquear_usuario()
+        self.assertEqual(self.client_admin.get(self.URL).data['usuarios']['bloqueados'], 0)
+    
+    @mock.patch('apps.citas.transiciones.revocar_recordatorios')
+    def test_limpieza_de_citas_invalida_el_resumen(self, revocar):
+        Cita.objects.create(
+            paciente=self.pacientes[2], profesional=self.profesional,
+            fecha_hora=timezone.now() + timedelta(hours=2), duracion_minutos=30, motivo_consulta='Control'
+        )
+        canceladas = self.client_admin.get(self.URL).data['citas']['citas_canceladas']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = tasks.limpiar_citas_no_confirmadas()
+        
+        self.assertGreaterEqual(resultado['canceladas'], 1)
+        self.assertEqual(
+            self.client_admin.get(self.URL).data['citas']['citas_canceladas'],
+            canceladas + resultado['canceladas']
+        )
+    
+    def test_solo_admin(self):
+        self.assertEqual(cliente_jwt(self.pacientes[2]).get(self.URL).status_code, 403)
@@ -1,3 +1,20 @@
-from django.shortcuts import render
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .tablero import obtener_resumen_admin
 
-# Create your views here.
+
+class ReportesViewSet(viewsets.ViewSet):
+    """Reportes del panel de administración (solo admin)"""
+    
+    permission_classes = [permissions.IsAdminUser]
+    
+    # Consultas máximas por acción, sin caché (exigidas en tests.ResumenAdminTest)
+    presupuesto_consultas = {
+        'resumen': 5,
+    }
+    
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """Todo lo que muestran el tablero y los reportes del administrador, en una respuesta"""
+        return Response(obtener_resumen_admin())
@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.contrib.auth.admin import UserAdmin
 from .models import Usuario, HistorialBloqueo
+from .revocacion import invalidar_tokens_usuario
 
 @admin.register(Usuario)
 class UsuarioAdmin(UserAdmin):
@@ -52,7 +54,11 @@ class UsuarioAdmin(UserAdmin):
     
     def bloquear_usuarios(self, request, queryset):
         """Acción para bloquear usuarios seleccionados"""
-        count = queryset.filter(bloqueado=False).update(bloqueado=True)
+        ids = list(queryset.filter(bloqueado=False).values_list('id', flat=True))
+        count = Usuario.objects.filter(id__in=ids).update(bloqueado=True, fecha_actualizacion=timezone.now())
+        # update() no dispara señales: los tokens con bloqueado=False se invalidan aquí
+        for usuario_id in ids:
+            invalidar_tokens_usuario(usuario_id)
         self.message_user(request, f'{count} usuario(s) bloqueado(s) exitosamente.')
     bloquear_usuarios.short_description = "Bloquear usuarios seleccionados"
 
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.usuarios'
-    verbose_name = 'Usuarios'
\ No newline at end of file
+    verbose_name = 'Usuarios'
+    
+    def ready(self):
+        """Registra las señales que invalidan los tokens desactualizados"""
+        from . import signals  # noqa: F401
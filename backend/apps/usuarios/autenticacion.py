@@ -0,0 +1,124 @@
+"""
+Autenticación JWT sin consultas a la base de datos.
+
+Los tokens llevan en sus claims los datos que las vistas consultan en cada
+petición (rol, is_staff, bloqueo y perfil profesional). Con ellos se construye
+un Usuario parcial: los demás campos quedan diferidos y Django los carga solo
+si una vista los usa. Las vistas que necesitan el modelo completo lo obtienen
+con usuario_completo().
+
+El refresh token no lleva esos claims: cada refresh (AuthViewSet.refresh o
+api/v1/token/refresh/) vuelve a leer el usuario con emitir_access_token(),
+de modo que un cambio de rol o un bloqueo no sobrevive a la vigencia del
+access token.
+"""
+from django.db import router
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import Usuario
+from .revocacion import token_revocado
+
+
+# Campos del usuario que viajan en el token (además del id)
+CAMPOS_CLAIMS = ('rol', 'is_staff', 'is_superuser', 'bloqueado')
+
+
+def claims_usuario(usuario):
+    """Claims con los datos del usuario que usan las vistas en cada petición"""
+    claims = {campo: getattr(usuario, campo) for campo in CAMPOS_CLAIMS}
+    claims['profesional_id'] = usuario.profesional_id
+    return claims
+
+
+class TokenUsuario(RefreshToken):
+    """Refresh token sin claims de autorización; su access token los lleva"""
+    
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.claims_access = claims_usuario(user)
+        return token
+    
+    @property
+    def access_token(self):
+        access = super().access_token
+        for claim, valor in getattr(self, 'claims_access', {}).items():
+            access[claim] = valor
+        return access
+
+
+def id_desde_claim(token):
+    """Id del usuario del token (simplejwt >= 5.4 lo emite como texto)"""
+    return Usuario._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+
+
+def emitir_access_token(refresh):
+    """
+    Emite un access token desde un refresh token, releyendo el usuario para
+    que los claims reflejen sus datos actuales.
+    """
+    if token_revocado(refresh.payload, verificar_claims=False):
+        raise InvalidToken('Token revocado')
+    
+    usuario = Usuario.objects.select_related('perfil_profesional').filter(
+        id=id_desde_claim(refresh), is_active=True
+    ).first()
+    if usuario is None:
+        raise InvalidToken('Usuario inactivo o inexistente')
+    
+    access = refresh.access_token
+    # 'iat' se copia del refresh token: se renueva para que no parezca anterior a los cambios
+    access.set_iat()
+    for claim, valor in claims_usuario(usuario).items():
+        access[claim] = valor
+    return access
+
+
+def usuario_desde_claims(token):
+    """Usuario parcial construido desde el token; el resto de campos es diferido"""
+    datos = {campo: token[campo] for campo in CAMPOS_CLAIMS}
+    datos.update(id=id_desde_claim(token), is_active=True)
+    # from_db espera los valores en el orden de los campos del modelo
+    campos = [campo.attname for campo in Usuario._meta.concrete_fields if campo.attname in datos]
+    usuario = Usuario.from_db(router.db_for_read(Usuario), campos, [datos[campo] for campo in campos])
+    usuario.__dict__['profesional_id'] = token['profesional_id']
+    return usuario
+
+
+def usuario_completo(usuario):
+    """Retorna el usuario con todos sus campos, consultándolo solo si es parcial"""
+    if usuario.get_deferred_fields():
+        return Usuario.objects.get(pk=usuario.pk)
+    return usuario
+
+
+class JWTClaimsAuthentication(JWTAuthentication):
+    """
+    Autenticación JWT que no carga el usuario desde la base de datos.
+    Los tokens revocados o emitidos antes de un cambio del usuario se rechazan
+    consultando la lista de revocación (ver revocacion.py).
+    """
+    
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if token_revocado(token.payload):
+            raise InvalidToken('Token revocado o desactualizado')
+        return token
+    
+    def get_user(self, validated_token):
+        if all(claim in validated_token for claim in (*CAMPOS_CLAIMS, 'profesional_id')):
+            return usuario_desde_claims(validated_token)
+        
+        # Tokens emitidos antes de incluir los claims: se carga el usuario con
+        # su perfil profesional en la misma consulta (lo usa profesional_id)
+        usuario = Usuario.objects.select_related('perfil_profesional').filter(
+            id=id_desde_claim(validated_token)
+        ).first()
+        if usuario is None:
+            raise AuthenticationFailed('Usuario no encontrado', code='user_not_found')
+        if not usuario.is_active:
+            raise AuthenticationFailed('Usuario inactivo', code='user_inactive')
+        return usuario
@@ -0,0 +1,38 @@
+"""
+Filtro de Bloom en memoria.
+
+Responde "seguro que no está" o "puede estar" con una tasa acotada de falsos
+positivos y sin falsos negativos. Se usa como primer filtro de la lista de
+revocación: la gran mayoría de los tokens no está revocada y se descarta sin
+consultar el almacén.
+"""
+import hashlib
+import math
+
+
+class FiltroBloom:
+    """Filtro de Bloom sobre un bytearray, con hashing doble (Kirsch-Mitzenmacher)"""
+    
+    def __init__(self, capacidad, tasa_error=0.001):
+        capacidad = max(int(capacidad), 1)
+        self.bits = max(int(-capacidad * math.log(tasa_error) / math.log(2) ** 2), 8)
+        self.funciones = max(int(round(self.bits / capacidad * math.log(2))), 1)
+        self.arreglo = bytearray((self.bits + 7) // 8)
+        self.elementos = 0
+    
+    def _posiciones(self, elemento):
+        huella = hashlib.blake2b(elemento.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(huella[:8], 'little')
+        h2 = int.from_bytes(huella[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.funciones))
+    
+    def agregar(self, elemento):
+        for posicion in self._posiciones(elemento):
+            self.arreglo[posicion >> 3] |= 1 << (posicion & 7)
+        self.elementos += 1
+    
+    def __contains__(self, elemento):
+        return all(self.arreglo[posicion >> 3] & (1 << (posicion & 7)) for posicion in self._posiciones(elemento))
+    
+    def __len__(self):
+        return self.elementos
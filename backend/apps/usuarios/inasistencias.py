@@ -0,0 +1,83 @@
+"""
+Penalización de inasistencias (RNF-02).
+
+Suma las inasistencias de uno o varios pacientes con un único UPDATE sobre
+F('contador_inasistencias'), y en la misma sentencia bloquea a quienes
+alcanzan MAX_INASISTENCIAS. Dos profesionales que marcan al mismo paciente a
+la vez no pierden incrementos, porque el contador nunca se lee en Python
+antes de escribirlo.
+
+Los pacientes bloqueados en esa sentencia se reconocen porque su
+fecha_bloqueo es exactamente el instante del UPDATE (mientras dure la
+transacción, nadie más puede modificar esas filas). Su HistorialBloqueo se
+registra con un bulk_create, y sus tokens se invalidan después del commit:
+el UPDATE no dispara las señales de Usuario.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, F, IntegerField, Q, TextField, Value, When
+from django.db.models.functions import Cast, Concat
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+from .models import Usuario, HistorialBloqueo
+from .revocacion import invalidar_tokens_usuario
+
+
+def _invalidar_tokens(usuario_ids):
+    for usuario_id in usuario_ids:
+        invalidar_tokens_usuario(usuario_id)
+
+
+def penalizar_inasistencias(inasistencias):
+    """
+    Suma las inasistencias {paciente_id: cantidad} y bloquea a quienes llegan
+    al máximo. Retorna {paciente_id: (contador_inasistencias, bloqueado)}.
+    """
+    inasistencias = {paciente_id: n for paciente_id, n in inasistencias.items() if n > 0}
+    if not inasistencias:
+        return {}
+    
+    ahora = timezone.now()
+    incremento = Case(
+        *[When(id=paciente_id, then=Value(n)) for paciente_id, n in inasistencias.items()],
+        output_field=IntegerField()
+    )
+    nuevo_contador = F('contador_inasistencias') + incremento
+    se_bloquea = Q(GreaterThanOrEqual(nuevo_contador, settings.MAX_INASISTENCIAS), bloqueado=False)
+    
+    with transaction.atomic(savepoint=False):
+        pacientes = Usuario.objects.filter(id__in=inasistencias)
+        pacientes.update(
+            contador_inasistencias=nuevo_contador,
+            bloqueado=Case(When(se_bloquea, then=Value(True)), default=F('bloqueado')),
+            fecha_bloqueo=Case(When(se_bloquea, then=Value(ahora)), default=F('fecha_bloqueo')),
+            motivo_bloqueo=Case(
+                When(se_bloquea, then=Concat(
+                    Value('Bloqueado automáticamente por '),
+                    Cast(nuevo_contador, CharField()),
+                    Value(' inasistencias'),
+                    output_field=TextField()
+                )),
+                default=F('motivo_bloqueo')
+            ),
+            fecha_actualizacion=ahora
+        )
+        
+        resultado = {}
+        bloqueados = []
+        for paciente_id, contador, bloqueado, fecha_bloqueo in pacientes.order_by().values_list(
+            'id', 'contador_inasistencias', 'bloqueado', 'fecha_bloqueo'
+        ):
+            resultado[paciente_id] = (contador, bloqueado)
+            if fecha_bloqueo == ahora:
+                bloqueados.append(HistorialBloqueo(
+                    usuario_id=paciente_id,
+                    motivo=f"Bloqueo automático por {contador} inasistencias",
+                    inasistencias_acumuladas=contador
+                ))
+        
+        if bloqueados:
+            HistorialBloqueo.objects.bulk_create(bloqueados)
+            ids = [bloqueo.usuario_id for bloqueo in bloqueados]
+            transaction.on_commit(lambda: _invalidar_tokens(ids))
+    return resultado
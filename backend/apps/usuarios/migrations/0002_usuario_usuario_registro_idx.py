@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:00
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("usuarios", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="usuario",
+            index=models.Index(
+                fields=["date_joined", "id"], name="usuario_registro_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usuarios", "0002_usuario_usuario_registro_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usuario",
+            name="fecha_actualizacion",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Última Actualización",
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 class UsuarioManager(BaseUserManager):
     """Manager personalizado para el modelo Usuario"""
@@ -66,6 +67,7 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True, verbose_name='Activo')
     is_staff = models.BooleanField(default=False, verbose_name='Es Staff')
     date_joined = models.DateTimeField(default=timezone.now, verbose_name='Fecha de Registro')
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name='Última Actualización')
     
     objects = UsuarioManager()
     
@@ -76,6 +78,9 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='usuario_registro_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name()} - {self.rut}"
@@ -84,22 +89,21 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         """Retorna el nombre completo del usuario"""
         return f"{self.nombre} {self.apellido}"
     
+    @cached_property
+    def profesional_id(self):
+        """Id del perfil profesional del usuario, o None si no es profesional"""
+        perfil = getattr(self, 'perfil_profesional', None)
+        return perfil.id if perfil else None
+    
     def puede_agendar(self):
         """Verifica si el usuario puede agendar citas"""
         return not self.bloqueado and self.is_active
     
-    def incrementar_inasistencias(self):
-        """Incrementa el contador de inasistencias"""
-        from django.conf import settings
-        self.contador_inasistencias += 1
-        
-        # Bloquear si alcanza el máximo
-        if self.contador_inasistencias >= settings.MAX_INASISTENCIAS:
-            self.bloqueado = True
-            self.fecha_bloqueo = timezone.now()
-            self.motivo_bloqueo = f"Bloqueado automáticamente por {self.contador_inasistencias} inasistencias"
-        
-        self.save()
+    def incrementar_inasistencias(self, cantidad=1):
+        """Incrementa el contador de inasistencias (bloquea al alcanzar el máximo)"""
+        from .inasistencias import penalizar_inasistencias
+        penalizar_inasistencias({self.id: cantidad})
+        self.refresh_from_db(fields=['contador_inasistencias', 'bloqueado', 'fecha_bloqueo', 'motivo_bloqueo'])
     
     def desbloquear_usuario(self, motivo="Desbloqueado por administrador"):
         """Desbloquea al usuario y reinicia el contador"""
@@ -0,0 +1,222 @@
+"""
+Revocación de tokens JWT.
+
+El almacén guarda cada revocación con vencimiento igual a la expiración del
+token afectado:
+- 't:<jti>': un token revocado (logout).
+- 'u:<usuario_id>': instante del último cambio de los datos que viajan en los
+  claims (rol, bloqueo, perfil profesional, contraseña). Los access token
+  emitidos antes dejan de aceptarse y el cliente obtiene uno nuevo, con claims
+  actualizados, a través del refresh.
+
+Cada proceso mantiene un filtro de Bloom con las claves vigentes y lo
+resincroniza desde el almacén cada SEGUNDOS_SINCRONIZACION_REVOCACION segundos
+(solo si cambió la versión). El caso común, un token no revocado, se resuelve
+en memoria; el almacén solo se consulta ante un posible positivo. Una
+revocación hecha en otro proceso tarda a lo sumo ese intervalo en aplicarse.
+"""
+import logging
+import threading
+import time
+import redis
+from django.conf import settings
+from .bloom import FiltroBloom
+
+logger = logging.getLogger(__name__)
+
+
+# Capacidad mínima del filtro; se dimensiona al doble de las claves vigentes
+CAPACIDAD_MINIMA_FILTRO = 1024
+
+
+class AlmacenMemoria:
+    """Almacén local del proceso (tests y desarrollo sin Redis)"""
+    
+    def __init__(self):
+        self.entradas = {}
+        self.contador = 0
+        self.lock = threading.Lock()
+    
+    def revocar(self, clave, valor, expira):
+        with self.lock:
+            self.entradas[clave] = (valor, expira)
+            self.contador += 1
+    
+    def obtener(self, claves):
+        ahora = time.time()
+        with self.lock:
+            return {
+                clave: self.entradas[clave][0] for clave in claves
+                if clave in self.entradas and self.entradas[clave][1] > ahora
+            }
+    
+    def version(self):
+        return self.contador
+    
+    def claves_vigentes(self):
+        ahora = time.time()
+        with self.lock:
+            self.entradas = {clave: dato for clave, dato in self.entradas.items() if dato[1] > ahora}
+            return list(self.entradas)
+
+
+class AlmacenRedis:
+    """
+    Almacén compartido en Redis: un valor con vencimiento por clave, un índice
+    ordenado por vencimiento para reconstruir los filtros y un contador de versión.
+    """
+    
+    def __init__(self, url, prefijo='sgc:jwt'):
+        self.redis = redis.Redis.from_url(url)
+        self.prefijo = prefijo
+        self.indice = f'{prefijo}:indice'
+        self.clave_version = f'{prefijo}:version'
+    
+    def _clave(self, clave):
+        return f'{self.prefijo}:{clave}'
+    
+    def revocar(self, clave, valor, expira):
+        pipe = self.redis.pipeline()
+        pipe.set(self._clave(clave), valor, exat=int(expira) + 1)
+        pipe.zadd(self.indice, {clave: expira})
+        pipe.incr(self.clave_version)
+        pipe.execute()
+    
+    def obtener(self, claves):
+        valores = self.redis.mget([self._clave(clave) for clave in claves])
+        return {clave: float(valor) for clave, valor in zip(claves, valores) if valor is not None}
+    
+    def version(self):
+        return int(self.redis.get(self.clave_version) or 0)
+    
+    def claves_vigentes(self):
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(self.indice, '-inf', time.time())
+        pipe.zrange(self.indice, 0, -1)
+        return [clave.decode('utf-8') for clave in pipe.execute()[1]]
+
+
+def crear_almacen():
+    """Almacén según la configuración: Redis si hay REVOCACION_URL, si no en memoria"""
+    if settings.REVOCACION_URL:
+        return AlmacenRedis(settings.REVOCACION_URL)
+    return AlmacenMemoria()
+
+
+class RegistroRevocacion:
+    """Filtro de Bloom local delante del almacén de revocaciones"""
+    
+    def __init__(self, almacen, intervalo=None):
+        self.almacen = almacen
+        self.intervalo = settings.SEGUNDOS_SINCRONIZACION_REVOCACION if intervalo is None else intervalo
+        self.filtro = FiltroBloom(CAPACIDAD_MINIMA_FILTRO)
+        self.version = None
+        self.proxima_sincronizacion = 0
+        self.lock = threading.Lock()
+    
+    def sincronizar(self, forzar=False):
+        """Reconstruye el filtro si el almacén cambió desde la última sincronización"""
+        ahora = time.monotonic()
+        if not forzar and ahora < self.proxima_sincronizacion:
+            return
+        self.proxima_sincronizacion = ahora + self.intervalo
+        
+        try:
+            version = self.almacen.version()
+            if version == self.version and not forzar:
+                return
+            claves = self.almacen.claves_vigentes()
+        except Exception as e:
+            # Se mantiene el filtro anterior hasta la siguiente sincronización
+            logger.warning(f"No se pudo sincronizar la lista de revocación: {str(e)}")
+            return
+        
+        filtro = FiltroBloom(
+            max(len(claves) * 2, CAPACIDAD_MINIMA_FILTRO),
+            settings.TASA_FALSOS_POSITIVOS_REVOCACION
+        )
+        for clave in claves:
+            filtro.agregar(clave)
+        with self.lock:
+            self.filtro = filtro
+            self.version = version
+    
+    def revocar(self, clave, valor, expira):
+        self.almacen.revocar(clave, valor, expira)
+        # Efecto inmediato en este proceso, sin esperar la siguiente sincronización
+        with self.lock:
+            self.filtro.agregar(clave)
+        # Por si una sincronización en curso reemplaza el filtro sin esta clave
+        self.proxima_sincronizacion = 0
+    
+    def obtener(self, claves):
+        """Valores revocados de 'claves'; solo consulta el almacén ante posibles positivos"""
+        self.sincronizar()
+        candidatas = [clave for clave in claves if clave in self.filtro]
+        if not candidatas:
+            return {}
+        return self.almacen.obtener(candidatas)
+
+
+_registro = None
+_lock_registro = threading.Lock()
+
+
+def registro():
+    """Registro de revocación del proceso, creado al primer uso"""
+    global _registro
+    if _registro is None:
+        with _lock_registro:
+            if _registro is None:
+                _registro = RegistroRevocacion(crear_almacen())
+    return _registro
+
+
+def _clave_token(jti):
+    return f't:{jti}'
+
+
+def _clave_usuario(usuario_id):
+    return f'u:{usuario_id}'
+
+
+def revocar_token(jti, exp):
+    """Revoca un token hasta su expiración ('exp' en segundos epoch)"""
+    if exp > time.time():
+        registro().revocar(_clave_token(jti), 1, exp)
+
+
+def invalidar_tokens_usuario(usuario_id):
+    """Rechaza los access token del usuario emitidos hasta este segundo inclusive"""
+    ahora = int(time.time())
+    vigencia = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+    registro().revocar(_clave_usuario(usuario_id), ahora, ahora + vigencia)
+
+
+def token_revocado(payload, verificar_claims=True):
+    """
+    Indica si el token (payload validado) fue revocado o, con 'verificar_claims',
+    si se emitió antes del último cambio de los datos del usuario. Los refresh
+    token no verifican los claims: el refresh vuelve a leer el usuario.
+    """
+    clave_token = _clave_token(payload.get('jti'))
+    claves = [clave_token]
+    usuario_id = payload.get(settings.SIMPLE_JWT['USER_ID_CLAIM'])
+    if verificar_claims and usuario_id is not None:
+        claves.append(_clave_usuario(usuario_id))
+    
+    try:
+        encontrados = registro().obtener(claves)
+    except Exception as e:
+        # Un posible positivo que no se puede verificar se trata como revocado
+        logger.error(f"No se pudo consultar la lista de revocación: {str(e)}")
+        return True
+    
+    if clave_token in encontrados:
+        return True
+    
+    # Si el token se emitió antes del último cambio del usuario, sus claims ya no
+    # valen. 'iat' tiene resolución de segundos: un token del mismo segundo del
+    # cambio pudo emitirse antes, por lo que también se rechaza
+    cambio = encontrados.get(_clave_usuario(usuario_id))
+    return cambio is not None and payload.get('iat', 0) <= cambio
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from django.contrib.auth import authenticate
+from .autenticacion import emitir_access_token
 from .models import Usuario, HistorialBloqueo
 
 
@@ -157,4 +159,11 @@ class HistorialBloqueoSerializer(serializers.ModelSerializer):
 class DesbloquearUsuarioSerializer(serializers.Serializer):
     """Serializer para desbloquear un usuario"""
     
-    motivo = serializers.CharField(required=False, default="Desbloqueado por administrador")
\ No newline at end of file
+    motivo = serializers.CharField(required=False, default="Desbloqueado por administrador")
+
+
+class RefreshUsuarioSerializer(TokenRefreshSerializer):
+    """TokenRefreshSerializer que relee el usuario al emitir el access token"""
+    
+    def validate(self, attrs):
+        return {'access': str(emitir_access_token(self.token_class(attrs['refresh'])))}
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .autenticacion import CAMPOS_CLAIMS
+from .models import Usuario
+from .revocacion import invalidar_tokens_usuario
+
+
+# Campos que, al cambiar, dejan desactualizados los tokens emitidos
+CAMPOS_TOKEN = (*CAMPOS_CLAIMS, 'is_active', 'password')
+
+
+def _datos_token(usuario):
+    """Valores actuales de los campos del token, sin cargar campos diferidos"""
+    return tuple(usuario.__dict__.get(campo) for campo in CAMPOS_TOKEN)
+
+
+@receiver(post_init, sender=Usuario)
+def recordar_datos_token(sender, instance, **kwargs):
+    """Guarda los datos originales para detectar cambios que afectan a los claims"""
+    instance._datos_token = _datos_token(instance)
+
+
+@receiver(post_save, sender=Usuario)
+def invalidar_tokens_por_cambio(sender, instance, created, **kwargs):
+    """Los access token emitidos antes del cambio se rechazan y el cliente los renueva"""
+    datos = _datos_token(instance)
+    if not created and datos != getattr(instance, '_datos_token', datos):
+        transaction.on_commit(lambda: invalidar_tokens_usuario(instance.id))
+    instance._datos_token = datos
+
+
+@receiver(post_save, sender='profesionales.Profesional')
+def invalidar_tokens_por_perfil_creado(sender, instance, created, **kwargs):
+    """El claim 'profesional_id' cambia al crear el perfil profesional"""
+    if created:
+        transaction.on_commit(lambda: invalidar_tokens_usuario(instance.usuario_id))
+
+
+@receiver(post_delete, sender='profesionales.Profesional')
+def invalidar_tokens_por_perfil_eliminado(sender, instance, **kwargs):
+    """El claim 'profesional_id' cambia al eliminar el perfil profesional"""
+    transaction.on_commit(lambda: invalidar_tokens_usuario(instance.usuario_id))
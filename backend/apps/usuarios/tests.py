@@ -1,3 +1,151 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .autenticacion import JWTClaimsAuthentication, TokenUsuario, usuario_desde_claims
+from .inasistencias import penalizar_inasistencias
+from .models import Usuario, HistorialBloqueo
+from .revocacion import invalidar_tokens_usuario, token_revocado
 
-# Create your tests here.
+
+def crear_paciente(indice=0, **campos):
+    return Usuario.objects.create_user(
+        rut=f'{30000000 + indice}-{indice % 10}', email=f'paciente{indice}@correo.cl',
+        nombre='Paciente', apellido=str(indice), **campos
+    )
+
+
+@override_settings(MAX_INASISTENCIAS=3)
+class PenalizacionInasistenciasTest(TestCase):
+    """El contador se suma en SQL y el bloqueo se evalúa en la misma sentencia"""
+    
+    def test_bloquea_al_alcanzar_el_maximo(self):
+        paciente = crear_paciente(contador_inasistencias=2)
+        otro = crear_paciente(1)
+        
+        resultado = penalizar_inasistencias({paciente.id: 1, otro.id: 1})
+        
+        self.assertEqual(resultado, {paciente.id: (3, True), otro.id: (1, False)})
+        paciente.refresh_from_db()
+        self.assertTrue(paciente.bloqueado)
+        self.assertEqual(paciente.motivo_bloqueo, 'Bloqueado automáticamente por 3 inasistencias')
+        self.assertIsNotNone(paciente.fecha_bloqueo)
+        self.assertEqual(
+            list(HistorialBloqueo.objects.values_list('usuario_id', 'inasistencias_acumuladas')),
+            [(paciente.id, 3)]
+        )
+    
+    def test_paciente_ya_bloqueado_no_repite_historial(self):
+        paciente = crear_paciente(contador_inasistencias=2)
+        penalizar_inasistencias({paciente.id: 1})
+        fecha_bloqueo = Usuario.objects.get(id=paciente.id).fecha_bloqueo
+        
+        self.assertEqual(penalizar_inasistencias({paciente.id: 2}), {paciente.id: (5, True)})
+        
+        self.assertEqual(HistorialBloqueo.objects.count(), 1)
+        self.assertEqual(Usuario.objects.get(id=paciente.id).fecha_bloqueo, fecha_bloqueo)
+    
+    def test_varias_inasistencias_de_un_paciente(self):
+        paciente = crear_paciente()
+        
+        with self.assertNumQueries(3):
+            self.assertEqual(penalizar_inasistencias({paciente.id: 3}), {paciente.id: (3, True)})
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requiere bloqueos de fila de PostgreSQL')
+@override_settings(MAX_INASISTENCIAS=100)
+class PenalizacionConcurrenteTest(TransactionTestCase):
+    """Penalizaciones simultáneas del mismo paciente no pierden incrementos"""
+    
+    HILOS = 10
+    
+    def setUp(self):
+        self.paciente = crear_paciente()
+    
+    def penalizar(self, _):
+        try:
+            penalizar_inasistencias({self.paciente.id: 1})
+        finally:
+            connections.close_all()
+    
+    def test_no_se_pierden_incrementos(self):
+        with ThreadPoolExecutor(max_workers=self.HILOS) as pool:
+            list(pool.map(self.penalizar, range(self.HILOS * 2)))
+        
+        self.paciente.refresh_from_db()
+        self.assertEqual(self.paciente.contador_inasistencias, self.HILOS * 2)
+
+
+class AutenticacionClaimsTest(TestCase):
+    """El usuario del token conserva el tipo de su id y pierde los claims al cambiar"""
+    
+    def test_id_emitido_como_texto(self):
+        paciente = crear_paciente()
+        token = TokenUsuario.for_user(paciente).access_token
+        token[api_settings.USER_ID_CLAIM] = str(paciente.id)
+        
+        usuario = usuario_desde_claims(token)
+        
+        self.assertEqual(usuario.id, paciente.id)
+        self.assertEqual(usuario, paciente)
+    
+    def test_token_del_mismo_segundo_que_el_cambio(self):
+        paciente = crear_paciente()
+        token = TokenUsuario.for_user(paciente).access_token
+        
+        with mock.patch('apps.usuarios.revocacion.time.time', return_value=token['iat'] + 0.5):
+            invalidar_tokens_usuario(paciente.id)
+        
+        self.assertTrue(token_revocado(token.payload))
+    
+    def test_token_sin_claims_carga_el_perfil(self):
+        paciente = crear_paciente()
+        token = AccessToken.for_user(paciente)
+        
+        with self.assertNumQueries(1):
+            usuario = JWTClaimsAuthentication().get_user(token)
+            self.assertIsNone(usuario.profesional_id)
+
+
+class RefreshTokenTest(TestCase):
+    """Todo refresh relee el usuario y respeta la revocación del logout"""
+    
+    URLS_REFRESH = ('/api/v1/auth/refresh/', '/api/v1/token/refresh/')
+    
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            rut='99999999-9', email='admin@clinica.cl', password='admin123',
+            nombre='Admin', apellido='SGC'
+        )
+        self.refresh = TokenUsuario.for_user(self.admin)
+    
+    def test_refresh_token_sin_claims_de_autorizacion(self):
+        self.assertNotIn('is_staff', self.refresh)
+        self.assertTrue(self.refresh.access_token['is_staff'])
+    
+    def test_admin_degradado(self):
+        # Sin señales: como si la marca de cambio del usuario ya hubiera vencido
+        Usuario.objects.filter(id=self.admin.id).update(is_staff=False, is_superuser=False)
+        
+        for url in self.URLS_REFRESH:
+            with self.subTest(url=url):
+                response = APIClient().post(url, {'refresh': str(self.refresh)}, format='json')
+                self.assertEqual(response.status_code, 200)
+                
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+                self.assertEqual(client.get('/api/v1/citas/estadisticas/').status_code, 403)
+    
+    def test_refresh_despues_del_logout(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        response = client.post('/api/v1/auth/logout/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        
+        for url in self.URLS_REFRESH:
+            with self.subTest(url=url):
+                response = APIClient().post(url, {'refresh': str(self.refresh)}, format='json')
+                self.assertEqual(response.status_code, 401)
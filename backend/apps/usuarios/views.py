@@ -1,22 +1,34 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
 from django.contrib.auth import logout
 from django.utils import timezone
+from config.condicional import calcular_etag, respuesta_condicional
+from config.paginacion import PaginacionKeyset
+from .autenticacion import TokenUsuario, emitir_access_token, usuario_completo
 from .models import Usuario, HistorialBloqueo
+from .revocacion import revocar_token
 from .serializers import (
     UsuarioSerializer, UsuarioCreateSerializer, UsuarioUpdateSerializer,
     ChangePasswordSerializer, LoginSerializer, HistorialBloqueoSerializer,
-    DesbloquearUsuarioSerializer
+    DesbloquearUsuarioSerializer, RefreshUsuarioSerializer
 )
 
 
+class PaginacionUsuarios(PaginacionKeyset):
+    """Cursor sobre (date_joined, id), del registro más reciente al más antiguo"""
+    ordering = ('-date_joined', '-id')
+
+
 class UsuarioViewSet(viewsets.ModelViewSet):
     """ViewSet para gestión de usuarios"""
     
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
+    pagination_class = PaginacionUsuarios
     
     def get_serializer_class(self):
         """Retorna el serializer según la acción"""
@@ -35,14 +47,19 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
         """Obtiene el perfil del usuario actual"""
-        serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        user = usuario_completo(request.user)
+        return respuesta_condicional(
+            request,
+            lambda: self.get_serializer(user).data,
+            etag=calcular_etag('me', user.id, user.fecha_actualizacion),
+            ultima_modificacion=user.fecha_actualizacion
+        )
     
     @action(detail=False, methods=['put'], permission_classes=[permissions.IsAuthenticated])
     def update_profile(self, request):
         """Actualiza el perfil del usuario actual"""
         serializer = UsuarioUpdateSerializer(
-            request.user, 
+            usuario_completo(request.user), 
             data=request.data, 
             partial=True
         )
@@ -56,7 +73,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         serializer = ChangePasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        user = request.user
+        user = usuario_completo(request.user)
         
         if not user.check_password(serializer.validated_data['old_password']):
             return Response(
@@ -133,7 +150,7 @@ class AuthViewSet(viewsets.ViewSet):
         
         user = serializer.validated_data['user']
         
-        refresh = RefreshToken.for_user(user)
+        refresh = TokenUsuario.for_user(user)
         
         return Response({
             'refresh': str(refresh),
@@ -148,7 +165,7 @@ class AuthViewSet(viewsets.ViewSet):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         
-        refresh = RefreshToken.for_user(user)
+        refresh = TokenUsuario.for_user(user)
         
         return Response({
             'refresh': str(refresh),
@@ -163,7 +180,11 @@ class AuthViewSet(viewsets.ViewSet):
             refresh_token = request.data.get('refresh')
             if refresh_token:
                 token = RefreshToken(refresh_token)
-                token.blacklist()
+                revocar_token(token['jti'], token['exp'])
+            
+            # El access token de esta petición también deja de ser válido
+            if request.auth is not None:
+                revocar_token(request.auth['jti'], request.auth['exp'])
             
             logout(request)
             return Response(
@@ -179,23 +200,27 @@ class AuthViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['post'])
     def refresh(self, request):
         """Refrescar token de acceso"""
-        try:
-            refresh_token = request.data.get('refresh')
-            if not refresh_token:
-                return Response(
-                    {'detail': 'Refresh token requerido'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            refresh = RefreshToken(refresh_token)
-            return Response({
-                'access': str(refresh.access_token)
-            }, status=status.HTTP_200_OK)
-        except Exception:
+        refresh_token = request.data.get('refresh')
+        if not refresh_token:
             return Response(
-                {'detail': 'Token inválido o expirado'},
+                {'detail': 'Refresh token requerido'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        # Un token inválido, expirado o revocado (logout) responde 401, como api/v1/token/refresh/
+        try:
+            refresh = RefreshToken(refresh_token)
+        except TokenError:
+            raise InvalidToken('Token inválido o expirado')
+        return Response({
+            'access': str(emitir_access_token(refresh))
+        }, status=status.HTTP_200_OK)
+
+
+class RefreshUsuarioView(TokenRefreshView):
+    """api/v1/token/refresh/: como AuthViewSet.refresh, relee el usuario"""
+    
+    serializer_class = RefreshUsuarioSerializer
 
 
 class HistorialBloqueoViewSet(viewsets.ReadOnlyModelViewSet):
@@ -0,0 +1,16 @@
+"""
+Benchmarks de los caminos críticos de agenda y reportes.
+
+No forman parte de la suite normal: se omiten salvo con BENCHMARK_EJECUTAR=1
+y se ejecutan contra PostgreSQL.
+
+Cada medición se compara con su línea base en benchmarks/lineas_base.json y
+falla si la mediana la supera en más de BENCHMARK_TOLERANCIA (por defecto
+30%). Las líneas base dependen de la máquina y no se versionan; antes de la
+primera comparación hay que generarlas en la misma máquina:
+
+    BENCHMARK_EJECUTAR=1 BENCHMARK_ACTUALIZAR=1 python manage.py test benchmarks
+    BENCHMARK_EJECUTAR=1 python manage.py test benchmarks
+
+Un benchmark sin línea base falla.
+"""
@@ -0,0 +1,112 @@
+"""
+Medición y comparación con las líneas base en JSON.
+"""
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+from unittest import skipUnless
+from django.db import connection
+
+
+ARCHIVO_LINEAS_BASE = Path(__file__).with_name('lineas_base.json')
+
+# Aumento relativo de la mediana tolerado respecto de la línea base
+TOLERANCIA = float(os.environ.get('BENCHMARK_TOLERANCIA', '0.30'))
+
+# Diferencias menores a esto (en ms) se consideran ruido de medición
+MARGEN_ABSOLUTO_MS = 1.0
+
+ACTUALIZAR = os.environ.get('BENCHMARK_ACTUALIZAR') == '1'
+
+# Los benchmarks solo se ejecutan si se piden explícitamente
+EJECUTAR = os.environ.get('BENCHMARK_EJECUTAR') == '1'
+
+_lock_archivo = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def benchmark(clase):
+    """Omite la clase salvo con BENCHMARK_EJECUTAR=1 y sobre PostgreSQL"""
+    clase = skipUnless(connection.vendor == 'postgresql', 'Los benchmarks se ejecutan sobre PostgreSQL')(clase)
+    return skipUnless(EJECUTAR, 'Benchmarks desactivados (BENCHMARK_EJECUTAR=1 para ejecutarlos)')(clase)
+
+
+def medir(funcion, repeticiones=5, calentamiento=1, preparar=None):
+    """
+    Ejecuta 'funcion' y retorna sus duraciones en ms. 'preparar' se ejecuta
+    antes de cada repetición, fuera del tiempo medido.
+    """
+    duraciones = []
+    for i in range(calentamiento + repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        if i >= calentamiento:
+            duraciones.append((time.perf_counter() - inicio) * 1000)
+    return duraciones
+
+
+def resumen(duraciones, **extra):
+    """Estadísticas de una medición, tal como se guardan en la línea base"""
+    return {
+        'mediana_ms': round(statistics.median(duraciones), 3),
+        'minimo_ms': round(min(duraciones), 3),
+        'maximo_ms': round(max(duraciones), 3),
+        'repeticiones': len(duraciones),
+        **extra,
+    }
+
+
+def leer_lineas_base():
+    if not ARCHIVO_LINEAS_BASE.exists():
+        return {}
+    return json.loads(ARCHIVO_LINEAS_BASE.read_text(encoding='utf-8'))
+
+
+def guardar_linea_base(nombre, datos):
+    with _lock_archivo:
+        lineas = leer_lineas_base()
+        lineas[nombre] = datos
+        ARCHIVO_LINEAS_BASE.write_text(
+            json.dumps(lineas, indent=2, sort_keys=True, ensure_ascii=False) + '\n', encoding='utf-8'
+        )
+
+
+class BenchmarkMixin:
+    """Mixin para TestCase: mide, compara con la línea base y falla ante regresiones"""
+    
+    def assertSinRegresion(self, nombre, duraciones, **extra):
+        """
+        Compara la mediana con la línea base 'nombre'. En modo actualización
+        la registra; sin línea base falla. 'extra' (tamaños, conteos) se
+        guarda junto a la medición.
+        """
+        actual = resumen(duraciones, **extra)
+        base = leer_lineas_base().get(nombre)
+        logger.info(
+            "%s: mediana %.1f ms%s", nombre, actual['mediana_ms'],
+            f" (línea base {base['mediana_ms']:.1f} ms)" if base else ' (sin línea base)'
+        )
+        
+        if ACTUALIZAR:
+            guardar_linea_base(nombre, actual)
+            return actual
+        if base is None:
+            self.fail(
+                f"{nombre}: sin línea base en {ARCHIVO_LINEAS_BASE.name}; "
+                "regenerarlas en esta máquina con BENCHMARK_ACTUALIZAR=1"
+            )
+        
+        limite = max(base['mediana_ms'] * (1 + TOLERANCIA), base['mediana_ms'] + MARGEN_ABSOLUTO_MS)
+        self.assertLessEqual(
+            actual['mediana_ms'], limite,
+            f"{nombre}: regresión de rendimiento, mediana {actual['mediana_ms']:.1f} ms "
+            f"supera {limite:.1f} ms (línea base {base['mediana_ms']:.1f} ms + {TOLERANCIA:.0%})"
+        )
+        return actual
@@ -0,0 +1,83 @@
+"""
+Datos compartidos por los benchmarks.
+
+Profesionales, pacientes y citas históricas se crean con el generador de datos
+sintéticos (apps.citas.datos_sinteticos.GeneradorDatos) con una grilla y una
+duración fijas, de modo que cada escenario es reproducible.
+"""
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from apps.profesionales.models import BloqueoHorario
+from apps.profesionales.horarios import candidatos_dia
+from apps.citas.datos_sinteticos import GeneradorDatos
+from apps.citas.models import Cita
+
+
+# Grilla de lunes a sábado, mañana y tarde
+BLOQUES_DIA = ((time(8), time(13)), (time(14), time(19)))
+GRILLA = {dia: BLOQUES_DIA for dia in range(6)}
+
+DURACION_CITA = 15
+
+
+def generador(profesionales=0, pacientes=0, citas=0, **opciones):
+    """GeneradorDatos con la grilla y la duración de los benchmarks"""
+    return GeneradorDatos(
+        profesionales, pacientes, citas, grilla=GRILLA, duracion_cita=DURACION_CITA, **opciones
+    )
+
+
+def crear_profesionales(cantidad):
+    """Profesionales con la grilla GRILLA"""
+    datos = generador(profesionales=cantidad)
+    profesionales = datos.crear_profesionales()
+    datos.crear_disponibilidades(profesionales)
+    return profesionales
+
+
+def crear_pacientes(cantidad):
+    """Ids de 'cantidad' pacientes"""
+    return generador(pacientes=cantidad).crear_pacientes()
+
+
+def crear_historicas(cantidad, profesionales, pacientes, dias=365):
+    """
+    Reparte 'cantidad' citas pasadas (con su historial) en la grilla de los
+    profesionales durante los 'dias' anteriores a hoy.
+    """
+    datos = generador(citas=cantidad, dias_pasados=dias, dias_futuros=0)
+    return datos.crear_citas(profesionales, {p.id: GRILLA for p in profesionales}, pacientes)
+
+
+def horarios_grilla(profesional, fecha_desde, dias):
+    """Inicios de horario de la grilla del profesional en los días indicados"""
+    duracion = timedelta(minutes=profesional.duracion_cita_minutos)
+    horarios = []
+    for i in range(dias):
+        fecha = fecha_desde + timedelta(days=i)
+        if fecha.weekday() in GRILLA:
+            horarios.extend(candidatos_dia(fecha, GRILLA[fecha.weekday()], duracion))
+    return horarios
+
+
+def ocupar_agenda(profesional, pacientes, fecha_desde, dias, cada=2, estado='AGENDADA'):
+    """Agenda una cita cada 'cada' horarios de la grilla, más un bloqueo por semana"""
+    horarios = horarios_grilla(profesional, fecha_desde, dias)
+    Cita.objects.bulk_create([
+        Cita(
+            paciente_id=pacientes[i % len(pacientes)], profesional=profesional,
+            fecha_hora=inicio, duracion_minutos=profesional.duracion_cita_minutos,
+            motivo_consulta='Control', estado=estado
+        )
+        for i, inicio in enumerate(horarios[::cada])
+    ])
+    tz = timezone.get_current_timezone()
+    BloqueoHorario.objects.bulk_create([
+        BloqueoHorario(
+            profesional=profesional,
+            fecha_inicio=timezone.make_aware(datetime.combine(fecha_desde + timedelta(days=i), time(16)), tz),
+            fecha_fin=timezone.make_aware(datetime.combine(fecha_desde + timedelta(days=i), time(18)), tz),
+            motivo='ADMINISTRATIVO'
+        )
+        for i in range(0, dias, 7)
+    ])
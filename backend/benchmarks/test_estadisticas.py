@@ -0,0 +1,52 @@
+import os
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.usuarios.models import Usuario
+from apps.reportes.resumen import reconstruir_resumenes
+from .base import BenchmarkMixin, benchmark, medir
+from .datos import crear_historicas, crear_pacientes, crear_profesionales
+
+
+@benchmark
+class EstadisticasBenchmark(BenchmarkMixin, TestCase):
+    """Endpoint de estadísticas sobre BENCHMARK_CITAS citas (por defecto, un millón)"""
+    
+    CITAS = int(os.environ.get('BENCHMARK_CITAS', 1000000))
+    PROFESIONALES = 100
+    
+    @classmethod
+    def setUpTestData(cls):
+        # Todas las citas en el último año, terminando ayer
+        crear_historicas(cls.CITAS, crear_profesionales(cls.PROFESIONALES), crear_pacientes(5000))
+        reconstruir_resumenes()
+        cls.admin = Usuario.objects.create_superuser(
+            '3-3', 'admin@correo.cl', 'admin123', nombre='Ad', apellido='Min'
+        )
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    def medir_estadisticas(self, nombre, parametros):
+        url = f'/api/v1/citas/estadisticas/?{parametros}'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['total_citas'], self.CITAS)
+        
+        duraciones = medir(lambda: self.client.get(url), repeticiones=5)
+        self.assertSinRegresion(nombre, duraciones, citas=self.CITAS)
+    
+    def test_desde_resumenes(self):
+        self.medir_estadisticas('estadisticas.resumenes', '')
+    
+    def test_desde_resumenes_por_profesional(self):
+        self.medir_estadisticas('estadisticas.resumenes_por_profesional', 'group_by=profesional')
+    
+    def test_sobre_citas(self):
+        # Con fecha y hora se cuenta directamente sobre la tabla de citas
+        self.medir_estadisticas('estadisticas.citas', 'fecha_desde=2000-01-01T00:00:00Z')
+    
+    def test_sobre_citas_por_especialidad(self):
+        self.medir_estadisticas(
+            'estadisticas.citas_por_especialidad', 'fecha_desde=2000-01-01T00:00:00Z&group_by=especialidad'
+        )
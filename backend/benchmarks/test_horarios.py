@@ -0,0 +1,39 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from apps.profesionales.inventario import obtener_horarios_libres
+from .base import BenchmarkMixin, benchmark, medir
+from .datos import crear_pacientes, crear_profesionales, ocupar_agenda
+
+
+@benchmark
+class HorariosBenchmark(BenchmarkMixin, TestCase):
+    """Cálculo de horarios libres de un profesional con la mitad de su agenda ocupada"""
+    
+    DIAS = 31
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesional = crear_profesionales(1)[0]
+        # Desde el próximo lunes, para que el día medido tenga agenda
+        hoy = timezone.localdate()
+        cls.desde = hoy + timedelta(days=7 - hoy.weekday())
+        ocupar_agenda(cls.profesional, crear_pacientes(100), cls.desde, cls.DIAS)
+    
+    def medir_rango(self, nombre, dias):
+        hasta = self.desde + timedelta(days=dias - 1)
+        horarios = obtener_horarios_libres(self.profesional, self.desde, hasta)
+        self.assertTrue(horarios)
+        duraciones = medir(
+            lambda: obtener_horarios_libres(self.profesional, self.desde, hasta), repeticiones=20
+        )
+        self.assertSinRegresion(nombre, duraciones, dias=dias)
+    
+    def test_un_dia(self):
+        self.medir_rango('horarios.un_dia', 1)
+    
+    def test_una_semana(self):
+        self.medir_rango('horarios.una_semana', 7)
+    
+    def test_un_mes(self):
+        self.medir_rango('horarios.un_mes', self.DIAS)
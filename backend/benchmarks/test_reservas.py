@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.citas.models import Cita
+from apps.usuarios.models import Usuario
+from .base import BenchmarkMixin, benchmark, medir
+from .datos import crear_pacientes, crear_profesionales, horarios_grilla
+
+
+@benchmark
+class ReservaConcurrenciaBenchmark(BenchmarkMixin, TransactionTestCase):
+    """
+    Reservas simultáneas de pocos horarios: cada horario lo disputan
+    INTENTOS / HORARIOS pacientes y solo uno puede ganarlo.
+    """
+    
+    INTENTOS = 200
+    HORARIOS = 10
+    HILOS = 20
+    
+    def setUp(self):
+        self.profesional = crear_profesionales(1)[0]
+        self.pacientes = list(Usuario.objects.filter(id__in=crear_pacientes(self.INTENTOS)).order_by('id'))
+        hoy = timezone.localdate()
+        horarios = horarios_grilla(self.profesional, hoy + timedelta(days=7 - hoy.weekday()), 1)
+        self.horarios = [inicio.isoformat() for inicio in horarios[:self.HORARIOS]]
+    
+    def reservar(self, indice):
+        try:
+            client = APIClient()
+            client.force_authenticate(self.pacientes[indice])
+            return client.post('/api/v1/citas/', {
+                'profesional': self.profesional.id,
+                'fecha_hora': self.horarios[indice % self.HORARIOS],
+                'duracion_minutos': self.profesional.duracion_cita_minutos,
+                'motivo_consulta': 'Control'
+            }, format='json').status_code
+        finally:
+            connections.close_all()
+    
+    def test_reservas_en_disputa(self):
+        codigos = []
+        
+        def disputar():
+            with ThreadPoolExecutor(max_workers=self.HILOS) as pool:
+                codigos[:] = pool.map(self.reservar, range(self.INTENTOS))
+        
+        duraciones = medir(disputar, repeticiones=3, preparar=lambda: Cita.objects.all().delete())
+        
+        self.assertEqual(codigos.count(201), self.HORARIOS)
+        self.assertEqual(codigos.count(409), self.INTENTOS - self.HORARIOS)
+        self.assertSinRegresion(
+            'reservas.disputa', duraciones, intentos=self.INTENTOS, horarios=self.HORARIOS, hilos=self.HILOS
+        )
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.citas.models import Cita
+from apps.citas.serializers import CitaSerializer, CitaListSerializer
+from .base import BenchmarkMixin, benchmark, medir
+from .datos import crear_pacientes, crear_profesionales, ocupar_agenda
+
+
+@benchmark
+class SerializadoresCitaBenchmark(BenchmarkMixin, TestCase):
+    """
+    Serialización de CITAS citas ya cargadas (con el select_related del
+    ViewSet): solo se mide el serializer, sin consultas.
+    """
+    
+    CITAS = 1000
+    
+    @classmethod
+    def setUpTestData(cls):
+        pacientes = crear_pacientes(200)
+        hoy = timezone.localdate()
+        for profesional in crear_profesionales(5):
+            ocupar_agenda(profesional, pacientes, hoy + timedelta(days=3), 14, cada=1)
+    
+    def setUp(self):
+        self.citas = list(
+            Cita.objects.select_related('paciente', 'profesional__usuario').order_by('id')[:self.CITAS]
+        )
+        self.assertEqual(len(self.citas), self.CITAS)
+    
+    def medir_serializer(self, nombre, serializer_class):
+        with CaptureQueriesContext(connection) as contexto:
+            serializer_class(self.citas, many=True).data
+        self.assertEqual(len(contexto), 0, 'El serializer no debe ejecutar consultas')
+        
+        duraciones = medir(lambda: serializer_class(self.citas, many=True).data, repeticiones=10)
+        self.assertSinRegresion(nombre, duraciones, citas=self.CITAS)
+    
+    def test_cita_serializer(self):
+        self.medir_serializer('serializadores.cita', CitaSerializer)
+    
+    def test_cita_list_serializer(self):
+        self.medir_serializer('serializadores.cita_list', CitaListSerializer)
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from apps.citas import tasks
+from apps.citas.models import Cita, HistorialCita
+from apps.reportes.resumen import reconstruir_resumenes
+from .base import BenchmarkMixin, benchmark, medir
+from .datos import crear_historicas, crear_pacientes, crear_profesionales
+
+
+@benchmark
+class TareasCitasBenchmark(BenchmarkMixin, TestCase):
+    """
+    Tareas programadas de citas sobre una tabla con HISTORICAS citas pasadas
+    y las citas de las próximas 24 horas de PROFESIONALES profesionales (una
+    cada 15 minutos, la mitad sin confirmar). Las tareas se ejecutan en el
+    proceso, sin broker.
+    """
+    
+    HISTORICAS = 200000
+    PROFESIONALES = 50
+    
+    @classmethod
+    def setUpTestData(cls):
+        profesionales = crear_profesionales(cls.PROFESIONALES)
+        pacientes = crear_pacientes(2000)
+        crear_historicas(cls.HISTORICAS, profesionales, pacientes)
+        
+        inicio = timezone.now().replace(second=0, microsecond=0) + timedelta(hours=1)
+        proximas = []
+        for i in range(22 * 4):
+            for j, profesional in enumerate(profesionales):
+                confirmada = (i + j) % 2 == 0
+                proximas.append(Cita(
+                    paciente_id=pacientes[(i * len(profesionales) + j) % len(pacientes)],
+                    profesional=profesional,
+                    fecha_hora=inicio + timedelta(minutes=15 * i),
+                    duracion_minutos=15,
+                    motivo_consulta='Control',
+                    estado='CONFIRMADA' if confirmada else 'AGENDADA',
+                    confirmada_por_paciente=confirmada,
+                ))
+        cls.proximas = [cita.id for cita in Cita.objects.bulk_create(proximas)]
+        cls.sin_confirmar = sum(1 for cita in proximas if not cita.confirmada_por_paciente)
+        reconstruir_resumenes()
+    
+    @mock.patch.object(tasks, 'programar_recordatorio', return_value=False)
+    @mock.patch.object(tasks.enviar_lote_recordatorios, 'delay')
+    def test_enviar_recordatorios_citas(self, delay, programar):
+        resultado = tasks.enviar_recordatorios_citas()
+        self.assertEqual(resultado['total'], len(self.proximas))
+        
+        duraciones = medir(tasks.enviar_recordatorios_citas, repeticiones=5)
+        self.assertSinRegresion('tareas.enviar_recordatorios_citas', duraciones, citas=len(self.proximas))
+    
+    def test_limpiar_citas_no_confirmadas(self):
+        def restaurar():
+            HistorialCita.objects.all().delete()
+            Cita.objects.filter(id__in=self.proximas, confirmada_por_paciente=False).update(
+                estado='AGENDADA', motivo_cancelacion='', fecha_cancelacion=None
+            )
+        
+        resultados = []
+        duraciones = medir(
+            lambda: resultados.append(tasks.limpiar_citas_no_confirmadas()),
+            repeticiones=5, preparar=restaurar
+        )
+        
+        self.assertEqual(resultados[-1]['canceladas'], self.sin_confirmar)
+        self.assertSinRegresion(
+            'tareas.limpiar_citas_no_confirmadas', duraciones, canceladas=self.sin_confirmar
+        )
+    
+    def test_generar_reporte_mensual(self):
+        duraciones = medir(tasks.generar_reporte_mensual, repeticiones=10)
+        self.assertSinRegresion('tareas.generar_reporte_mensual', duraciones)
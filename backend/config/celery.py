@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from config.metricas import conectar_senales_celery
 
 # Configurar Django settings
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -14,18 +15,31 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Auto-descubrir tareas en todas las apps
 app.autodiscover_tasks()
 
+# Duración y fallos de las tareas de citas en /metrics
+conectar_senales_celery()
+
 # Configurar tareas programadas (Celery Beat)
 app.conf.beat_schedule = {
-    # Enviar recordatorios cada día a las 9:00 AM
-    'enviar-recordatorios-diarios': {
+    # Barrido de recordatorios cada hora (cada cita programa el suyo)
+    'barrer-recordatorios': {
         'task': 'apps.citas.tasks.enviar_recordatorios_citas',
-        'schedule': crontab(hour=9, minute=0),  # 9:00 AM todos los días
+        'schedule': crontab(minute=0),  # Cada hora en punto
     },
     # Limpiar citas expiradas cada día a las 00:00
     'limpiar-citas-expiradas': {
         'task': 'apps.citas.tasks.limpiar_citas_no_confirmadas',
         'schedule': crontab(hour=0, minute=0),  # 00:00 todos los días
     },
+    # Avanzar el horizonte del inventario de horarios cada día a las 00:05
+    'avanzar-horizonte-inventario': {
+        'task': 'apps.profesionales.tasks.avanzar_horizonte_inventario',
+        'schedule': crontab(hour=0, minute=5),  # 00:05 todos los días
+    },
+    # Reconciliar los resúmenes diarios de citas cada día a las 02:00
+    'reconciliar-resumenes-diarios': {
+        'task': 'apps.reportes.tasks.reconciliar_resumenes_diarios',
+        'schedule': crontab(hour=2, minute=0),  # 02:00 todos los días
+    },
 }
 
 @app.task(bind=True, ignore_result=True)
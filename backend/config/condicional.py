@@ -0,0 +1,39 @@
+"""
+GET condicional (ETag / Last-Modified) para los endpoints de lectura frecuentes.
+
+Cada vista calcula validadores baratos (una versión de caché, o MAX(fecha_actualizacion)
+y un COUNT) antes de serializar. Si el cliente envía If-None-Match o
+If-Modified-Since con la versión vigente se responde 304 sin cuerpo; en caso
+contrario se serializa y la respuesta lleva los validadores para la próxima vez.
+"""
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def calcular_etag(*partes):
+    """ETag fuerte a partir de las partes que identifican la versión del recurso"""
+    huella = hashlib.md5(':'.join(str(parte) for parte in partes).encode('utf-8')).hexdigest()
+    return f'"{huella}"'
+
+
+def respuesta_condicional(request, calcular, etag=None, ultima_modificacion=None):
+    """
+    Retorna 304 si el cliente ya tiene la versión vigente; si no, una Response
+    con los datos de 'calcular()'. 'ultima_modificacion' solo debe indicarse
+    cuando basta por sí sola para detectar cambios (no en listados filtrados
+    por fecha, donde el conjunto cambia sin que cambie el máximo).
+    """
+    timestamp = int(ultima_modificacion.timestamp()) if ultima_modificacion else None
+    respuesta = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if respuesta is None:
+        respuesta = Response(calcular())
+
+    if etag:
+        respuesta['ETag'] = etag
+    if timestamp is not None:
+        respuesta['Last-Modified'] = http_date(timestamp)
+    # El navegador puede guardar la respuesta, pero debe revalidarla en cada uso
+    respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
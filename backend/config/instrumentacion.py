@@ -0,0 +1,136 @@
+"""
+Instrumentación por endpoint: consultas a la base, tiempo en la base, tiempo
+de serialización (render de la respuesta) y tiempo total.
+
+InstrumentacionMiddleware mide cada petición y la registra en los histogramas
+de Prometheus por endpoint ('CitaViewSet.list',
+'ProfesionalViewSet.disponibilidad', ...; ver config.metricas). En
+modo DEBUG agrega las mediciones como cabeceras de la respuesta (incluida
+Server-Timing, visible en las herramientas del navegador).
+
+Los ViewSets pueden declarar 'presupuesto_consultas' por acción: el middleware
+registra una advertencia cuando una petición lo excede y los tests lo exigen
+con config.pruebas.PresupuestoConsultasMixin.
+"""
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from config import metricas
+
+logger = logging.getLogger(__name__)
+
+
+_medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class Medicion:
+    """Mediciones de una petición"""
+    
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.tiempo_serializacion = 0.0
+        self.endpoint = None
+        self.presupuesto = None
+
+
+def accion_vista(view_func, metodo):
+    """Retorna (clase del ViewSet o None, acción) de la vista resuelta"""
+    clase = getattr(view_func, 'cls', None)
+    acciones = getattr(view_func, 'actions', None) or {}
+    return clase, acciones.get(metodo.lower(), metodo.lower())
+
+
+def nombre_endpoint(view_func, metodo):
+    """Nombre estable del endpoint: 'ViewSet.accion' o el nombre de la vista"""
+    clase, accion = accion_vista(view_func, metodo)
+    if clase is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    return f'{clase.__name__}.{accion}'
+
+
+def _contar_consulta(execute, sql, params, many, context):
+    """execute_wrapper: suma la consulta y su duración a la medición en curso"""
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion = _medicion_actual.get()
+        if medicion is not None:
+            medicion.consultas += 1
+            medicion.tiempo_db += time.perf_counter() - inicio
+
+
+class InstrumentacionMiddleware:
+    """Mide consultas, tiempo en base de datos, serialización y tiempo total por petición"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        metricas.PETICIONES_EN_CURSO.inc()
+        try:
+            with ExitStack() as stack:
+                for conexion in connections.all():
+                    stack.enter_context(conexion.execute_wrapper(_contar_consulta))
+                response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+            metricas.PETICIONES_EN_CURSO.dec()
+        total = time.perf_counter() - inicio
+        
+        metricas.actualizar_conexiones_db()
+        if medicion.endpoint:
+            self.registrar(request, response, medicion, total)
+        if settings.DEBUG:
+            self.agregar_cabeceras(response, medicion, total)
+        return response
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return None
+        clase, accion = accion_vista(view_func, request.method)
+        medicion.endpoint = nombre_endpoint(view_func, request.method)
+        medicion.presupuesto = getattr(clase, 'presupuesto_consultas', {}).get(accion)
+        return None
+    
+    def process_template_response(self, request, response):
+        # Las respuestas de DRF se renderizan (serializan a JSON) después de la vista
+        medicion = _medicion_actual.get()
+        if medicion is not None:
+            inicio = time.perf_counter()
+            
+            def fin_render(respuesta):
+                medicion.tiempo_serializacion = time.perf_counter() - inicio
+            
+            response.add_post_render_callback(fin_render)
+        return response
+    
+    def registrar(self, request, response, medicion, total):
+        metricas.observar_peticion(
+            medicion.endpoint, request.method, response.status_code,
+            total, medicion.tiempo_db, medicion.tiempo_serializacion, medicion.consultas
+        )
+        
+        if medicion.presupuesto is not None and medicion.consultas > medicion.presupuesto:
+            logger.warning(
+                f"{medicion.endpoint} ejecutó {medicion.consultas} consultas "
+                f"(presupuesto: {medicion.presupuesto})"
+            )
+    
+    def agregar_cabeceras(self, response, medicion, total):
+        response['X-Consultas-DB'] = str(medicion.consultas)
+        if medicion.presupuesto is not None:
+            response['X-Presupuesto-Consultas'] = str(medicion.presupuesto)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={medicion.tiempo_db * 1000:.1f}',
+            f'serializacion;dur={medicion.tiempo_serializacion * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
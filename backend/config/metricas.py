@@ -0,0 +1,203 @@
+"""
+Métricas en formato Prometheus, servidas en /metrics.
+
+Cubren la latencia por endpoint (junto con consultas, tiempo en base y
+serialización de InstrumentacionMiddleware), las conexiones abiertas a la base,
+la duración y los fallos de las tareas apps.citas.tasks.*, la profundidad de la
+cola de Celery y el embudo de reservas (intentos, conflictos y éxitos).
+
+Con varios procesos (servidor con prefork, workers de Celery) se debe definir
+PROMETHEUS_MULTIPROC_DIR: cada proceso escribe sus valores en archivos mmap
+propios y /metrics los agrega. Cada servicio usa su propio directorio y lo
+vacía solo al iniciar, sin tocar los archivos de los demás; /metrics agrega
+además los directorios de METRICAS_DIRECTORIOS (por ejemplo, el del worker de
+Celery en un volumen compartido). Los gauges 'livesum' de un proceso que
+termina se descartan llamando a prometheus_client.multiprocess.mark_process_dead
+(los procesos del worker lo hacen al terminar; en gunicorn, desde el hook
+child_exit). Sin esa variable las métricas son las del proceso que atiende.
+
+En el camino caliente no se toman locks propios: los hijos etiquetados de cada
+métrica se resuelven una vez y se guardan en un diccionario, y cada
+observación es un incremento de prometheus_client.
+"""
+import glob
+import hmac
+import os
+import time
+import redis
+from celery.signals import task_failure, task_postrun, task_prerun, worker_process_shutdown
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+
+# Tareas cuya duración y fallos se registran
+PREFIJO_TAREAS = 'apps.citas.tasks.'
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BUCKETS_TAREAS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800)
+
+DURACION_PETICION = Histogram(
+    'sgc_http_duracion_segundos', 'Duración de las peticiones por endpoint',
+    ['endpoint', 'metodo', 'estado'], buckets=BUCKETS_SEGUNDOS
+)
+DURACION_DB = Histogram(
+    'sgc_http_db_segundos', 'Tiempo en la base de datos por petición',
+    ['endpoint'], buckets=BUCKETS_SEGUNDOS
+)
+DURACION_SERIALIZACION = Histogram(
+    'sgc_http_serializacion_segundos', 'Tiempo de render de la respuesta por petición',
+    ['endpoint'], buckets=BUCKETS_SEGUNDOS
+)
+CONSULTAS_PETICION = Histogram(
+    'sgc_http_consultas_db', 'Consultas a la base de datos por petición',
+    ['endpoint'], buckets=BUCKETS_CONSULTAS
+)
+PETICIONES_EN_CURSO = Gauge(
+    'sgc_http_peticiones_en_curso', 'Peticiones en curso', multiprocess_mode='livesum'
+)
+CONEXIONES_DB = Gauge(
+    'sgc_db_conexiones_abiertas', 'Conexiones a la base de datos abiertas por los procesos web',
+    multiprocess_mode='livesum'
+)
+DURACION_TAREA = Histogram(
+    'sgc_celery_tarea_duracion_segundos', 'Duración de las tareas de citas',
+    ['tarea', 'estado'], buckets=BUCKETS_TAREAS
+)
+TAREAS_FALLIDAS = Counter(
+    'sgc_celery_tareas_fallidas', 'Tareas de citas que terminaron con error', ['tarea']
+)
+RESERVAS_INTENTOS = Counter('sgc_reservas_intentos', 'Intentos de reserva de citas')
+RESERVAS_CONFLICTOS = Counter('sgc_reservas_conflictos', 'Reservas rechazadas por horario ocupado')
+RESERVAS_EXITOSAS = Counter('sgc_reservas_exitosas', 'Citas reservadas')
+
+_hijos = {}
+
+
+def _hijo(metrica, *etiquetas):
+    """Hijo etiquetado de la métrica, resuelto una sola vez por combinación"""
+    clave = (metrica, etiquetas)
+    hijo = _hijos.get(clave)
+    if hijo is None:
+        hijo = _hijos.setdefault(clave, metrica.labels(*etiquetas))
+    return hijo
+
+
+def observar_peticion(endpoint, metodo, estado, total, tiempo_db, tiempo_serializacion, consultas):
+    """Registra las mediciones de una petición (ver InstrumentacionMiddleware)"""
+    _hijo(DURACION_PETICION, endpoint, metodo, str(estado)).observe(total)
+    _hijo(DURACION_DB, endpoint).observe(tiempo_db)
+    _hijo(DURACION_SERIALIZACION, endpoint).observe(tiempo_serializacion)
+    _hijo(CONSULTAS_PETICION, endpoint).observe(consultas)
+
+
+def actualizar_conexiones_db():
+    """Conexiones a la base abiertas en este proceso (persisten con CONN_MAX_AGE)"""
+    CONEXIONES_DB.set(sum(1 for conexion in connections.all() if conexion.connection is not None))
+
+
+# Tareas de Celery
+
+_inicios_tareas = {}
+
+
+def _registrar_inicio(task_id=None, task=None, **kwargs):
+    if task is not None and task.name.startswith(PREFIJO_TAREAS):
+        _inicios_tareas[task_id] = time.perf_counter()
+
+
+def _registrar_fin(task_id=None, task=None, state=None, **kwargs):
+    inicio = _inicios_tareas.pop(task_id, None)
+    if inicio is not None:
+        _hijo(DURACION_TAREA, task.name, state or 'DESCONOCIDO').observe(time.perf_counter() - inicio)
+
+
+def _registrar_fallo(sender=None, **kwargs):
+    if sender is not None and sender.name.startswith(PREFIJO_TAREAS):
+        _hijo(TAREAS_FALLIDAS, sender.name).inc()
+
+
+def _marcar_proceso_terminado(pid=None, **kwargs):
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def conectar_senales_celery():
+    """Registra la duración y los fallos de las tareas de citas (se llama desde config.celery)"""
+    task_prerun.connect(_registrar_inicio, weak=False)
+    task_postrun.connect(_registrar_fin, weak=False)
+    task_failure.connect(_registrar_fallo, weak=False)
+    worker_process_shutdown.connect(_marcar_proceso_terminado, weak=False)
+
+
+class ColaCeleryCollector:
+    """Mensajes pendientes en la cola de Celery, leídos del broker Redis al exportar"""
+    
+    colas = ('celery',)
+    
+    def _familia(self):
+        return GaugeMetricFamily(
+            'sgc_celery_cola_pendientes', 'Mensajes pendientes en la cola de Celery', labels=['cola']
+        )
+    
+    def describe(self):
+        # Evita que registrar el collector consulte el broker
+        yield self._familia()
+    
+    def collect(self):
+        metrica = self._familia()
+        if settings.CELERY_BROKER_URL.startswith('redis'):
+            try:
+                cliente = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=1)
+                for cola in self.colas:
+                    metrica.add_metric([cola], cliente.llen(cola))
+            except redis.RedisError:
+                pass
+        yield metrica
+
+
+_registro_cola = CollectorRegistry(auto_describe=True)
+_registro_cola.register(ColaCeleryCollector())
+
+
+class DirectoriosMultiprocesoCollector:
+    """Agrega los archivos de métricas de varios directorios multiproceso"""
+    
+    def __init__(self, directorios):
+        self.directorios = directorios
+    
+    def collect(self):
+        archivos = [
+            archivo
+            for directorio in self.directorios
+            for archivo in glob.glob(os.path.join(directorio, '*.db'))
+        ]
+        return multiprocess.MultiProcessCollector.merge(archivos, accumulate=True)
+
+
+def exportar_metricas():
+    """Texto de exposición de Prometheus, agregando los procesos si corresponde"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registro = CollectorRegistry()
+        registro.register(DirectoriosMultiprocesoCollector(
+            [os.environ['PROMETHEUS_MULTIPROC_DIR'], *settings.METRICAS_DIRECTORIOS]
+        ))
+    else:
+        registro = REGISTRY
+    return generate_latest(registro) + generate_latest(_registro_cola)
+
+
+def vista_metricas(request):
+    """Endpoint /metrics: exige METRICAS_TOKEN como Bearer; sin token configurado se rechaza"""
+    autorizacion = request.headers.get('Authorization', '').encode('utf-8')
+    if not settings.METRICAS_TOKEN or not hmac.compare_digest(
+        autorizacion, f'Bearer {settings.METRICAS_TOKEN}'.encode('utf-8')
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(exportar_metricas(), content_type=CONTENT_TYPE_LATEST)
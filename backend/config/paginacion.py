@@ -0,0 +1,163 @@
+"""
+Paginación por keyset (cursor) para los listados grandes.
+
+A diferencia de PageNumberPagination, no ejecuta COUNT(*) ni OFFSET: cada
+página filtra las filas posteriores a la última fila vista según la tupla de
+ordenamiento (por ejemplo fecha_hora, id) y lee page_size + 1 filas por el
+índice, de modo que la página N cuesta lo mismo que la primera.
+"""
+import base64
+import json
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _invertir(campo):
+    """Invierte la dirección de un campo de ordenamiento"""
+    return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+
+class PaginacionKeyset(BasePagination):
+    """
+    Paginación por cursor sobre 'ordering', que debe ser única (terminar en
+    el id) y usar campos no nulos. El total exacto es opcional: solo se
+    calcula con ?total=true, porque requiere un COUNT(*).
+
+    Respuesta: {'next', 'previous', 'results'} y 'count' si se pidió el total.
+    """
+
+    ordering = ('-id',)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'total'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.campos = [queryset.model._meta.get_field(campo.lstrip('-')) for campo in self.ordering]
+        self.total = queryset.count() if self.pide_total(request) else None
+
+        posicion, reverso = self.decode_cursor(request)
+        orden = [_invertir(campo) for campo in self.ordering] if reverso else list(self.ordering)
+
+        queryset = queryset.order_by(*orden)
+        if posicion is not None:
+            queryset = queryset.filter(self.filtro_posterior(orden, posicion))
+
+        filas = list(queryset[:self.page_size + 1])
+        hay_mas = len(filas) > self.page_size
+        filas = filas[:self.page_size]
+        if reverso:
+            filas.reverse()
+
+        # Al retroceder, las filas "siguientes" del recorrido son las anteriores de la página
+        self.hay_anterior = hay_mas if reverso else posicion is not None
+        self.hay_siguiente = posicion is not None if reverso else hay_mas
+        self.primera = filas[0] if filas else None
+        self.ultima = filas[-1] if filas else None
+        return filas
+
+    def get_paginated_response(self, data):
+        respuesta = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.total is not None:
+            respuesta['count'] = self.total
+        respuesta['results'] = data
+        return Response(respuesta)
+
+    def get_page_size(self, request):
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(tamano, 1), self.max_page_size)
+
+    def pide_total(self, request):
+        return request.query_params.get(self.total_query_param, '').lower() in ('1', 'true')
+
+    def filtro_posterior(self, orden, posicion):
+        """
+        Filtro de las filas posteriores a 'posicion' en el orden dado:
+        (a > x) OR (a = x AND b > y) ... con la dirección de cada campo.
+        Se antepone la cota del primer campo para que el índice acote el rango.
+        """
+        filtro = Q()
+        iguales = Q()
+        for campo, valor in zip(orden, posicion):
+            nombre = campo.lstrip('-')
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            filtro |= iguales & Q(**{f'{nombre}__{operador}': valor})
+            iguales &= Q(**{nombre: valor})
+
+        primero = orden[0]
+        cota = 'lte' if primero.startswith('-') else 'gte'
+        return Q(**{f'{primero.lstrip("-")}__{cota}': posicion[0]}) & filtro
+
+    def decode_cursor(self, request):
+        """Retorna (valores de la posición o None, reverso)"""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            valores = datos['p']
+            if len(valores) != len(self.campos):
+                raise ValueError
+            posicion = [campo.to_python(valor) for campo, valor in zip(self.campos, valores)]
+            return posicion, bool(datos.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, fila, reverso):
+        valores = [campo.value_to_string(fila) for campo in self.campos]
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({'p': valores, 'r': int(reverso)}).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.hay_siguiente or self.ultima is None:
+            return None
+        return self.encode_cursor(self.ultima, reverso=False)
+
+    def get_previous_link(self):
+        if not self.hay_anterior:
+            return None
+        if self.primera is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.primera, reverso=True)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor de paginación',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Número de resultados por página',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.total_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Incluye el total exacto de resultados (COUNT)',
+                'schema': {'type': 'boolean'},
+            },
+        ]
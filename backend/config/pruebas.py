@@ -0,0 +1,53 @@
+"""
+Utilidades de tests compartidas entre las apps.
+
+PresupuestoConsultasMixin exige el 'presupuesto_consultas' que cada ViewSet
+declara por acción: la petición no puede ejecutar más consultas que las
+declaradas, con independencia de cuántas filas haya en los datos de prueba.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.usuarios.autenticacion import TokenUsuario
+
+
+ACCIONES_ESTANDAR = ('list', 'create', 'retrieve', 'update', 'partial_update', 'destroy')
+
+
+def acciones_viewset(viewset):
+    """Acciones que expone un ViewSet (estándar y @action)"""
+    acciones = [accion for accion in ACCIONES_ESTANDAR if hasattr(viewset, accion)]
+    return acciones + [accion.__name__ for accion in viewset.get_extra_actions()]
+
+
+def cliente_jwt(usuario):
+    """Cliente autenticado con un access token real (incluye el costo de autenticación)"""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {TokenUsuario.for_user(usuario).access_token}')
+    return client
+
+
+class PresupuestoConsultasMixin:
+    """Mixin para TestCase: 'viewset' es la clase cuyo presupuesto se exige"""
+    
+    viewset = None
+    
+    def test_todas_las_acciones_declaran_presupuesto(self):
+        faltantes = set(acciones_viewset(self.viewset)) - set(self.viewset.presupuesto_consultas)
+        self.assertFalse(faltantes, f'{self.viewset.__name__} sin presupuesto para: {sorted(faltantes)}')
+    
+    def assertPresupuestoConsultas(self, accion, client, metodo, url, datos=None, codigo=None):
+        """Ejecuta la petición y verifica que no exceda el presupuesto de la acción"""
+        presupuesto = self.viewset.presupuesto_consultas[accion]
+        with CaptureQueriesContext(connection) as contexto:
+            response = getattr(client, metodo)(url, datos, format='json')
+        
+        if codigo is not None:
+            self.assertEqual(response.status_code, codigo, getattr(response, 'data', None))
+        consultas = '\n'.join(consulta['sql'] for consulta in contexto.captured_queries)
+        self.assertLessEqual(
+            len(contexto), presupuesto,
+            f'{self.viewset.__name__}.{accion}: {len(contexto)} consultas '
+            f'(presupuesto {presupuesto})\n{consultas}'
+        )
+        return response
@@ -3,6 +3,7 @@
 Configuración de Django para el proyecto SGC.
 """
 import os
+import sys
 from pathlib import Path
 from pathlib import Path
 from decouple import config
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # 3rd Party Apps
     'rest_framework',
@@ -60,6 +62,8 @@ INSTALLED_APPS = [
 # ==============================================================================
 
 MIDDLEWARE = [
+    # Primero, para medir el tiempo total de la petición (consultas, serialización)
+    'config.instrumentacion.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS debe ir antes de CommonMiddleware
@@ -170,7 +174,8 @@ CORS_ALLOW_CREDENTIALS = True
 REST_FRAMEWORK = {
     # JWT Authentication es la clase por defecto (RNF-01: Autenticación basada en tokens)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Usuario construido desde los claims del token, sin consultar la base
+        'apps.usuarios.autenticacion.JWTClaimsAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -211,6 +216,28 @@ CELERY_TIMEZONE = 'America/Santiago'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos
 
+# Caché (Redis en producción). Sin CACHE_URL, o al ejecutar los tests, se usa
+# la caché en memoria del proceso.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL and 'test' not in sys.argv:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'sgc',
+        }
+    }
+    # Almacén compartido de tokens revocados (ver apps/usuarios/revocacion.py)
+    REVOCACION_URL = config('REVOCACION_URL', default=CACHE_URL)
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sgc',
+        }
+    }
+    REVOCACION_URL = ''
+
 # ==============================================================================
 # 10. CONFIGURACIÓN LOCAL DEL PROYECTO (SGC)
 # ==============================================================================
@@ -227,6 +254,62 @@ HORAS_ANTICIPACION_CANCELACION = 24
 # Duración por defecto de una cita en minutos
 DURACION_CITA_DEFAULT = 30
 
+# Máximo de días que se pueden consultar en una sola petición de horarios
+DIAS_MAXIMOS_RANGO_HORARIOS = 62
+
+# Inventario precalculado de horarios (SlotInventario). Al activarlo se debe
+# ejecutar 'python manage.py reconstruir_inventario' para poblarlo.
+INVENTARIO_SLOTS_ACTIVO = config('INVENTARIO_SLOTS_ACTIVO', default=False, cast=bool)
+
+# Días hacia adelante que cubre el inventario de horarios
+DIAS_HORIZONTE_INVENTARIO = 62
+
+# Horas antes de la cita en que se envía su recordatorio
+HORAS_ANTICIPACION_RECORDATORIO = 24
+
+# Horizonte (en horas) de las tareas de recordatorio publicadas en el broker.
+# Debe ser al menos el intervalo del barrido de recordatorios (1 hora) y no
+# superar el visibility_timeout del broker Redis (1 hora por defecto).
+HORAS_PROGRAMACION_RECORDATORIOS = 1
+
+# Citas por tarea al repartir el envío de recordatorios entre los workers
+TAMANO_LOTE_RECORDATORIOS = 200
+
+# Citas por lote en la cancelación automática de citas no confirmadas
+TAMANO_LOTE_CANCELACIONES = 1000
+
+# Transiciones de citas aceptadas en una petición de /citas/bulk_transition/
+MAX_TRANSICIONES_MASIVAS = 100
+
+# Citas por lote al resolver los conflictos de un bloqueo de horario (cada
+# lote se cancela o marca en una transacción y notifica a sus pacientes)
+TAMANO_LOTE_CONFLICTOS = 500
+
+# Segundos de vigencia del catálogo de profesionales en caché (listado, perfiles
+# y disponibilidad). Los cambios lo invalidan antes mediante señales.
+CACHE_TTL_PROFESIONALES = 600
+
+# Segundos de vigencia del resumen del panel de administración. Los cambios de
+# usuarios, profesionales y citas lo invalidan antes mediante señales.
+CACHE_TTL_RESUMEN_ADMIN = 60
+
+# Cada cuántos segundos cada proceso resincroniza su filtro de tokens revocados
+SEGUNDOS_SINCRONIZACION_REVOCACION = 5
+
+# Tasa de falsos positivos del filtro de Bloom de tokens revocados
+TASA_FALSOS_POSITIVOS_REVOCACION = 0.001
+
+# Token Bearer exigido por /metrics (vacío: /metrics responde 403 a todos).
+# Con varios procesos, PROMETHEUS_MULTIPROC_DIR debe apuntar a un directorio
+# propio del servicio que se vacía al iniciar (ver config/metricas.py).
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+# Directorios multiproceso de otros servicios (separados por comas) que
+# /metrics agrega a los del proceso que atiende, como el del worker de Celery
+METRICAS_DIRECTORIOS = [
+    directorio for directorio in config('METRICAS_DIRECTORIOS', default='').split(',') if directorio
+]
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -5,7 +5,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework_simplejwt.views import TokenRefreshView
+from apps.usuarios.views import RefreshUsuarioView
+from config.metricas import vista_metricas
 
 urlpatterns = [
     # Admin
@@ -15,9 +16,13 @@ urlpatterns = [
     path('api/v1/', include('apps.usuarios.urls')),
     path('api/v1/', include('apps.profesionales.urls')),
     path('api/v1/', include('apps.citas.urls')),
+    path('api/v1/', include('apps.reportes.urls')),
+    
+    # Métricas en formato Prometheus
+    path('metrics', vista_metricas, name='metricas'),
     
     # JWT Token Refresh (alternativa)
-    path('api/v1/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/v1/token/refresh/', RefreshUsuarioView.as_view(), name='token_refresh'),
 ]
 
 # Servir archivos media en desarrollo
@@ -24,4 +24,18 @@ export const profesionalesService = {
     });
     return response.data;
   },
+
+  // Horarios de varios días en tramos [hora_inicio, cantidad] cada 'duracion_minutos'
+  getHorariosRango: async (id, fechaDesde, fechaHasta) => {
+    const response = await axiosInstance.get(`/profesionales/${id}/horarios_rango/`, {
+      params: { fecha_desde: fechaDesde, fecha_hasta: fechaHasta },
+    });
+    return response.data;
+  },
+
+  getProximoDisponible: async (especialidad = '', cantidad = 5) => {
+    const params = especialidad ? { especialidad, cantidad } : { cantidad };
+    const response = await axiosInstance.get('/profesionales/proximo_disponible/', { params });
+    return response.data;
+  },
 };
\ No newline at end of file
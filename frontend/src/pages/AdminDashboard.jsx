@@ -26,26 +26,19 @@ export default function AdminDashboard() {
 
   const fetchEstadisticas = async () => {
     try {
-      // Obtener estadísticas de citas
-      const responseCitas = await axiosInstance.get('/citas/estadisticas/');
-      
-      // Obtener todos los usuarios para contar
-      const responseUsuarios = await axiosInstance.get('/usuarios/');
-      const usuarios = responseUsuarios.data.results || responseUsuarios.data;
-      
-      // Obtener profesionales
-      const responseProfesionales = await axiosInstance.get('/profesionales/');
-      const profesionales = responseProfesionales.data.results || responseProfesionales.data;
+      // Resumen del sistema en una sola petición
+      const { data } = await axiosInstance.get('/reportes/resumen/');
       
       setEstadisticas({
-        total_usuarios: usuarios.length,
-        total_pacientes: usuarios.filter(u => u.rol === 'PACIENTE').length,
-        total_profesionales: profesionales.length,
-        usuarios_bloqueados: usuarios.filter(u => u.bloqueado).length,
-        total_citas: responseCitas.data.total_citas || 0,
-        citas_pendientes: (responseCitas.data.citas_agendadas || 0) + (responseCitas.data.citas_confirmadas || 0),
-        citas_completadas: responseCitas.data.citas_completadas || 0,
-        tasa_inasistencia: responseCitas.data.tasa_inasistencia || 0,
+        total_usuarios: data.usuarios.total,
+        total_pacientes: data.usuarios.por_rol.PACIENTE || 0,
+        total_profesionales: data.profesionales_activos,
+        usuarios_bloqueados: data.usuarios.bloqueados,
+        total_citas: data.citas.total_citas,
+        citas_hoy: data.hoy.total_citas,
+        citas_pendientes: data.citas.citas_pendientes,
+        citas_completadas: data.citas.citas_completadas,
+        tasa_inasistencia: data.citas.tasa_inasistencia,
       });
     } catch (error) {
       console.error('Error al cargar estadísticas:', error);
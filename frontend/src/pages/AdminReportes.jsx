@@ -8,7 +8,8 @@ export default function AdminReportes() {
   const [loading, setLoading] = useState(true);
   const [estadisticas, setEstadisticas] = useState(null);
   const [profesionales, setProfesionales] = useState([]);
-  const [usuarios, setUsuarios] = useState([]);
+  const [usuariosBloqueados, setUsuariosBloqueados] = useState([]);
+  const [pacientesConInasistencias, setPacientesConInasistencias] = useState([]);
 
   useEffect(() => {
     fetchDatos();
@@ -16,15 +17,13 @@ export default function AdminReportes() {
 
   const fetchDatos = async () => {
     try {
-      const [resCitas, resProfesionales, resUsuarios] = await Promise.all([
-        axiosInstance.get('/citas/estadisticas/'),
-        axiosInstance.get('/profesionales/'),
-        axiosInstance.get('/usuarios/'),
-      ]);
+      // Resumen del sistema en una sola petición
+      const { data } = await axiosInstance.get('/reportes/resumen/');
 
-      setEstadisticas(resCitas.data);
-      setProfesionales(resProfesionales.data.results || resProfesionales.data);
-      setUsuarios(resUsuarios.data.results || resUsuarios.data);
+      setEstadisticas(data.citas);
+      setProfesionales(data.profesionales);
+      setUsuariosBloqueados(data.usuarios_bloqueados);
+      setPacientesConInasistencias(data.pacientes_con_inasistencias);
     } catch (error) {
       console.error('Error al cargar datos:', error);
     } finally {
@@ -32,9 +31,6 @@ export default function AdminReportes() {
     }
   };
 
-  const usuariosBloqueados = usuarios.filter(u => u.bloqueado);
-  const pacientesConInasistencias = usuarios.filter(u => u.contador_inasistencias > 0 && u.rol === 'PACIENTE');
-
   return (
     <div className="min-h-screen bg-gray-50">
       {/* Header */}